@@ -0,0 +1,152 @@
+"""Сравнение поиска заголовков разделов: extractOne по категориям против cdist.
+
+На синтетическом резюме проверяется, что разбиение на блоки не изменилось.
+
+Пример:
+    python -m benchmarks.bench_headers --pages 20 --repeat 10
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import Callable, Dict, List, Optional
+
+from rapidfuzz import fuzz, process
+
+from candidate import module_nlp
+
+CONTENT_LINES = [
+    "Разработка backend-сервисов на Python и FastAPI",
+    "2019 - 2023, ООО Ромашка, ведущий разработчик",
+    "Python, Django, PostgreSQL, Redis, Docker",
+    "Настройка CI/CD в GitLab, мониторинг через Prometheus",
+    "Английский - B2",
+    "Москва, готов к переезду",
+    "МГТУ им. Баумана, информатика и вычислительная техника",
+    "Snowflake, dbt, Airflow",
+    "Опыт:",
+    "Проект",
+    "tech stack",
+    "Награды",
+    "Контакты для связи: +7 900 000-00-00",
+    "о себе",
+    "Навыкки",
+]
+
+
+def legacy_normalize_header(line: str) -> Optional[str]:
+    """Исходная реализация: по вызову extractOne на каждую категорию."""
+    for block_type, examples in module_nlp.HEADER_MAP.items():
+        match, score, _ = process.extractOne(line.lower(), examples, scorer=fuzz.ratio)
+        if score > 75:
+            return block_type
+    return None
+
+
+def legacy_split(text: str) -> Dict[str, str]:
+    """Исходная split_into_blocks_fuzzy со строкой за строкой."""
+    blocks = {}
+    current_block = "other"
+    blocks[current_block] = []
+    for line in text.splitlines():
+        clean = line.strip()
+        if not clean:
+            continue
+        possible_header = legacy_normalize_header(clean)
+        if possible_header:
+            current_block = possible_header
+            blocks[current_block] = []
+        else:
+            blocks.setdefault(current_block, []).append(clean)
+    for key in blocks:
+        blocks[key] = "\n".join(blocks[key])
+    return blocks
+
+
+def synthetic_resume(pages: int, lines_per_page: int = 50, seed: int = 0) -> str:
+    """Собирает текст резюме из заголовков и типичных строк с опечатками.
+
+    Args:
+        pages: Число страниц
+        lines_per_page: Строк на странице
+        seed: Зерно генератора
+
+    Returns:
+        str: Текст резюме
+    """
+    rng = random.Random(seed)
+    headers = [h for examples in module_nlp.HEADER_MAP.values() for h in examples]
+    lines: List[str] = []
+    for _ in range(pages * lines_per_page):
+        roll = rng.random()
+        if roll < 0.08:
+            header = rng.choice(headers)
+            lines.append(header.upper() if rng.random() < 0.5 else header.title())
+        elif roll < 0.12:
+            lines.append("")
+        else:
+            line = rng.choice(CONTENT_LINES)
+            if rng.random() < 0.2:
+                cut = rng.randrange(len(line))
+                line = line[:cut] + line[cut + 1 :]
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def measure(split: Callable[[str], Dict[str, str]], text: str, repeat: int) -> Dict:
+    """Замеряет задержку разбиения текста на блоки.
+
+    Args:
+        split: Функция разбиения
+        text: Текст резюме
+        repeat: Число повторов
+
+    Returns:
+        Dict: Средняя и медианная задержка в миллисекундах
+    """
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        split(text)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        "latency_ms_mean": round(statistics.mean(latencies), 2),
+        "latency_ms_median": round(statistics.median(latencies), 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    text = synthetic_resume(args.pages)
+    assert legacy_split(text) == module_nlp.split_into_blocks_fuzzy(text)
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    assert [legacy_normalize_header(line) for line in lines] == (
+        module_nlp.classify_headers(lines)
+    )
+
+    legacy = measure(legacy_split, text, args.repeat)
+    vectorized = measure(module_nlp.split_into_blocks_fuzzy, text, args.repeat)
+    print(
+        json.dumps(
+            {
+                "pages": args.pages,
+                "lines": len(lines),
+                "legacy": legacy,
+                "vectorized": vectorized,
+                "speedup": round(
+                    legacy["latency_ms_mean"] / vectorized["latency_ms_mean"], 2
+                ),
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Замер времени и памяти импорта пакета candidate в чистом интерпретаторе.
+
+Каждая инструкция импорта выполняется в отдельном процессе python -X importtime
+несколько раз. Выводятся время (медиана), пиковая память процесса, самые долгие
+модули по данным importtime и какие тяжелые зависимости оказались загружены.
+С --check скрипт завершается с ошибкой, если импорт пакета загрузил spaCy,
+клиенты модели или библиотеки разбора документов.
+
+Пример:
+    python -m benchmarks.bench_import --repeat 5
+    python -m benchmarks.bench_import --check
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+STATEMENTS = [
+    "import candidate",
+    "from candidate import process_json",
+    "from candidate import extract_brief",
+    "import candidate.server",
+]
+# Зависимости, которые загружаются только при первом использовании
+HEAVY_MODULES = [
+    "spacy",
+    "ollama",
+    "openai",
+    "pdfplumber",
+    "pypdfium2",
+    "docx",
+    "yake",
+    "uvicorn",
+]
+# Что импорт пакета не должен загружать (проверка --check)
+FORBIDDEN = {
+    "import candidate": HEAVY_MODULES + ["numpy", "fastapi", "httpx"],
+    "from candidate import process_json": HEAVY_MODULES,
+    "from candidate import extract_brief": HEAVY_MODULES,
+    "import candidate.server": HEAVY_MODULES,
+}
+PROBE = """
+import json, resource, sys
+{statement}
+print(json.dumps({{
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}}))
+"""
+
+
+def parse_importtime(stderr: str, top: int) -> List[Dict]:
+    """
+    Выбирает из вывода -X importtime модули с наибольшим накопленным временем.
+
+    Args:
+        stderr: Вывод интерпретатора в stderr
+        top: Сколько модулей вернуть
+
+    Returns:
+        List[Dict]: Пакеты верхнего уровня с накопленным временем в миллисекундах
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[12:].split("|"))
+        if "." not in name and not name.startswith("_"):
+            modules.append({"module": name, "ms": int(cumulative) / 1000})
+    return sorted(modules, key=lambda item: -item["ms"])[:top]
+
+
+def measure(statement: str, repeat: int, top: int) -> Dict:
+    """
+    Импортирует в отдельном процессе repeat раз.
+
+    Args:
+        statement: Инструкция импорта
+        repeat: Число запусков
+        top: Сколько самых долгих модулей показать
+
+    Returns:
+        Dict: Медиана и максимум времени, память, загруженные тяжелые модули
+    """
+    code = PROBE.format(
+        statement=statement, heavy=HEAVY_MODULES + ["numpy", "fastapi", "httpx"]
+    )
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    timings, probe, stderr = [], {}, ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True,
+            text=True,
+            env=env,
+            check=True,
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        stderr = result.stderr
+    return {
+        "wall_ms_p50": round(statistics.median(timings), 1),
+        "wall_ms_max": round(max(timings), 1),
+        "max_rss_mb": round(probe["max_rss_mb"], 1),
+        "loaded": probe["loaded"],
+        "slowest": parse_importtime(stderr, top),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5, help="slowest modules to show")
+    parser.add_argument(
+        "--check", action="store_true", help="fail if heavy modules are imported"
+    )
+    args = parser.parse_args()
+
+    baseline = measure("pass", args.repeat, 0)
+    results = {"interpreter_ms_p50": baseline["wall_ms_p50"]}
+    failures = []
+    for statement in STATEMENTS:
+        results[statement] = measure(statement, args.repeat, args.top)
+        unexpected = set(results[statement]["loaded"]) & set(FORBIDDEN[statement])
+        if unexpected:
+            failures.append(f"{statement}: imported {', '.join(sorted(unexpected))}")
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    if args.check and failures:
+        sys.exit("\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
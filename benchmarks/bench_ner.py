@@ -0,0 +1,88 @@
+"""Сравнение задержки и памяти NER: полный пайплайн на всем тексте против облегченного.
+
+Каждый режим запускается в отдельном процессе, чтобы RSS не смешивался.
+
+Пример:
+    python -m benchmarks.bench_ner data/resume.pdf --repeat 20
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+
+def run_mode(mode: str, files: List[str], repeat: int) -> Dict:
+    """Замеряет один режим в текущем процессе.
+
+    Args:
+        mode: "legacy" - полный пайплайн на всем тексте, "lean" - только NER на начале резюме
+        files: Пути к резюме
+        repeat: Сколько раз разбирать каждое резюме
+
+    Returns:
+        Dict: Время загрузки модели, задержка на резюме и пиковый RSS
+    """
+    started = time.perf_counter()
+    from candidate import module_nlp
+
+    nlp = module_nlp.get_nlp()
+    load_seconds = time.perf_counter() - started
+    texts = [module_nlp.extract_text(path) for path in files]
+    latencies = []
+    for _ in range(repeat):
+        for text in texts:
+            started = time.perf_counter()
+            if mode == "legacy":
+                module_nlp.base_info_from_doc(nlp(text), text)
+            else:
+                module_nlp.extract_base_info(text)
+            latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        "mode": mode,
+        "pipeline": nlp.pipe_names,
+        "load_s": round(load_seconds, 3),
+        "latency_ms_mean": round(statistics.mean(latencies), 2),
+        "latency_ms_p95": round(
+            sorted(latencies)[round(0.95 * (len(latencies) - 1))], 2
+        ),
+        "max_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "files", nargs="*", default=[os.path.join("data", "resume.pdf")]
+    )
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--mode", choices=["legacy", "lean"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.files, args.repeat)))
+        return
+
+    results = []
+    for mode, lean in (("legacy", "0"), ("lean", "1")):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_ner", "--mode", mode]
+            + ["--repeat", str(args.repeat)]
+            + args.files,
+            env={**os.environ, "SPACY_LEAN": lean},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Сравнение раскладок промпта legacy и shared по размеру и общему началу.
+
+Для синтетического кандидата с заданным числом навыков и пунктов опыта
+собираются промпты всех вакансий каталога. Выводятся средняя длина промпта,
+длина общего для всех вакансий начала (его KV-кеш сервер модели может
+переиспользовать), уникальная часть на вакансию и подобранный num_ctx.
+
+Пример:
+    python -m benchmarks.bench_prompt --keywords 50
+"""
+import argparse
+import json
+import os
+import random
+from typing import Dict
+
+from benchmarks.resumes import EXPERIENCE, SKILLS
+
+
+def synthetic_candidate(keywords: int, seed: int = 0) -> Dict:
+    """Кандидат с keywords навыками и keywords пунктами опыта, с повторами."""
+    rng = random.Random(seed)
+    words = [word for line in EXPERIENCE for word in line.split()]
+    return {
+        "skills": [
+            rng.choice([skill, skill.upper()])
+            for skill in rng.choices(SKILLS, k=keywords)
+        ],
+        "experience": rng.choices(words + SKILLS, k=keywords),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keywords", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from candidate.catalog import vacancy_catalog
+    from candidate.llm_match import build_candidate_section, build_prompt, context_size
+
+    data = synthetic_candidate(args.keywords, args.seed)
+    vacancies = list(vacancy_catalog.snapshot().vacancies.values())
+    results = {}
+    for layout in ("legacy", "shared"):
+        section = build_candidate_section(data, layout)
+        prompts = [build_prompt(section, vacancy, layout) for vacancy in vacancies]
+        common = len(os.path.commonprefix(prompts))
+        total = sum(len(prompt) for prompt in prompts)
+        results[layout] = {
+            "prompt_chars_mean": total // len(prompts),
+            "shared_prefix_chars": common,
+            "unique_chars_mean": (total - common * len(prompts)) // len(prompts),
+            "num_ctx": context_size(prompts),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
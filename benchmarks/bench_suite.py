@@ -0,0 +1,385 @@
+"""Офлайн-набор бенчмарков: разбор резюме, задержка от числа вакансий и нагрузка на API.
+
+Модель заменяется локальной заглушкой benchmarks.stub_llm, резюме генерируются
+benchmarks.resumes, кеши отключаются. Результат выводится в JSON и может быть
+сохранен в файл, чтобы сравнивать коммиты через --baseline.
+
+Пример:
+    python -m benchmarks.bench_suite --output bench.json
+    python -m benchmarks.bench_suite parse vacancies --baseline bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.resumes import FORMATS, generate_corpus, generate_resume
+from benchmarks.stub_llm import StubLLMServer
+
+SCENARIOS = ("parse", "vacancies", "load")
+
+
+def summarize(latencies: List[float]) -> Dict:
+    """Среднее, медиана, 95-й перцентиль и максимум задержек в миллисекундах."""
+    ordered = sorted(latencies)
+    return {
+        "latency_ms_mean": round(statistics.mean(ordered), 2),
+        "latency_ms_p50": round(ordered[round(0.5 * (len(ordered) - 1))], 2),
+        "latency_ms_p95": round(ordered[round(0.95 * (len(ordered) - 1))], 2),
+        "latency_ms_max": round(ordered[-1], 2),
+    }
+
+
+def configure_environment(stub: StubLLMServer) -> Dict[str, str]:
+    """
+    Направляет сервис на заглушку и отключает кеши.
+
+    Вызывается до импорта пакета candidate, который читает настройки при импорте.
+
+    Args:
+        stub: Запущенная заглушка модели
+
+    Returns:
+        Dict[str, str]: Переменные окружения для дочерних процессов
+    """
+    os.environ.update(
+        {
+            "LLM_BACKEND": "ollama",
+            "OLLAMA_API_URL": stub.url,
+            "LLM_CACHE_BACKEND": "none",
+            "RESULT_CACHE_BACKEND": "none",
+            "CATALOG_WATCH_INTERVAL": "0",
+        }
+    )
+    return dict(os.environ)
+
+
+def bench_parse(args: argparse.Namespace) -> Dict:
+    """
+    Разбор резюме без модели: задержка по формату и объему и пропускная способность пула.
+
+    Args:
+        args: Аргументы командной строки
+
+    Returns:
+        Dict: "latency" по сочетаниям формата и объема и "throughput" пула процессов
+    """
+    from candidate.module_nlp import extract_brief
+
+    corpus = generate_corpus(args.formats, args.pages, args.count)
+    latency = {}
+    for fmt in args.formats:
+        for size in args.pages:
+            items = [i for i in corpus if i["format"] == fmt and i["pages"] == size]
+            extract_brief(items[0]["content"])
+            timings = []
+            for _ in range(args.repeat):
+                for item in items:
+                    started = time.perf_counter()
+                    extract_brief(item["content"])
+                    timings.append((time.perf_counter() - started) * 1000)
+            latency[f"{fmt}_{size}p"] = summarize(timings)
+
+    contents = [item["content"] for item in corpus] * args.repeat
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        list(executor.map(extract_brief, contents[: args.workers]))
+        started = time.perf_counter()
+        list(executor.map(extract_brief, contents))
+        elapsed = time.perf_counter() - started
+    return {
+        "latency": latency,
+        "throughput": {
+            "workers": args.workers,
+            "documents": len(contents),
+            "docs_per_s": round(len(contents) / elapsed, 2),
+        },
+    }
+
+
+def synthetic_catalog(count: int) -> Dict:
+    """
+    Собирает каталог из count вакансий, повторяя вакансии data/vacancies.json.
+
+    Args:
+        count: Число вакансий
+
+    Returns:
+        Dict: Словарь вакансий в формате vacancies.json с уникальными названиями
+    """
+    from candidate.utils import vacancies
+
+    base = list(vacancies.values())
+    catalog = {}
+    for i in range(count):
+        vacancy = dict(base[i % len(base)])
+        vacancy["название"] = f"{vacancy['название']} #{i + 1}"
+        catalog[f"vacancy_{i + 1}"] = vacancy
+    return catalog
+
+
+def bench_vacancies(args: argparse.Namespace) -> Dict:
+    """
+    Задержка одного сопоставления в зависимости от числа вакансий, отправляемых в модель.
+
+    Args:
+        args: Аргументы командной строки
+
+    Returns:
+        Dict: Задержка process_json_async для каждого числа вакансий
+    """
+    from candidate.catalog import VacancyCatalog
+    from candidate.llm_match import process_json_async
+    from candidate.module_nlp import extract_brief
+
+    resume = extract_brief(generate_resume("txt", 1))
+    results = {}
+    for count in args.vacancy_counts:
+        catalog = VacancyCatalog(synthetic_catalog(count))
+
+        async def run(catalog: VacancyCatalog) -> List[float]:
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                result = await process_json_async(
+                    resume,
+                    catalog,
+                    concurrency=args.concurrency,
+                    top_k=0,
+                    scoring=args.scoring,
+                )
+                timings.append((time.perf_counter() - started) * 1000)
+                assert "error" not in result, result
+            return timings
+
+        results[str(count)] = summarize(asyncio.run(run(catalog)))
+    return {
+        "llm_latency_s": args.latency,
+        "concurrency": args.concurrency,
+        "scoring": args.scoring,
+        "by_vacancies": results,
+    }
+
+
+def parse_stage_metrics(text: str) -> Dict[str, float]:
+    """Средняя длительность этапов в миллисекундах из ответа /metrics."""
+    sums: Dict[str, float] = {}
+    counts: Dict[str, float] = {}
+    for line in text.splitlines():
+        for suffix, target in (("_sum", sums), ("_count", counts)):
+            prefix = f'candidate_stage_seconds{suffix}{{stage="'
+            if line.startswith(prefix):
+                stage, value = line[len(prefix) :].split('"} ')
+                target[stage] = float(value)
+    return {
+        stage: round(sums[stage] / counts[stage] * 1000, 2)
+        for stage in sums
+        if counts.get(stage)
+    }
+
+
+def bench_load(args: argparse.Namespace, env: Dict[str, str]) -> Dict:
+    """
+    Сквозная нагрузка: сервер uvicorn и параллельные клиенты POST /candidate_match.
+
+    Args:
+        args: Аргументы командной строки
+        env: Переменные окружения сервера
+
+    Returns:
+        Dict: Пропускная способность, задержки, коды ответов и средние длительности этапов
+    """
+    corpus = generate_corpus(
+        args.formats, [1], max(1, args.requests // len(args.formats))
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "candidate.server:app",
+            "--port",
+            str(args.port),
+            "--log-level",
+            "warning",
+        ],
+        env={**env, "PARSE_WORKERS": str(args.workers)},
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        deadline = time.monotonic() + 120
+        while True:
+            try:
+                httpx.get(base_url + "/", timeout=1).raise_for_status()
+                break
+            except httpx.HTTPError:
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError("Server did not start")
+                time.sleep(0.5)
+
+        async def run() -> Dict:
+            timings: List[float] = []
+            statuses: Dict[str, int] = {}
+            queue: asyncio.Queue = asyncio.Queue()
+            for i in range(args.requests):
+                queue.put_nowait(corpus[i % len(corpus)])
+
+            async def client(http: httpx.AsyncClient) -> None:
+                while not queue.empty():
+                    item = queue.get_nowait()
+                    started = time.perf_counter()
+                    response = await http.post(
+                        "/candidate_match",
+                        files={"files": (item["name"], item["content"])},
+                    )
+                    timings.append((time.perf_counter() - started) * 1000)
+                    key = str(response.status_code)
+                    statuses[key] = statuses.get(key, 0) + 1
+
+            async with httpx.AsyncClient(base_url=base_url, timeout=600) as http:
+                started = time.perf_counter()
+                await asyncio.gather(*(client(http) for _ in range(args.clients)))
+                elapsed = time.perf_counter() - started
+                metrics = (await http.get("/metrics")).text
+            return {
+                "clients": args.clients,
+                "requests": args.requests,
+                "requests_per_s": round(args.requests / elapsed, 2),
+                **summarize(timings),
+                "statuses": statuses,
+                "stage_ms_mean": parse_stage_metrics(metrics),
+            }
+
+        return asyncio.run(run())
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def flatten(data: Dict, prefix: str = "") -> Dict[str, float]:
+    """Раскладывает вложенный словарь результатов в {путь.к.метрике: число}."""
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(current: Dict, baseline: Dict) -> Dict[str, Dict]:
+    """
+    Сравнивает задержки и пропускную способность с результатами другого коммита.
+
+    Args:
+        current: Раздел "scenarios" текущего запуска
+        baseline: Раздел "scenarios" сохраненного запуска
+
+    Returns:
+        Dict[str, Dict]: Для каждой общей метрики прежнее и новое значение и
+        изменение в процентах
+    """
+    old, new = flatten(baseline), flatten(current)
+    return {
+        path: {
+            "baseline": old[path],
+            "current": new[path],
+            "change_pct": round((new[path] - old[path]) / old[path] * 100, 1),
+        }
+        for path in new
+        if path in old and old[path] and ("latency_ms" in path or "per_s" in path)
+    }
+
+
+def git_commit() -> str | None:
+    """Текущий коммит репозитория, если он доступен."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "scenarios", nargs="*", help=f"{', '.join(SCENARIOS)}; by default all"
+    )
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--pages", nargs="+", type=int, default=[1, 5, 20])
+    parser.add_argument("--count", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--latency", type=float, default=0.2, help="LLM latency, s")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--parallel", type=int, default=4, help="LLM parallel slots")
+    parser.add_argument("--vacancy-counts", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--scoring", choices=["separate", "combined"], default="separate"
+    )
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=24)
+    parser.add_argument("--port", type=int, default=18000)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    stub = StubLLMServer(
+        latency=args.latency, jitter=args.jitter, parallel=args.parallel
+    ).start()
+    env = configure_environment(stub)
+
+    scenarios = {}
+    for name in args.scenarios or SCENARIOS:
+        started = time.perf_counter()
+        if name == "parse":
+            scenarios[name] = bench_parse(args)
+        elif name == "vacancies":
+            scenarios[name] = bench_vacancies(args)
+        else:
+            scenarios[name] = bench_load(args, env)
+        scenarios[name]["wall_s"] = round(time.perf_counter() - started, 2)
+    stub.shutdown()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "args": {
+                k: v for k, v in vars(args).items() if k not in ("output", "baseline")
+            },
+        },
+        "scenarios": scenarios,
+    }
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            report["comparison"] = compare(scenarios, json.load(file)["scenarios"])
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Генератор синтетических резюме в форматах PDF, DOCX и TXT разного объема.
+
+Резюме детерминированы по seed, поэтому замеры на разных коммитах идут на
+одинаковых файлах. Для PDF текст с кириллицей встраивается шрифтом TrueType
+через pypdfium2.
+
+Пример:
+    python -m benchmarks.resumes benchmarks/out/resumes --count 3 --pages 1 5 20
+"""
+import argparse
+import ctypes
+import io
+import json
+import os
+import random
+from typing import Dict, List
+
+import docx
+import pypdfium2
+import pypdfium2.raw as pdfium_c
+
+FORMATS = ("pdf", "docx", "txt")
+DEFAULT_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+LINES_PER_PAGE = 45
+
+FIRST_NAMES = [
+    "Иван",
+    "Мария",
+    "Алексей",
+    "Елена",
+    "Дмитрий",
+    "Ольга",
+    "Сергей",
+    "Анна",
+]
+LAST_NAMES = ["Петров", "Смирнова", "Кузнецов", "Попова", "Васильев", "Соколова"]
+CITIES = ["Москва", "Санкт-Петербург", "Казань", "Новосибирск", "Екатеринбург"]
+SKILLS = [
+    "Python",
+    "SQL",
+    "PostgreSQL",
+    "Docker",
+    "Kubernetes",
+    "FastAPI",
+    "Django",
+    "pandas",
+    "NumPy",
+    "PyTorch",
+    "scikit-learn",
+    "Airflow",
+    "Spark",
+    "Git",
+    "Linux",
+    "Redis",
+    "машинное обучение",
+    "анализ данных",
+    "A/B тестирование",
+    "управление проектами",
+]
+EXPERIENCE = [
+    "Разработка backend-сервисов на Python и FastAPI",
+    "Построение ETL-пайплайнов в Airflow и Spark",
+    "Обучение и внедрение моделей машинного обучения",
+    "Проектирование схем баз данных PostgreSQL",
+    "Настройка CI/CD и мониторинга через Prometheus",
+    "Анализ продуктовых метрик и проведение A/B тестов",
+    "Руководство командой из пяти разработчиков",
+    "Подготовка технической документации и отчетов",
+]
+PROJECTS = [
+    "Рекомендательная система для интернет-магазина",
+    "Сервис распознавания документов",
+    "Чат-бот поддержки клиентов на основе LLM",
+    "Прогнозирование спроса для сети магазинов",
+]
+
+
+def synthetic_lines(pages: int, seed: int = 0) -> List[str]:
+    """
+    Собирает строки резюме примерно на pages страниц.
+
+    Args:
+        pages: Сколько страниц текста сгенерировать
+        seed: Начальное значение генератора случайных чисел
+
+    Returns:
+        List[str]: Строки резюме: шапка, навыки, опыт, проекты и образование
+    """
+    rng = random.Random(seed)
+    lines = [
+        f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}",
+        f"г. {rng.choice(CITIES)}",
+        f"Email: user{seed}@example.com",
+        f"Телефон: +7 (9{rng.randint(10, 99)}) {rng.randint(100, 999)}-"
+        f"{rng.randint(10, 99)}-{rng.randint(10, 99)}",
+        "",
+        "Навыки",
+        ", ".join(rng.sample(SKILLS, 8)),
+        ", ".join(rng.sample(SKILLS, 6)),
+        "",
+        "Опыт работы",
+    ]
+    body_lines = max(1, pages * LINES_PER_PAGE - len(lines) - 8)
+    for i in range(body_lines):
+        if i % 10 == 0:
+            year = 2024 - i // 10
+            lines.append(
+                f"{year - 2} - {year}, ООО Компания {i // 10 + 1}, разработчик"
+            )
+        else:
+            lines.append(
+                f"{rng.choice(EXPERIENCE)}; стек: {', '.join(rng.sample(SKILLS, 3))}"
+            )
+    lines += ["", "Проекты"]
+    lines += rng.sample(PROJECTS, 3)
+    lines += ["", "Образование", "МГУ им. Ломоносова, прикладная математика"]
+    return lines
+
+
+def write_txt(lines: List[str]) -> bytes:
+    """Возвращает резюме в виде текста UTF-8."""
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def write_docx(lines: List[str]) -> bytes:
+    """Возвращает резюме в виде DOCX: одна строка - один абзац."""
+    document = docx.Document()
+    for line in lines:
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def write_pdf(lines: List[str], font_path: str = DEFAULT_FONT) -> bytes:
+    """
+    Возвращает резюме в виде PDF с текстовым слоем, по LINES_PER_PAGE строк на страницу.
+
+    Args:
+        lines: Строки резюме
+        font_path: Шрифт TrueType с кириллицей
+
+    Returns:
+        bytes: Содержимое PDF
+    """
+    pdf = pypdfium2.PdfDocument.new()
+    with open(font_path, "rb") as file:
+        font_data = file.read()
+    # Буфер шрифта должен жить, пока документ не сохранен
+    font_buffer = (ctypes.c_uint8 * len(font_data)).from_buffer_copy(font_data)
+    font = pdfium_c.FPDFText_LoadFont(
+        pdf.raw, font_buffer, len(font_data), pdfium_c.FPDF_FONT_TRUETYPE, True
+    )
+    for start in range(0, len(lines), LINES_PER_PAGE):
+        page = pdf.new_page(595, 842)
+        for number, line in enumerate(lines[start : start + LINES_PER_PAGE]):
+            if not line:
+                continue
+            text = pdfium_c.FPDFPageObj_CreateTextObj(pdf.raw, font, 10)
+            encoded = (line + "\x00").encode("utf-16-le")
+            pdfium_c.FPDFText_SetText(
+                text, ctypes.cast(ctypes.c_char_p(encoded), pdfium_c.FPDF_WIDESTRING)
+            )
+            pdfium_c.FPDFPageObj_Transform(text, 1, 0, 0, 1, 40, 800 - number * 17)
+            pdfium_c.FPDFPage_InsertObject(page.raw, text)
+        pdfium_c.FPDFPage_GenerateContent(page.raw)
+        page.close()
+    buffer = io.BytesIO()
+    pdf.save(buffer)
+    pdfium_c.FPDFFont_Close(font)
+    pdf.close()
+    return buffer.getvalue()
+
+
+def generate_resume(fmt: str, pages: int, seed: int = 0) -> bytes:
+    """
+    Генерирует резюме в заданном формате.
+
+    Args:
+        fmt: "pdf", "docx" или "txt"
+        pages: Примерный объем в страницах
+        seed: Начальное значение генератора случайных чисел
+
+    Returns:
+        bytes: Содержимое файла
+
+    Raises:
+        ValueError: Если формат не поддерживается
+    """
+    lines = synthetic_lines(pages, seed)
+    if fmt == "pdf":
+        return write_pdf(lines)
+    if fmt == "docx":
+        return write_docx(lines)
+    if fmt == "txt":
+        return write_txt(lines)
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+def generate_corpus(
+    formats: List[str], pages: List[int], count: int, seed: int = 0
+) -> List[Dict]:
+    """
+    Генерирует набор резюме для всех сочетаний формата и объема.
+
+    Args:
+        formats: Форматы файлов
+        pages: Объемы в страницах
+        count: Сколько резюме каждого сочетания
+        seed: Начальное значение; у каждого резюме свое seed + номер
+
+    Returns:
+        List[Dict]: Словари с ключами name, format, pages и content
+    """
+    corpus = []
+    for fmt in formats:
+        for size in pages:
+            for i in range(count):
+                corpus.append(
+                    {
+                        "name": f"resume_{size}p_{i}.{fmt}",
+                        "format": fmt,
+                        "pages": size,
+                        "content": generate_resume(fmt, size, seed + i),
+                    }
+                )
+    return corpus
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output_dir")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--pages", nargs="+", type=int, default=[1, 5, 20])
+    parser.add_argument("--count", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    corpus = generate_corpus(args.formats, args.pages, args.count, args.seed)
+    for item in corpus:
+        with open(os.path.join(args.output_dir, item["name"]), "wb") as file:
+            file.write(item["content"])
+    print(
+        json.dumps(
+            [{"file": item["name"], "bytes": len(item["content"])} for item in corpus],
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
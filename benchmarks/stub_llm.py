@@ -0,0 +1,224 @@
+"""Локальная заглушка сервера модели: Ollama chat API и OpenAI-совместимый API.
+
+Отвечает корректным JSON по схеме VacancySchema (или MultiVacancySchema, если
+она передана в запросе) с настраиваемой задержкой, чтобы замерять сервис без
+GPU и живой модели. Процент соответствия детерминирован по тексту промпта.
+
+Пример:
+    python -m benchmarks.stub_llm --port 11435 --latency 0.5 --parallel 4
+    OLLAMA_API_URL=http://localhost:11435 uvicorn candidate.server:app
+"""
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    """
+    HTTP-сервер заглушки.
+
+    Эндпоинты: POST /api/chat и GET /api/version (Ollama), POST
+    /v1/chat/completions и GET /v1/models (OpenAI-совместимый API).
+    """
+
+    daemon_threads = True
+    # Очередь соединений больше стандартных 5: иначе при одновременных запросах
+    # часть соединений ждет повторной отправки SYN около секунды
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency: float = 0.5,
+        jitter: float = 0.0,
+        parallel: int = 0,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            port: Порт, 0 - любой свободный
+            latency: Задержка ответа в секундах
+            jitter: Случайная добавка к задержке от 0 до jitter секунд
+            parallel: Сколько запросов обрабатывается одновременно, как
+                OLLAMA_NUM_PARALLEL; 0 - без ограничения
+            seed: Начальное значение генератора задержек
+        """
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.slots = threading.Semaphore(parallel) if parallel > 0 else None
+        self.random = random.Random(seed)
+        self.requests = 0
+        # Тело последнего запроса к модели, для проверки переданных параметров
+        self.last_request: Dict | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        """Адрес сервера для OLLAMA_API_URL; для OpenAI добавляется /v1."""
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "StubLLMServer":
+        """Запускает сервер в фоновом потоке."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def handle_error(self, request, client_address) -> None:
+        # Клиент не дождался ответа (таймаут бэкенда) - это не ошибка заглушки
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def generate(self, prompt: str, combined: bool = False) -> Dict:
+        """
+        Ждет задержку и возвращает ответ по схеме VacancySchema.
+
+        Задержка одна на запрос и в режиме combined, независимо от числа вакансий.
+
+        Args:
+            prompt: Последнее сообщение пользователя
+            combined: Ответить по схеме MultiVacancySchema, оценив каждую
+                вакансию промпта
+
+        Returns:
+            Dict: vacancy, percentage, explaining и recommendations или results
+                со списком таких оценок
+        """
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self.random.uniform(0, self.jitter)
+        if self.slots is not None:
+            with self.slots:
+                time.sleep(delay)
+        else:
+            time.sleep(delay)
+        titles = [
+            line[len("Вакансия: ") :]
+            for line in prompt.splitlines()
+            if line.startswith("Вакансия: ")
+        ] or ["Вакансия"]
+        answers = [
+            {
+                "vacancy": title,
+                "percentage": 40
+                + hashlib.sha256((title + prompt).encode("utf-8")).digest()[0] % 60,
+                "explaining": "Кандидат владеет большей частью требуемых компетенций.",
+                "recommendations": "Углубить знания в недостающих областях.",
+            }
+            for title in titles
+        ]
+        if not combined:
+            return answers[0]
+        return {
+            "results": [
+                {"number": number, **answer}
+                for number, answer in enumerate(answers, start=1)
+            ]
+        }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов заглушки."""
+
+    server: StubLLMServer
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def send_json(self, data: Dict, status: int = 200) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path == "/api/version":
+            self.send_json({"version": "stub"})
+        elif self.path == "/v1/models":
+            self.send_json(
+                {"object": "list", "data": [{"id": "stub", "object": "model"}]}
+            )
+        else:
+            self.send_json({"error": "not found"}, 404)
+
+    def do_POST(self) -> None:  # noqa: N802
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.last_request = request
+        prompt = request["messages"][-1]["content"]
+        prompt_tokens = len(prompt.split())
+        schema = request.get("format") or request.get("response_format", {}).get(
+            "json_schema", {}
+        ).get("schema", {})
+        combined = "results" in schema.get("properties", {})
+        if self.path == "/api/chat":
+            started = time.perf_counter_ns()
+            content = json.dumps(
+                self.server.generate(prompt, combined), ensure_ascii=False
+            )
+            elapsed = time.perf_counter_ns() - started
+            self.send_json(
+                {
+                    "model": request["model"],
+                    "created_at": "1970-01-01T00:00:00Z",
+                    "message": {"role": "assistant", "content": content},
+                    "done": True,
+                    "done_reason": "stop",
+                    "total_duration": elapsed,
+                    "load_duration": 0,
+                    "prompt_eval_count": prompt_tokens,
+                    "prompt_eval_duration": elapsed // 5,
+                    "eval_count": len(content.split()),
+                    "eval_duration": elapsed - elapsed // 5,
+                }
+            )
+        elif self.path == "/v1/chat/completions":
+            content = json.dumps(
+                self.server.generate(prompt, combined), ensure_ascii=False
+            )
+            completion_tokens = len(content.split())
+            self.send_json(
+                {
+                    "id": "stub",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": request["model"],
+                    "choices": [
+                        {
+                            "index": 0,
+                            "finish_reason": "stop",
+                            "message": {"role": "assistant", "content": content},
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                }
+            )
+        else:
+            self.send_json({"error": "not found"}, 404)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--parallel", type=int, default=0)
+    args = parser.parse_args()
+
+    server = StubLLMServer(args.port, args.latency, args.jitter, args.parallel)
+    print(f"Stub LLM server at {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
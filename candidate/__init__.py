@@ -1,23 +1,84 @@
-from .llm_match import process_json
-from .logging_config import configure_logging
-from .module_nlp import extract_brief
-from .utils import (
-    API_URL,
-    MODEL_NAME,
-    SYSTEM_PROMPT,
-    VacancySchema,
-    ollama_chat,
-    vacancies,
-)
+"""Пакет сопоставления резюме с вакансиями.
+
+Атрибуты пакета импортируются лениво, при первом обращении: импорт candidate
+не загружает spaCy, библиотеки разбора документов и клиенты модели.
+"""
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .catalog import VacancyCatalog, vacancy_catalog
+    from .llm_match import (
+        process_json,
+        process_json_async,
+        rank_vacancies,
+        rank_vacancies_async,
+    )
+    from .logging_config import configure_logging
+    from .module_nlp import extract_brief
+    from .utils import (
+        API_URL,
+        MODEL_NAME,
+        SYSTEM_PROMPT,
+        MultiVacancySchema,
+        VacancySchema,
+        ollama_chat,
+        ollama_chat_async,
+        set_llm_cache,
+        vacancies,
+    )
+
+# Публичный атрибут пакета -> модуль, из которого он импортируется
+_LAZY_ATTRIBUTES = {
+    "VacancyCatalog": "catalog",
+    "vacancy_catalog": "catalog",
+    "process_json": "llm_match",
+    "process_json_async": "llm_match",
+    "rank_vacancies": "llm_match",
+    "rank_vacancies_async": "llm_match",
+    "configure_logging": "logging_config",
+    "extract_brief": "module_nlp",
+    "API_URL": "utils",
+    "MODEL_NAME": "utils",
+    "SYSTEM_PROMPT": "utils",
+    "VacancySchema": "utils",
+    "MultiVacancySchema": "utils",
+    "ollama_chat": "utils",
+    "ollama_chat_async": "utils",
+    "set_llm_cache": "utils",
+    "vacancies": "utils",
+}
 
 __all__ = [
     "SYSTEM_PROMPT",
     "vacancies",
+    "vacancy_catalog",
+    "VacancyCatalog",
     "process_json",
+    "process_json_async",
+    "rank_vacancies",
+    "rank_vacancies_async",
     "API_URL",
     "MODEL_NAME",
     "configure_logging",
     "extract_brief",
     "ollama_chat",
+    "ollama_chat_async",
+    "set_llm_cache",
     "VacancySchema",
+    "MultiVacancySchema",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """Импортирует публичный атрибут из его модуля при первом обращении."""
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
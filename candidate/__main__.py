@@ -1,4 +1,54 @@
-import uvicorn
+import argparse
+import asyncio
+import json
+import sys
+
+
+async def run_batch(directory: str, concurrency: int) -> None:
+    """
+    Обрабатывает все резюме из директории и печатает результаты в формате JSON Lines.
+
+    Args:
+        directory: Директория с резюме (pdf, docx, txt) и zip-архивами
+        concurrency: Сколько резюме одновременно сопоставлять с вакансиями
+    """
+    from .batch import iter_directory, match_batch
+    from .workers import parse_pool
+
+    try:
+        async for result in match_batch(
+            iter_directory(directory), concurrency=concurrency
+        ):
+            sys.stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+    finally:
+        parse_pool.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m candidate")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("serve", help="запустить API-сервер (по умолчанию)")
+    batch = commands.add_parser("batch", help="пакетно обработать директорию резюме")
+    batch.add_argument("directory", help="директория с резюме и zip-архивами")
+    batch.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="сколько резюме одновременно сопоставлять с вакансиями",
+    )
+    args = parser.parse_args()
+
+    if args.command == "batch":
+        from .utils import BATCH_CONCURRENCY
+
+        concurrency = args.concurrency or BATCH_CONCURRENCY
+        asyncio.run(run_batch(args.directory, concurrency))
+    else:
+        import uvicorn
+
+        uvicorn.run("candidate.server:app", host="0.0.0.0", port=8000)
+
 
 if __name__ == "__main__":
-    uvicorn.run("candidate.server:app", host="0.0.0.0", port=8000)
+    main()
@@ -0,0 +1,608 @@
+"""Файл с бэкендами LLM: Ollama и OpenAI-совместимые серверы (vLLM, llama.cpp server)."""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Sequence
+
+import httpx
+import ollama
+import openai
+
+from .metrics import LLM_REQUEST_SECONDS, observe_llm_usage
+from .resilience import CircuitBreaker, backoff_delay
+from .utils import (
+    API_URL,
+    LLM_BACKEND,
+    LLM_BREAKER_RESET,
+    LLM_BREAKER_THRESHOLD,
+    LLM_CONCURRENCY,
+    LLM_CONNECT_TIMEOUT,
+    LLM_HEALTH_TIMEOUT,
+    LLM_KEEPALIVE_CONNECTIONS,
+    LLM_MAX_CONNECTIONS,
+    LLM_RETRIES,
+    LLM_RETRY_BACKOFF,
+    LLM_RETRY_MAX_DELAY,
+    LLM_TIMEOUT,
+    MODEL_NAME,
+    OPENAI_API_KEY,
+    OPENAI_BASE_URL,
+    cache_response,
+    lookup_response,
+    ollama_chat,
+    ollama_chat_async,
+)
+
+# Статусы ответа, при которых сервер модели считается временно недоступным
+TRANSIENT_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+def llm_limits() -> httpx.Limits:
+    """Возвращает ограничения пула соединений с моделью (keep-alive)."""
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_KEEPALIVE_CONNECTIONS,
+    )
+
+
+def llm_timeout(timeout: float) -> httpx.Timeout:
+    """
+    Возвращает таймаут одного запроса к модели.
+
+    Args:
+        timeout: Сколько секунд ждать ответ
+
+    Returns:
+        httpx.Timeout: Таймаут с коротким ожиданием соединения LLM_CONNECT_TIMEOUT,
+        чтобы недоступный сервер обнаруживался быстро
+    """
+    return httpx.Timeout(timeout, connect=min(timeout, LLM_CONNECT_TIMEOUT))
+
+
+class LLMBackend:
+    """
+    Базовый бэкенд модели: один запрос в виде чата и пакет запросов одного кандидата.
+
+    Ответ со схемой возвращается строкой JSON. Таймаут запроса выбрасывается
+    как встроенный TimeoutError независимо от клиента бэкенда.
+    """
+
+    def __init__(self, model_name: str, concurrency: int = LLM_CONCURRENCY):
+        """
+        Args:
+            model_name: Название модели на сервере
+            concurrency: Сколько запросов пакета отправлять одновременно
+        """
+        self.model_name = model_name
+        self.concurrency = max(1, concurrency)
+
+    def chat(
+        self,
+        prompt: str,
+        system: str | None = None,
+        schema: dict | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.4,
+    ) -> str:
+        """
+        Отправляет запрос и возвращает содержимое ответа.
+
+        Args:
+            prompt: Основной промпт
+            system: Системный промпт
+            schema: JSON-схема ответа
+            max_tokens: Размер контекста модели
+            temperature: Температура генерации
+
+        Returns:
+            str: Содержимое ответа (строка JSON, если указана схема)
+
+        Raises:
+            TimeoutError: Если модель не ответила за отведенное время
+        """
+        raise NotImplementedError
+
+    async def chat_async(
+        self,
+        prompt: str,
+        system: str | None = None,
+        schema: dict | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.4,
+    ) -> str:
+        """Асинхронный вариант chat с теми же аргументами."""
+        raise NotImplementedError
+
+    def is_transient(self, error: Exception) -> bool:
+        """
+        Проверяет, что ошибка временная и запрос имеет смысл повторить.
+
+        Args:
+            error: Исключение, выброшенное chat или chat_async
+
+        Returns:
+            bool: True для таймаутов, ошибок соединения и перегрузки сервера
+        """
+        return isinstance(error, (TimeoutError, ConnectionError))
+
+    def ping(self, timeout: float = LLM_HEALTH_TIMEOUT) -> None:
+        """
+        Проверяет, что сервер модели отвечает, не запуская генерацию.
+
+        Args:
+            timeout: Сколько секунд ждать ответ
+
+        Raises:
+            Exception: Если сервер недоступен или ответил ошибкой
+        """
+        raise NotImplementedError
+
+    def chat_batch(
+        self,
+        prompts: List[str],
+        system: str | None = None,
+        schema: dict | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.4,
+        concurrency: int | None = None,
+        labels: Sequence[str] | None = None,
+    ) -> List[str | Exception]:
+        """
+        Отправляет пакет запросов, не больше concurrency одновременно.
+
+        Args:
+            prompts: Промпты пакета
+            system: Общий системный промпт
+            schema: JSON-схема ответа
+            max_tokens: Размер контекста модели
+            temperature: Температура генерации
+            concurrency: Сколько запросов выполнять одновременно, None - self.concurrency
+            labels: Названия запросов (например, вакансий) для метрики
+                candidate_llm_request_seconds
+
+        Returns:
+            List[str | Exception]: Ответы в порядке промптов; исключение
+            отдельного запроса возвращается на его месте
+        """
+
+        def call(prompt: str, label: str) -> str | Exception:
+            try:
+                with LLM_REQUEST_SECONDS.time(vacancy=label):
+                    return self.chat(prompt, system, schema, max_tokens, temperature)
+            except Exception as e:
+                return e
+
+        workers = max(1, min(concurrency or self.concurrency, len(prompts)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(call, prompts, labels or [""] * len(prompts)))
+
+    async def chat_batch_async(
+        self,
+        prompts: List[str],
+        system: str | None = None,
+        schema: dict | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.4,
+        concurrency: int | None = None,
+        labels: Sequence[str] | None = None,
+    ) -> List[str | Exception]:
+        """Асинхронный вариант chat_batch с теми же аргументами и результатом."""
+        semaphore = asyncio.Semaphore(max(1, concurrency or self.concurrency))
+
+        async def call(prompt: str, label: str) -> str:
+            async with semaphore:
+                with LLM_REQUEST_SECONDS.time(vacancy=label):
+                    return await self.chat_async(
+                        prompt, system, schema, max_tokens, temperature
+                    )
+
+        return list(
+            await asyncio.gather(
+                *(map(call, prompts, labels or [""] * len(prompts))),
+                return_exceptions=True,
+            )
+        )
+
+
+class OllamaBackend(LLMBackend):
+    """Бэкенд Ollama через ollama_chat и ollama_chat_async; схема передается в format."""
+
+    def __init__(
+        self,
+        host: str = API_URL,
+        model_name: str = MODEL_NAME,
+        timeout: float = LLM_TIMEOUT,
+        concurrency: int = LLM_CONCURRENCY,
+    ):
+        """
+        Args:
+            host: Адрес сервера Ollama
+            model_name: Название модели в Ollama
+            timeout: Сколько секунд ждать один ответ
+            concurrency: Сколько запросов пакета отправлять одновременно
+        """
+        super().__init__(model_name, concurrency)
+        self.host = host
+        self.client = ollama.Client(
+            host=host, timeout=llm_timeout(timeout), limits=llm_limits()
+        )
+        self.async_client = ollama.AsyncClient(
+            host=host, timeout=llm_timeout(timeout), limits=llm_limits()
+        )
+
+    def chat(
+        self,
+        prompt: str,
+        system: str | None = None,
+        schema: dict | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.4,
+    ) -> str:
+        try:
+            return ollama_chat(
+                self.client,
+                model_name=self.model_name,
+                prompt=prompt,
+                system=system,
+                schema=schema,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+        except httpx.TimeoutException as e:
+            raise TimeoutError(str(e)) from e
+
+    async def chat_async(
+        self,
+        prompt: str,
+        system: str | None = None,
+        schema: dict | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.4,
+    ) -> str:
+        try:
+            return await ollama_chat_async(
+                self.async_client,
+                model_name=self.model_name,
+                prompt=prompt,
+                system=system,
+                schema=schema,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+        except httpx.TimeoutException as e:
+            raise TimeoutError(str(e)) from e
+
+    def is_transient(self, error: Exception) -> bool:
+        if isinstance(error, ollama.ResponseError):
+            return error.status_code in TRANSIENT_STATUS_CODES
+        return super().is_transient(error) or isinstance(error, httpx.TransportError)
+
+    def ping(self, timeout: float = LLM_HEALTH_TIMEOUT) -> None:
+        httpx.get(
+            f"{self.host.rstrip('/')}/api/version", timeout=timeout
+        ).raise_for_status()
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    Бэкенд OpenAI-совместимого сервера (vLLM, llama.cpp server) через /v1/chat/completions.
+
+    Схема передается как response_format типа json_schema. Размер контекста
+    задается на сервере (например, --max-model-len у vLLM), поэтому max_tokens
+    не передается. Пакет запросов отправляется одновременно, а сервер
+    объединяет их в батчи сам (continuous batching).
+    """
+
+    def __init__(
+        self,
+        base_url: str = OPENAI_BASE_URL,
+        model_name: str = MODEL_NAME,
+        api_key: str = OPENAI_API_KEY,
+        timeout: float = LLM_TIMEOUT,
+        concurrency: int = LLM_CONCURRENCY,
+    ):
+        """
+        Args:
+            base_url: Адрес API, например http://localhost:8000/v1
+            model_name: Название модели на сервере
+            api_key: Ключ API; локальные серверы обычно принимают любой
+            timeout: Сколько секунд ждать один ответ
+            concurrency: Сколько запросов пакета отправлять одновременно
+        """
+        super().__init__(model_name, concurrency)
+        self.base_url = base_url
+        self.api_key = api_key
+        self.client = openai.OpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            timeout=llm_timeout(timeout),
+            max_retries=0,
+            http_client=openai.DefaultHttpxClient(limits=llm_limits()),
+        )
+        self.async_client = openai.AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            timeout=llm_timeout(timeout),
+            max_retries=0,
+            http_client=openai.DefaultAsyncHttpxClient(limits=llm_limits()),
+        )
+
+    @property
+    def cache_model_name(self) -> str:
+        """Название модели в ключе llm_cache, отличное от ключей Ollama."""
+        return f"openai:{self.model_name}"
+
+    def build_params(
+        self,
+        prompt: str,
+        system: str | None,
+        schema: dict | None,
+        temperature: float,
+    ) -> dict:
+        """
+        Собирает параметры запроса к chat.completions.
+
+        Args:
+            prompt: Основной промпт
+            system: Системный промпт
+            schema: JSON-схема ответа
+            temperature: Температура генерации
+
+        Returns:
+            dict: Именованные аргументы для client.chat.completions.create
+        """
+        messages = []
+        if system is not None:
+            messages.append({"role": "system", "content": system})
+        messages.append({"role": "user", "content": prompt})
+        params: dict = {
+            "model": self.model_name,
+            "messages": messages,
+            "temperature": temperature,
+        }
+        if schema is not None:
+            params["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": schema.get("title", "response"),
+                    "schema": schema,
+                },
+            }
+        return params
+
+    def record_usage(self, response: openai.types.chat.ChatCompletion) -> None:
+        """Записывает в метрики число токенов из поля usage ответа, если сервер его вернул."""
+        if response.usage is not None:
+            observe_llm_usage(
+                self.model_name,
+                prompt_tokens=response.usage.prompt_tokens,
+                completion_tokens=response.usage.completion_tokens,
+            )
+
+    def chat(
+        self,
+        prompt: str,
+        system: str | None = None,
+        schema: dict | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.4,
+    ) -> str:
+        key, cached = lookup_response(
+            self.cache_model_name, prompt, system, schema, temperature
+        )
+        if cached is not None:
+            return cached
+        try:
+            response = self.client.chat.completions.create(
+                **self.build_params(prompt, system, schema, temperature)
+            )
+        except openai.APITimeoutError as e:
+            raise TimeoutError(str(e)) from e
+        except Exception as e:
+            logging.error(f"Error calling OpenAI-compatible API: {e}")
+            raise
+        self.record_usage(response)
+        content = response.choices[0].message.content or ""
+        if key is not None:
+            cache_response(key, content, schema)
+        return content
+
+    async def chat_async(
+        self,
+        prompt: str,
+        system: str | None = None,
+        schema: dict | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.4,
+    ) -> str:
+        key, cached = lookup_response(
+            self.cache_model_name, prompt, system, schema, temperature
+        )
+        if cached is not None:
+            return cached
+        try:
+            response = await self.async_client.chat.completions.create(
+                **self.build_params(prompt, system, schema, temperature)
+            )
+        except openai.APITimeoutError as e:
+            raise TimeoutError(str(e)) from e
+        except Exception as e:
+            logging.error(f"Error calling OpenAI-compatible API: {e}")
+            raise
+        self.record_usage(response)
+        content = response.choices[0].message.content or ""
+        if key is not None:
+            cache_response(key, content, schema)
+        return content
+
+    def is_transient(self, error: Exception) -> bool:
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in TRANSIENT_STATUS_CODES
+        return super().is_transient(error) or isinstance(
+            error, openai.APIConnectionError
+        )
+
+    def ping(self, timeout: float = LLM_HEALTH_TIMEOUT) -> None:
+        httpx.get(
+            f"{self.base_url.rstrip('/')}/models",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            timeout=timeout,
+        ).raise_for_status()
+
+
+class ResilientBackend(LLMBackend):
+    """
+    Обертка бэкенда с повторными попытками и автоматическим выключателем.
+
+    Временные сбои (is_transient внутреннего бэкенда) повторяются до retries раз
+    с экспоненциальной паузой, и каждый засчитывается выключателю; пока он
+    разомкнут, запросы сразу завершаются CircuitOpenError. Остальные ошибки
+    выбрасываются без повторов.
+    """
+
+    def __init__(
+        self,
+        backend: LLMBackend,
+        retries: int = LLM_RETRIES,
+        backoff: float = LLM_RETRY_BACKOFF,
+        max_delay: float = LLM_RETRY_MAX_DELAY,
+        breaker: CircuitBreaker | None = None,
+    ):
+        """
+        Args:
+            backend: Бэкенд, к которому отправляются запросы
+            retries: Сколько раз повторять запрос после временного сбоя
+            backoff: Пауза перед первым повтором в секундах
+            max_delay: Максимальная пауза между повторами в секундах
+            breaker: Выключатель; по умолчанию создается по LLM_BREAKER_THRESHOLD
+        """
+        super().__init__(backend.model_name, backend.concurrency)
+        self.backend = backend
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker(
+            LLM_BREAKER_THRESHOLD, LLM_BREAKER_RESET
+        )
+        self.retried = 0
+
+    def chat(
+        self,
+        prompt: str,
+        system: str | None = None,
+        schema: dict | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.4,
+    ) -> str:
+        for attempt in range(self.retries + 1):
+            probe = self.breaker.allow()
+            try:
+                response = self.backend.chat(
+                    prompt, system, schema, max_tokens, temperature
+                )
+            except Exception as e:
+                if not self._failed(e, attempt, probe):
+                    raise
+                time.sleep(backoff_delay(attempt, self.backoff, self.max_delay))
+            except BaseException:
+                # Отмена (CancelledError) не говорит о доступности сервера,
+                # но проба не должна остаться занятой
+                self.breaker.release_probe(probe)
+                raise
+            else:
+                self.breaker.record_success(probe)
+                return response
+
+    async def chat_async(
+        self,
+        prompt: str,
+        system: str | None = None,
+        schema: dict | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.4,
+    ) -> str:
+        for attempt in range(self.retries + 1):
+            probe = self.breaker.allow()
+            try:
+                response = await self.backend.chat_async(
+                    prompt, system, schema, max_tokens, temperature
+                )
+            except Exception as e:
+                if not self._failed(e, attempt, probe):
+                    raise
+                await asyncio.sleep(
+                    backoff_delay(attempt, self.backoff, self.max_delay)
+                )
+            except BaseException:
+                # Отмена (CancelledError) не говорит о доступности сервера,
+                # но проба не должна остаться занятой
+                self.breaker.release_probe(probe)
+                raise
+            else:
+                self.breaker.record_success(probe)
+                return response
+
+    def is_transient(self, error: Exception) -> bool:
+        return self.backend.is_transient(error)
+
+    def ping(self, timeout: float = LLM_HEALTH_TIMEOUT) -> None:
+        self.backend.ping(timeout)
+
+    def health(self, timeout: float = LLM_HEALTH_TIMEOUT) -> Dict:
+        """
+        Проверяет доступность сервера модели, не меняя состояние выключателя.
+
+        Args:
+            timeout: Сколько секунд ждать ответ сервера
+
+        Returns:
+            Dict: "status" ("ok" или "unavailable"), "error" при недоступности и
+            статистика повторов и выключателя из stats
+        """
+        try:
+            self.ping(timeout)
+        except Exception as e:
+            return {"status": "unavailable", "error": str(e), **self.stats()}
+        return {"status": "ok", **self.stats()}
+
+    def stats(self) -> Dict:
+        """Возвращает число повторных попыток и состояние выключателя."""
+        return {"retries": self.retried, "breaker": self.breaker.stats()}
+
+    def _failed(self, error: Exception, attempt: int, probe: bool) -> bool:
+        """Учитывает сбой; возвращает True, если запрос нужно повторить."""
+        if not self.is_transient(error):
+            # Сервер ответил, хотя и ошибкой: он доступен
+            self.breaker.record_success(probe)
+            return False
+        self.breaker.record_failure(probe)
+        if attempt >= self.retries:
+            return False
+        self.retried += 1
+        logging.warning(
+            f"Transient LLM error, retry {attempt + 1}/{self.retries}: {error!r}"
+        )
+        return True
+
+
+def create_backend(name: str = LLM_BACKEND) -> LLMBackend:
+    """
+    Создает бэкенд модели по названию.
+
+    Args:
+        name: "ollama" или "openai"
+
+    Returns:
+        LLMBackend: Бэкенд с настройками из переменных окружения, обернутый
+        в ResilientBackend
+
+    Raises:
+        ValueError: Если бэкенд неизвестен
+    """
+    if name == "ollama":
+        return ResilientBackend(OllamaBackend())
+    if name == "openai":
+        logging.info(f"Using OpenAI-compatible backend at {OPENAI_BASE_URL}")
+        return ResilientBackend(OpenAICompatibleBackend())
+    raise ValueError(f"Unknown LLM backend: {name}")
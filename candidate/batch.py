@@ -0,0 +1,251 @@
+"""Файл с пакетной обработкой резюме: много файлов или zip-архив за один запуск."""
+import asyncio
+import io
+import logging
+import os
+import sys
+import zipfile
+from concurrent.futures import Executor
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Tuple
+
+from .catalog import vacancy_catalog
+from .llm_match import process_json_async
+from .metrics import replay_stages, run_recorded
+from .module_nlp import process_resumes, sniff_format
+from .utils import (
+    BATCH_CONCURRENCY,
+    BATCH_MAX_BYTES,
+    BATCH_MAX_FILES,
+    BATCH_PARSE_CHUNK,
+    MAX_UPLOAD_BYTES,
+    PARSE_WORKERS,
+)
+from .workers import parse_pool
+
+SUPPORTED_SUFFIXES = (".pdf", ".docx", ".txt")
+
+
+class BatchLimits:
+    """
+    Счетчик резюме пакета и их суммарного размера.
+
+    Размер файла внутри zip-архива проверяется по заголовку до распаковки,
+    поэтому архив с большим коэффициентом сжатия не распаковывается в память.
+    """
+
+    def __init__(
+        self, max_files: int = BATCH_MAX_FILES, max_bytes: int = BATCH_MAX_BYTES
+    ):
+        """
+        Args:
+            max_files: Сколько резюме можно принять
+            max_bytes: Суммарный размер резюме в байтах
+        """
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.files = 0
+        self.bytes = 0
+
+    def add(self, name: str, size: int) -> None:
+        """
+        Учитывает очередное резюме.
+
+        Args:
+            name: Имя файла для текста ошибки
+            size: Размер файла в байтах
+
+        Raises:
+            ValueError: Если файл больше MAX_UPLOAD_BYTES или пакет превысил
+                max_files файлов или max_bytes байт
+        """
+        if size > MAX_UPLOAD_BYTES:
+            raise ValueError(f"{name}: файл больше {MAX_UPLOAD_BYTES} байт")
+        self.files += 1
+        self.bytes += size
+        if self.files > self.max_files:
+            raise ValueError(f"{name}: в пакете больше {self.max_files} файлов")
+        if self.bytes > self.max_bytes:
+            raise ValueError(f"{name}: размер пакета больше {self.max_bytes} байт")
+
+
+def iter_zip(
+    content: bytes, limits: BatchLimits | None = None
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    Перебирает резюме внутри zip-архива.
+
+    Args:
+        content: Содержимое архива
+        limits: Ограничения пакета; по умолчанию проверяется только MAX_UPLOAD_BYTES
+
+    Yields:
+        Tuple[str, bytes]: Имя файла в архиве и его содержимое
+
+    Raises:
+        ValueError: Если распакованный файл больше MAX_UPLOAD_BYTES или пакет
+            превысил ограничения limits
+    """
+    limits = limits or BatchLimits(max_files=sys.maxsize, max_bytes=sys.maxsize)
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            if os.path.splitext(info.filename)[1].lower() in SUPPORTED_SUFFIXES:
+                # ZipFile.read не распаковывает больше file_size из заголовка
+                limits.add(info.filename, info.file_size)
+                yield info.filename, archive.read(info)
+
+
+def expand_upload(
+    name: str, content: bytes, limits: BatchLimits | None = None
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    Возвращает файл как есть или, если это zip-архив, резюме из него.
+
+    Архив определяется по расширению .zip или по содержимому: zip, который
+    не является документом DOCX.
+
+    Args:
+        name: Имя файла
+        content: Содержимое файла
+        limits: Ограничения пакета, которым засчитывается каждое резюме
+
+    Yields:
+        Tuple[str, bytes]: Имя и содержимое резюме
+
+    Raises:
+        ValueError: Если пакет превысил ограничения limits
+    """
+    is_archive = content.startswith(b"PK\x03\x04") and sniff_format(content) is None
+    if name.lower().endswith(".zip") or is_archive:
+        for member, data in iter_zip(content, limits):
+            yield f"{name}/{member}", data
+    else:
+        if limits is not None:
+            limits.add(name, len(content))
+        yield name, content
+
+
+def iter_directory(path: str) -> Iterator[Tuple[str, bytes]]:
+    """
+    Рекурсивно перебирает резюме и zip-архивы в директории.
+
+    Args:
+        path: Путь к директории
+
+    Yields:
+        Tuple[str, bytes]: Относительный путь и содержимое резюме
+    """
+    for root, _, names in os.walk(path):
+        for name in sorted(names):
+            suffix = os.path.splitext(name)[1].lower()
+            if suffix not in SUPPORTED_SUFFIXES + (".zip",):
+                continue
+            full_path = os.path.join(root, name)
+            with open(full_path, "rb") as f:
+                content = f.read()
+            yield from expand_upload(os.path.relpath(full_path, path), content)
+
+
+def parse_documents(items: List[Tuple[str, bytes]]) -> List[Dict | str]:
+    """
+    Разбирает несколько резюме из памяти. Выполняется в процессе пула разбора.
+
+    Имена и города всех резюме группы извлекаются одним вызовом nlp.pipe,
+    формат каждого файла определяется по содержимому.
+
+    Args:
+        items: Пары (имя файла, содержимое)
+
+    Returns:
+        List[Dict | str]: Результат process_resume для каждого файла или текст ошибки
+    """
+    return process_resumes([content for _, content in items])
+
+
+async def match_batch(
+    items: Iterable[Tuple[str, bytes]],
+    executor: Executor | None = None,
+    concurrency: int = BATCH_CONCURRENCY,
+    chunk_size: int = BATCH_PARSE_CHUNK,
+) -> AsyncIterator[Dict]:
+    """
+    Обрабатывает пакет резюме и выдает результаты по мере готовности.
+
+    Разбор выполняется в пуле процессов группами по chunk_size файлов,
+    сопоставление с вакансиями - не более чем для concurrency резюме одновременно.
+    Ошибка в одном файле попадает в его результат как поле "error" и не прерывает
+    обработку остальных.
+
+    Args:
+        items: Пары (имя файла, содержимое); читаются по мере освобождения мест
+        executor: Пул для разбора резюме, по умолчанию общий пул процессов parse_pool
+        concurrency: Сколько резюме одновременно сопоставлять с вакансиями
+        chunk_size: Сколько файлов разбирать одной задачей пула (для nlp.pipe)
+
+    Yields:
+        Dict: Результат process_json с полем "file" или {"file": ..., "error": ...}
+    """
+    loop = asyncio.get_running_loop()
+    if executor is None:
+        executor = parse_pool.executor
+    chunk_size = max(1, chunk_size)
+    llm_slots = asyncio.Semaphore(max(1, concurrency))
+    # Ограничиваем число файлов в работе, чтобы не держать весь пакет в памяти
+    in_flight = asyncio.Semaphore(PARSE_WORKERS * chunk_size + max(1, concurrency))
+    results: asyncio.Queue = asyncio.Queue()
+    tasks: List[asyncio.Task] = []
+
+    async def match(name: str, resume: Dict | str) -> None:
+        try:
+            if isinstance(resume, str):
+                raise ValueError(resume)
+            async with llm_slots:
+                result = await process_json_async(resume, vacancy_catalog)
+            await results.put({"file": name, **result})
+        except Exception as e:
+            logging.error(f"Batch item {name} failed: {e}")
+            await results.put({"file": name, "error": str(e)})
+        finally:
+            in_flight.release()
+
+    async def handle(chunk: List[Tuple[str, bytes]]) -> None:
+        try:
+            parsed, stages = await loop.run_in_executor(
+                executor, run_recorded, parse_documents, chunk
+            )
+            replay_stages(stages)
+        except Exception as e:
+            parsed = [str(e)] * len(chunk)
+        await asyncio.gather(
+            *(match(name, resume) for (name, _), resume in zip(chunk, parsed))
+        )
+
+    async def produce() -> None:
+        chunk: List[Tuple[str, bytes]] = []
+        try:
+            for item in items:
+                await in_flight.acquire()
+                chunk.append(item)
+                if len(chunk) == chunk_size:
+                    tasks.append(asyncio.create_task(handle(chunk)))
+                    chunk = []
+        except Exception as e:
+            logging.error(f"Failed to read batch input: {e}")
+            await results.put({"file": None, "error": f"Failed to read input: {e}"})
+        finally:
+            if chunk:
+                tasks.append(asyncio.create_task(handle(chunk)))
+            await asyncio.gather(*tasks)
+            await results.put(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (result := await results.get()) is not None:
+            yield result
+    finally:
+        # Клиент отключился или итерацию прервали: останавливаем и разбор,
+        # и сопоставление уже начатых групп
+        producer.cancel()
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,235 @@
+"""Файл с кешами результатов: LRU в памяти и SQLite на диске."""
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+
+class ResultCache:
+    """
+    Базовый кеш с вытеснением по размеру (LRU) и времени жизни записей (TTL).
+
+    Значения должны сериализоваться в JSON. Подсчитывает попадания и промахи.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None):
+        """
+        Args:
+            maxsize: Максимальное число записей
+            ttl: Время жизни записи в секундах, None - без ограничения
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        """
+        Возвращает значение по ключу или None, если записи нет или она устарела.
+
+        Args:
+            key: Ключ записи
+
+        Returns:
+            Any | None: Сохраненное значение
+        """
+        with self._lock:
+            value = self._get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Сохраняет значение, вытесняя самые давно использованные записи сверх maxsize.
+
+        Args:
+            key: Ключ записи
+            value: JSON-сериализуемое значение
+        """
+        with self._lock:
+            self._set(key, value)
+
+    def clear(self) -> None:
+        """Удаляет все записи."""
+        with self._lock:
+            self._clear()
+
+    def delete_prefix(self, prefix: str) -> int:
+        """
+        Удаляет записи, ключ которых начинается с prefix.
+
+        Args:
+            prefix: Начало ключа
+
+        Returns:
+            int: Число удаленных записей
+        """
+        with self._lock:
+            return self._delete_prefix(prefix)
+
+    def stats(self) -> Dict[str, int]:
+        """Возвращает число записей, попаданий и промахов."""
+        with self._lock:
+            return {"size": self._size(), "hits": self.hits, "misses": self.misses}
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    def _get(self, key: str) -> Any | None:
+        raise NotImplementedError
+
+    def _set(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+    def _clear(self) -> None:
+        raise NotImplementedError
+
+    def _delete_prefix(self, prefix: str) -> int:
+        raise NotImplementedError
+
+    def _size(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryCache(ResultCache):
+    """LRU-кеш в памяти процесса."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None):
+        super().__init__(maxsize, ttl)
+        self._data: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+
+    def _get(self, key: str) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        created_at, value = item
+        if self._expired(created_at):
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def _set(self, key: str, value: Any) -> None:
+        self._data[key] = (time.time(), copy.deepcopy(value))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def _clear(self) -> None:
+        self._data.clear()
+
+    def _delete_prefix(self, prefix: str) -> int:
+        keys = [key for key in self._data if key.startswith(prefix)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def _size(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache(ResultCache):
+    """Кеш в файле SQLite, сохраняющийся между перезапусками сервиса."""
+
+    def __init__(self, path: str, maxsize: int = 1024, ttl: float | None = None):
+        """
+        Args:
+            path: Путь к файлу базы данных
+            maxsize: Максимальное число записей
+            ttl: Время жизни записи в секундах, None - без ограничения
+        """
+        super().__init__(maxsize, ttl)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _get(self, key: str) -> Any | None:
+        row = self._conn.execute(
+            "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        if self._expired(created_at):
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+            return None
+        self._conn.execute(
+            "UPDATE cache SET accessed_at = ? WHERE key = ?", (time.time(), key)
+        )
+        self._conn.commit()
+        return json.loads(value)
+
+    def _set(self, key: str, value: Any) -> None:
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), now, now),
+        )
+        if self.ttl is not None:
+            self._conn.execute(
+                "DELETE FROM cache WHERE created_at < ?", (now - self.ttl,)
+            )
+        self._conn.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache "
+            "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.maxsize,),
+        )
+        self._conn.commit()
+
+    def _clear(self) -> None:
+        self._conn.execute("DELETE FROM cache")
+        self._conn.commit()
+
+    def _delete_prefix(self, prefix: str) -> int:
+        cursor = self._conn.execute(
+            "DELETE FROM cache WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+        )
+        self._conn.commit()
+        return cursor.rowcount
+
+    def _size(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+def create_cache(
+    backend: str, path: str, maxsize: int = 1024, ttl: float | None = None
+) -> ResultCache | None:
+    """
+    Создает кеш по названию бэкенда.
+
+    Args:
+        backend: "memory", "sqlite" или "none"
+        path: Путь к файлу для SQLite
+        maxsize: Максимальное число записей
+        ttl: Время жизни записи в секундах, None или 0 - без ограничения
+
+    Returns:
+        ResultCache | None: Кеш или None, если кеширование отключено
+
+    Raises:
+        ValueError: Если бэкенд неизвестен
+    """
+    ttl = ttl or None
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return MemoryCache(maxsize, ttl)
+    if backend == "sqlite":
+        logging.info(f"Using SQLite cache at {path}")
+        return SQLiteCache(path, maxsize, ttl)
+    raise ValueError(f"Unknown cache backend: {backend}")
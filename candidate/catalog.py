@@ -0,0 +1,412 @@
+"""Файл с каталогом вакансий, скомпилированных в промпты один раз при загрузке."""
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, List, Literal, Mapping, Tuple
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+
+from .utils import (
+    LEVEL_NAMES,
+    LEVEL_PENALTIES,
+    MATCH_INSTRUCTIONS,
+    VACANCIES_PATH,
+    vacancies,
+)
+
+# Общие слова из названий компетенций, по которым сопоставлять навыки бессмысленно
+TERM_STOPWORDS = frozenset(
+    {
+        "для",
+        "при",
+        "основе",
+        "основы",
+        "подходы",
+        "инструменты",
+        "методы",
+        "методов",
+        "работа",
+        "работы",
+        "процесс",
+        "стадии",
+        "решений",
+        "разработки",
+        "анализ",
+        "анализа",
+        "данных",
+        "обработка",
+        "система",
+        "системы",
+        "главные",
+        "тренды",
+        "история",
+        "развития",
+        "определения",
+        "качества",
+        "качество",
+        "оценка",
+    }
+)
+
+
+class CompetencyModel(BaseModel):
+    """Компетенция вакансии в файле vacancies.json."""
+
+    model_config = ConfigDict(extra="allow")
+
+    name: str = Field(..., alias="название", min_length=1)
+    level: Literal[1, 2, 3] = Field(..., alias="уровень")
+
+
+class VacancyModel(BaseModel):
+    """Вакансия в файле vacancies.json: название и компетенции по категориям."""
+
+    model_config = ConfigDict(extra="allow")
+
+    title: str = Field(..., alias="название", min_length=1)
+    description: str = Field("", alias="описание")
+    competencies: Dict[str, List[CompetencyModel]] = Field(
+        ..., alias="компетенции", min_length=1
+    )
+
+
+CatalogModel = TypeAdapter(Dict[str, VacancyModel])
+
+
+def validate_catalog(raw: Any) -> Dict:
+    """
+    Проверяет словарь вакансий по схеме VacancyModel.
+
+    Args:
+        raw: Содержимое vacancies.json
+
+    Returns:
+        Dict: Тот же словарь без изменений, чтобы версия каталога не зависела от схемы
+
+    Raises:
+        ValueError: Если каталог не соответствует схеме (pydantic.ValidationError)
+    """
+    CatalogModel.validate_python(raw)
+    return raw
+
+
+def competency_terms(name: str) -> Tuple[str, ...]:
+    """
+    Выделяет из названия компетенции термины для нечеткого сопоставления.
+
+    Args:
+        name: Название компетенции, например "SQL базы данных (Postgres, Oracle)"
+
+    Returns:
+        Tuple[str, ...]: Термины в нижнем регистре без общих слов
+    """
+    words = re.findall(r"[\w+#]+", name.lower())
+    return tuple(
+        dict.fromkeys(
+            word for word in words if len(word) >= 3 and word not in TERM_STOPWORDS
+        )
+    )
+
+
+@dataclass(frozen=True)
+class Competency:
+    """
+    Компетенция вакансии в структурированном виде для оценки без LLM.
+
+    Attributes:
+        name: Название компетенции
+        level: Необходимый уровень (1-3)
+        category: Блок компетенций, например "общие_компетенции"
+        penalty: Штраф в процентах за отсутствие компетенции у кандидата
+        terms: Термины названия для сопоставления с навыками кандидата
+    """
+
+    name: str
+    level: int
+    category: str
+    penalty: int
+    terms: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class CompiledVacancy:
+    """
+    Вакансия с заранее собранной частью промпта.
+
+    Attributes:
+        vacancy_id: Ключ вакансии в vacancies.json
+        title: Название вакансии
+        competency_block: Название вакансии и её компетенции с уровнями; в промпте
+            shared стоит после общей для всех вакансий части
+        prompt_prefix: Неизменяемая часть промпта legacy (вакансия, компетенции,
+            инструкция), к которой при запросе добавляется только раздел кандидата
+        competencies: Компетенции вакансии с весами уровней
+    """
+
+    vacancy_id: str
+    title: str
+    competency_block: str
+    prompt_prefix: str
+    competencies: Tuple[Competency, ...]
+
+    @property
+    def max_penalty(self) -> int:
+        """Суммарный штраф, если у кандидата нет ни одной компетенции."""
+        return sum(competency.penalty for competency in self.competencies)
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    Согласованное состояние каталога на момент загрузки.
+
+    Attributes:
+        version: SHA-256 от содержимого вакансий
+        raw: Исходный словарь вакансий
+        vacancies: Скомпилированные вакансии по ключу
+    """
+
+    version: str
+    raw: Mapping
+    vacancies: Mapping[str, CompiledVacancy]
+
+
+def catalog_version(raw: Dict) -> str:
+    """
+    Вычисляет версию каталога как хеш от его содержимого.
+
+    Args:
+        raw: Словарь вакансий
+
+    Returns:
+        str: Шестнадцатеричный SHA-256
+    """
+    payload = json.dumps(raw, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def compile_vacancy(vacancy_id: str, vacancy: Dict) -> CompiledVacancy:
+    """
+    Собирает промпт и список компетенций одной вакансии.
+
+    Args:
+        vacancy_id: Ключ вакансии
+        vacancy: Вакансия с названием и компетенциями
+
+    Returns:
+        CompiledVacancy: Скомпилированная вакансия
+    """
+    competencies = tuple(
+        Competency(
+            name=item["название"],
+            level=item["уровень"],
+            category=category,
+            penalty=LEVEL_PENALTIES[item["уровень"]],
+            terms=competency_terms(item["название"]),
+        )
+        for category, items in vacancy["компетенции"].items()
+        for item in items
+    )
+    lines = [
+        "Вакансия: " + vacancy["название"],
+        "Компетенции, необходимые для выполнения работы: ",
+    ]
+    lines.extend(
+        f"{competency.name}, уровень: {LEVEL_NAMES[competency.level]}"
+        for competency in competencies
+    )
+    competency_block = "\n".join(lines)
+    return CompiledVacancy(
+        vacancy_id=vacancy_id,
+        title=vacancy["название"],
+        competency_block=competency_block,
+        prompt_prefix=competency_block + "\n\n" + MATCH_INSTRUCTIONS,
+        competencies=competencies,
+    )
+
+
+def compile_catalog(
+    raw: Dict, previous: CatalogSnapshot | None = None
+) -> CatalogSnapshot:
+    """
+    Компилирует все вакансии словаря в снимок каталога.
+
+    Args:
+        raw: Словарь вакансий в формате vacancies.json
+        previous: Предыдущий снимок; вакансии, которые в нем не изменились,
+            берутся из него без повторной компиляции
+
+    Returns:
+        CatalogSnapshot: Снимок каталога
+    """
+    raw = copy.deepcopy(raw)
+    compiled = {}
+    for vacancy_id, vacancy in raw.items():
+        if previous is not None and previous.raw.get(vacancy_id) == vacancy:
+            compiled[vacancy_id] = previous.vacancies[vacancy_id]
+        else:
+            compiled[vacancy_id] = compile_vacancy(vacancy_id, vacancy)
+    return CatalogSnapshot(
+        version=catalog_version(raw),
+        raw=MappingProxyType(raw),
+        vacancies=MappingProxyType(compiled),
+    )
+
+
+class VacancyCatalog:
+    """
+    Каталог вакансий, скомпилированных в промпты один раз при загрузке.
+
+    Обработка запроса берет готовый блок компетенций (или prompt_prefix) и
+    добавляет к нему только раздел кандидата. При reload снимок пересобирается
+    и подменяется целиком, поэтому запросы, начатые до перезагрузки,
+    дорабатывают со старым снимком.
+    После подмены вызываются слушатели, зарегистрированные через add_listener,
+    чтобы сбросить зависящие от каталога кеши.
+    """
+
+    def __init__(self, raw: Dict, path: str | None = None):
+        """
+        Args:
+            raw: Словарь вакансий в формате vacancies.json
+            path: Путь к файлу, из которого каталог перечитывается при reload
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._snapshot = compile_catalog(validate_catalog(raw))
+        self._stat = self._file_stat()
+        self._listeners: List[Callable[[CatalogSnapshot, CatalogSnapshot], None]] = []
+
+    @classmethod
+    def from_file(cls, path: str) -> "VacancyCatalog":
+        """
+        Загружает каталог из JSON-файла.
+
+        Args:
+            path: Путь к файлу вакансий
+
+        Returns:
+            VacancyCatalog: Скомпилированный каталог
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), path=path)
+
+    def add_listener(
+        self, listener: Callable[[CatalogSnapshot, CatalogSnapshot], None]
+    ) -> None:
+        """
+        Регистрирует функцию, которая вызывается со старым и новым снимком после подмены.
+
+        Args:
+            listener: Функция (old, new)
+        """
+        self._listeners.append(listener)
+
+    def reload(self) -> bool:
+        """
+        Перечитывает и проверяет файл вакансий и атомарно подменяет снимок каталога.
+
+        Если содержимое не изменилось, снимок остается прежним. При ошибке
+        чтения или проверки продолжает работать старый снимок.
+
+        Returns:
+            bool: True, если версия каталога изменилась
+
+        Raises:
+            ValueError: Если каталог создан не из файла или файл не прошел проверку
+            OSError: Если файл не удалось прочитать
+        """
+        if self.path is None:
+            raise ValueError("Catalog was not loaded from a file")
+        with self._lock:
+            # Запоминаем состояние файла до чтения: если файл с ошибкой,
+            # reload_if_changed не будет перечитывать его до следующего изменения
+            self._stat = self._file_stat()
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = validate_catalog(json.load(f))
+            old = self._snapshot
+            if catalog_version(raw) == old.version:
+                return False
+            # Слушатели получают снимок этой перезагрузки, даже если к их вызову
+            # другая перезагрузка уже подменила self._snapshot
+            new = self._snapshot = compile_catalog(raw, previous=old)
+        logging.info(
+            f"Vacancy catalog reloaded: version {old.version[:12]} -> "
+            f"{new.version[:12]}, {len(new.vacancies)} vacancies"
+        )
+        for listener in self._listeners:
+            try:
+                listener(old, new)
+            except Exception as e:
+                logging.error(f"Catalog reload listener failed: {e}")
+        return True
+
+    def reload_if_changed(self) -> bool:
+        """
+        Перечитывает каталог, если у файла изменились время изменения или размер.
+
+        Returns:
+            bool: True, если версия каталога изменилась
+        """
+        if self.path is None or self._file_stat() == self._stat:
+            return False
+        return self.reload()
+
+    async def watch(self, interval: float) -> None:
+        """
+        Следит за файлом вакансий и перечитывает его при изменении.
+
+        Ошибки проверки логируются, каталог продолжает работать со старым снимком
+        до следующего изменения файла.
+
+        Args:
+            interval: Период проверки в секундах
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except (OSError, ValueError) as e:
+                logging.error(f"Vacancy catalog reload failed: {e}")
+
+    def _file_stat(self) -> Tuple[int, int] | None:
+        if self.path is None:
+            return None
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def snapshot(self) -> CatalogSnapshot:
+        """Возвращает текущий неизменяемый снимок каталога."""
+        return self._snapshot
+
+    @property
+    def version(self) -> str:
+        """Хеш содержимого текущего каталога."""
+        return self._snapshot.version
+
+    @property
+    def raw(self) -> Mapping:
+        """Исходный словарь вакансий."""
+        return self._snapshot.raw
+
+    def __getitem__(self, vacancy_id: str) -> CompiledVacancy:
+        return self._snapshot.vacancies[vacancy_id]
+
+    def __iter__(self) -> Iterator[CompiledVacancy]:
+        return iter(self._snapshot.vacancies.values())
+
+    def __len__(self) -> int:
+        return len(self._snapshot.vacancies)
+
+
+vacancy_catalog = VacancyCatalog(vacancies, path=VACANCIES_PATH)
@@ -0,0 +1,262 @@
+"""Файл с векторным индексом компетенций для семантического сопоставления навыков."""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import IO, Dict, Iterator, List, Set
+
+import numpy as np
+
+from .catalog import CatalogSnapshot
+from .module_nlp import get_nlp
+from .utils import COMPETENCY_INDEX_PATH, SEMANTIC_MATCH_THRESHOLD
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """
+    Строит нормированные векторы текстов по статическим векторам spaCy.
+
+    Используется только токенизатор (nlp.make_doc), поэтому пайплайн модели не запускается.
+
+    Args:
+        texts: Тексты для векторизации
+
+    Returns:
+        np.ndarray: Матрица len(texts) x dim, строки нормированы (нулевые остаются нулевыми)
+    """
+    nlp = get_nlp()
+    if not texts:
+        return np.zeros((0, nlp.vocab.vectors_length), dtype=np.float32)
+    matrix = np.vstack([nlp.make_doc(text).vector for text in texts]).astype(np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+class CompetencyIndex:
+    """
+    Матрица векторов всех уникальных компетенций каталога.
+
+    Сходство ключевых слов кандидата со всеми компетенциями считается одним
+    матричным умножением (ключевые слова x компетенции); найденные компетенции
+    затем учитываются в штрафах каждой вакансии (scoring.score_vacancy_locally).
+    """
+
+    def __init__(
+        self,
+        names: List[str],
+        matrix: np.ndarray,
+        version: str,
+        digest: str | None = None,
+    ):
+        """
+        Args:
+            names: Уникальные названия компетенций в порядке строк матрицы
+            matrix: Нормированные векторы компетенций
+            version: Версия каталога и модели, для которой построен индекс
+            digest: SHA-256 матрицы из метаданных сохраненного индекса
+        """
+        self.names = names
+        self.matrix = matrix
+        self.version = version
+        self.digest = digest
+
+    @classmethod
+    def build(cls, catalog: CatalogSnapshot) -> "CompetencyIndex":
+        """
+        Векторизует все компетенции каталога.
+
+        Args:
+            catalog: Снимок каталога вакансий
+
+        Returns:
+            CompetencyIndex: Построенный индекс
+        """
+        names = list(
+            dict.fromkeys(
+                competency.name
+                for vacancy in catalog.vacancies.values()
+                for competency in vacancy.competencies
+            )
+        )
+        return cls(names, embed_texts(names), index_version(catalog))
+
+    @classmethod
+    def load(cls, path: str) -> "CompetencyIndex":
+        """
+        Загружает индекс с диска, матрица отображается в память (mmap).
+
+        Форма матрицы сверяется с метаданными по заголовку .npy, без чтения
+        самой матрицы; содержимое по SHA-256 проверяет verify.
+
+        Args:
+            path: Путь к .npy-файлу индекса, рядом лежит .json с метаданными
+
+        Returns:
+            CompetencyIndex: Загруженный индекс
+
+        Raises:
+            ValueError: Если форма матрицы не совпадает с метаданными
+        """
+        with open(_meta_path(path), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        matrix = np.load(path, mmap_mode="r")
+        if list(matrix.shape) != meta.get("shape"):
+            raise ValueError(f"{path} does not match {_meta_path(path)}")
+        return cls(meta["names"], matrix, meta["version"], meta.get("matrix_sha256"))
+
+    def save(self, path: str) -> None:
+        """
+        Сохраняет матрицу в .npy и метаданные в .json рядом с ней.
+
+        Файлы пишутся во временные и заменяются через os.replace, поэтому
+        читатель не увидит недописанный файл. В метаданных хранятся форма
+        матрицы для проверки в load и её SHA-256 для verify.
+
+        Args:
+            path: Путь к .npy-файлу индекса
+        """
+        matrix = np.asarray(self.matrix)
+        meta = {
+            "version": self.version,
+            "names": self.names,
+            "shape": list(matrix.shape),
+            "matrix_sha256": matrix_digest(matrix),
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with _atomic_write(path, "wb") as f:
+            np.save(f, matrix)
+        with _atomic_write(_meta_path(path), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    def verify(self) -> bool:
+        """
+        Сверяет матрицу с SHA-256 из метаданных; читает матрицу целиком.
+
+        Returns:
+            bool: True, если матрица совпадает с сохраненной вместе с метаданными
+        """
+        return self.digest is not None and matrix_digest(self.matrix) == self.digest
+
+    def similarities(self, keywords: List[str]) -> np.ndarray:
+        """
+        Считает для каждой компетенции максимальное косинусное сходство с ключевыми словами.
+
+        Args:
+            keywords: Ключевые слова кандидата
+
+        Returns:
+            np.ndarray: Вектор длины len(names)
+        """
+        if not keywords or not self.names:
+            return np.zeros(len(self.names), dtype=np.float32)
+        return (embed_texts(keywords) @ self.matrix.T).max(axis=0)
+
+    def matched_names(
+        self, keywords: List[str], threshold: float = SEMANTIC_MATCH_THRESHOLD
+    ) -> Set[str]:
+        """
+        Возвращает компетенции, близкие по смыслу к ключевым словам кандидата.
+
+        Args:
+            keywords: Ключевые слова кандидата
+            threshold: Минимальное косинусное сходство
+
+        Returns:
+            Set[str]: Названия найденных компетенций
+        """
+        sims = self.similarities(keywords)
+        return {name for name, sim in zip(self.names, sims) if sim >= threshold}
+
+
+def index_version(catalog: CatalogSnapshot) -> str:
+    """Версия индекса: версия каталога и модели, векторы которой использованы."""
+    nlp = get_nlp()
+    return f"{catalog.version}:{nlp.meta.get('name')}-{nlp.meta.get('version')}"
+
+
+def matrix_digest(matrix: np.ndarray) -> str:
+    """SHA-256 формы и содержимого матрицы для сверки .npy с метаданными."""
+    digest = hashlib.sha256(str(matrix.shape).encode("utf-8"))
+    digest.update(np.ascontiguousarray(matrix, dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+
+def _meta_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".json"
+
+
+@contextmanager
+def _atomic_write(path: str, mode: str, encoding: str | None = None) -> Iterator[IO]:
+    """Открывает временный файл рядом с path и после записи заменяет им path."""
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", prefix=os.path.basename(path), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+_indexes: Dict[str, CompetencyIndex] = {}
+_lock = threading.Lock()
+
+
+def get_competency_index(
+    catalog: CatalogSnapshot, path: str = COMPETENCY_INDEX_PATH
+) -> CompetencyIndex | None:
+    """
+    Возвращает индекс компетенций для каталога, загружая или строя его один раз.
+
+    Индекс с диска используется, если его версия совпадает с каталогом и моделью,
+    иначе он перестраивается и сохраняется заново.
+
+    Args:
+        catalog: Снимок каталога вакансий
+        path: Путь к .npy-файлу индекса
+
+    Returns:
+        CompetencyIndex | None: Индекс или None, если в модели spaCy нет векторов
+    """
+    if get_nlp().vocab.vectors_length == 0:
+        logging.warning("spaCy model has no word vectors, semantic matching disabled")
+        return None
+    version = index_version(catalog)
+    with _lock:
+        if version in _indexes:
+            return _indexes[version]
+        index = None
+        if os.path.exists(path) and os.path.exists(_meta_path(path)):
+            try:
+                index = CompetencyIndex.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                logging.warning(f"Failed to load competency index: {e}")
+        if index is None or index.version != version:
+            index = CompetencyIndex.build(catalog)
+            try:
+                index.save(path)
+            except OSError as e:
+                logging.warning(f"Failed to save competency index: {e}")
+            logging.info(f"Competency index built: {len(index.names)} competencies")
+        _indexes.clear()
+        _indexes[version] = index
+        return index
+
+
+def invalidate_competency_index(catalog: CatalogSnapshot) -> None:
+    """
+    Удаляет из памяти индекс компетенций для устаревшей версии каталога.
+
+    Новый индекс строится при первом обращении через get_competency_index.
+
+    Args:
+        catalog: Снимок каталога, индекс которого больше не нужен
+    """
+    with _lock:
+        _indexes.pop(index_version(catalog), None)
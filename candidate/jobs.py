@@ -0,0 +1,348 @@
+"""Файл с очередью фоновых задач сопоставления и хранилищами их состояния."""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """
+    Состояние задачи сопоставления.
+
+    Attributes:
+        id: Идентификатор задачи
+        status: queued, running, done или failed
+        created_at: Время постановки в очередь (unix time)
+        updated_at: Время последнего изменения статуса
+        result: Результат сопоставления для статуса done
+        error: Текст ошибки для статуса failed
+    """
+
+    id: str
+    status: str
+    created_at: float
+    updated_at: float
+    result: Dict | None = None
+    error: str | None = None
+
+    def to_dict(self) -> Dict:
+        """Возвращает задачу в виде словаря для ответа API."""
+        return asdict(self)
+
+
+class JobStore:
+    """Базовое хранилище задач. Все методы вызываются из event loop сервера."""
+
+    def add(self, job: Job, payload: bytes) -> None:
+        """
+        Сохраняет новую задачу.
+
+        Args:
+            job: Задача
+            payload: Содержимое резюме; хранится, только если хранилище
+                должно переживать перезапуск
+        """
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Job | None:
+        """Возвращает задачу по идентификатору или None."""
+        raise NotImplementedError
+
+    def update(self, job: Job) -> None:
+        """Сохраняет новый статус, результат или ошибку задачи."""
+        raise NotImplementedError
+
+    def unfinished(self) -> List[Tuple[Job, bytes]]:
+        """Возвращает незавершенные задачи с содержимым для повторной постановки."""
+        raise NotImplementedError
+
+    def purge(self, before: float) -> int:
+        """
+        Удаляет завершенные задачи, обновленные раньше указанного времени.
+
+        Args:
+            before: Граница по времени (unix time)
+
+        Returns:
+            int: Число удаленных задач
+        """
+        raise NotImplementedError
+
+
+class MemoryJobStore(JobStore):
+    """Хранилище задач в памяти процесса; задачи теряются при перезапуске."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+
+    def add(self, job: Job, payload: bytes) -> None:
+        self._jobs[job.id] = job
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def update(self, job: Job) -> None:
+        self._jobs[job.id] = job
+
+    def unfinished(self) -> List[Tuple[Job, bytes]]:
+        return []
+
+    def purge(self, before: float) -> int:
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.status in (JOB_DONE, JOB_FAILED) and job.updated_at < before
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Хранилище задач в SQLite: результаты доступны после перезапуска, а
+    незавершенные задачи ставятся в очередь заново.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Путь к файлу базы данных
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+            "result TEXT, error TEXT, payload BLOB)"
+        )
+        self._conn.commit()
+
+    def add(self, job: Job, payload: bytes) -> None:
+        self._conn.execute(
+            "INSERT INTO jobs VALUES (?, ?, ?, ?, NULL, NULL, ?)",
+            (job.id, job.status, job.created_at, job.updated_at, payload),
+        )
+        self._conn.commit()
+
+    def get(self, job_id: str) -> Job | None:
+        row = self._conn.execute(
+            "SELECT id, status, created_at, updated_at, result, error "
+            "FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        return None if row is None else self._job(row)
+
+    def update(self, job: Job) -> None:
+        finished = job.status in (JOB_DONE, JOB_FAILED)
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, updated_at = ?, result = ?, error = ?, "
+            "payload = CASE WHEN ? THEN NULL ELSE payload END WHERE id = ?",
+            (
+                job.status,
+                job.updated_at,
+                None if job.result is None else json.dumps(job.result),
+                job.error,
+                finished,
+                job.id,
+            ),
+        )
+        self._conn.commit()
+
+    def unfinished(self) -> List[Tuple[Job, bytes]]:
+        rows = self._conn.execute(
+            "SELECT id, status, created_at, updated_at, result, error, payload "
+            "FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+            (JOB_QUEUED, JOB_RUNNING),
+        ).fetchall()
+        return [(self._job(row[:6]), row[6]) for row in rows]
+
+    def purge(self, before: float) -> int:
+        cursor = self._conn.execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (JOB_DONE, JOB_FAILED, before),
+        )
+        self._conn.commit()
+        return cursor.rowcount
+
+    @staticmethod
+    def _job(row: Tuple) -> Job:
+        job_id, status, created_at, updated_at, result, error = row
+        return Job(
+            id=job_id,
+            status=status,
+            created_at=created_at,
+            updated_at=updated_at,
+            result=None if result is None else json.loads(result),
+            error=error,
+        )
+
+
+def create_job_store(backend: str, path: str) -> JobStore:
+    """
+    Создает хранилище задач по названию бэкенда.
+
+    Args:
+        backend: "memory" или "sqlite"
+        path: Путь к файлу для SQLite
+
+    Returns:
+        JobStore: Хранилище задач
+
+    Raises:
+        ValueError: Если бэкенд неизвестен
+    """
+    if backend == "memory":
+        return MemoryJobStore()
+    if backend == "sqlite":
+        logging.info(f"Using SQLite job store at {path}")
+        return SQLiteJobStore(path)
+    raise ValueError(f"Unknown job store backend: {backend}")
+
+
+class JobQueue:
+    """
+    Локальная очередь задач с фиксированным числом обработчиков.
+
+    Задачи выполняются обработчиком handler в event loop сервера. Если очередь
+    заполнена, submit выбрасывает asyncio.QueueFull. Завершенные задачи
+    удаляются через ttl секунд после завершения.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[bytes], Awaitable[Dict]],
+        store: JobStore,
+        maxsize: int = 100,
+        workers: int = 2,
+        ttl: float | None = 3600,
+    ):
+        """
+        Args:
+            handler: Корутина, которая по содержимому резюме возвращает результат
+            store: Хранилище состояния задач
+            maxsize: Сколько задач может ждать в очереди
+            workers: Сколько задач выполняется одновременно
+            ttl: Сколько секунд хранить результат завершенной задачи, None - всегда
+        """
+        self.handler = handler
+        self.store = store
+        self.maxsize = maxsize
+        self.workers = max(1, workers)
+        self.ttl = ttl or None
+        self._queue: asyncio.Queue | None = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        """Очередь задач; создается в работающем event loop."""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+        return self._queue
+
+    @property
+    def depth(self) -> int:
+        """Число задач, ожидающих обработки."""
+        return self.queue.qsize()
+
+    def start(self) -> None:
+        """Запускает обработчики и заново ставит в очередь незавершенные задачи хранилища."""
+        for job, payload in self.store.unfinished():
+            try:
+                self.queue.put_nowait((job.id, payload))
+                self._set_status(job, JOB_QUEUED)
+            except asyncio.QueueFull:
+                self._set_status(job, JOB_FAILED, error="Queue is full after restart")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logging.info(f"Job queue started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        """Останавливает обработчики; прерванные задачи остаются незавершенными."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, payload: bytes) -> Job:
+        """
+        Ставит резюме в очередь на сопоставление.
+
+        Args:
+            payload: Содержимое резюме
+
+        Returns:
+            Job: Новая задача со статусом queued
+
+        Raises:
+            asyncio.QueueFull: Если в очереди нет места
+        """
+        self._purge()
+        if self.queue.full():
+            raise asyncio.QueueFull
+        now = time.time()
+        job = Job(
+            id=uuid.uuid4().hex, status=JOB_QUEUED, created_at=now, updated_at=now
+        )
+        self.store.add(job, payload)
+        self.queue.put_nowait((job.id, payload))
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """
+        Возвращает задачу по идентификатору.
+
+        Args:
+            job_id: Идентификатор задачи
+
+        Returns:
+            Job | None: Задача или None, если её нет или результат устарел
+        """
+        self._purge()
+        return self.store.get(job_id)
+
+    def _purge(self) -> None:
+        if self.ttl is not None:
+            self.store.purge(time.time() - self.ttl)
+
+    def _set_status(
+        self,
+        job: Job,
+        status: str,
+        result: Dict | None = None,
+        error: str | None = None,
+    ) -> None:
+        job.status = status
+        job.updated_at = time.time()
+        job.result = result
+        job.error = error
+        self.store.update(job)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, payload = await self.queue.get()
+            try:
+                job = self.store.get(job_id)
+                if job is None:
+                    continue
+                self._set_status(job, JOB_RUNNING)
+                try:
+                    result = await self.handler(payload)
+                except Exception as e:
+                    logging.error(f"Job {job_id} failed: {e}")
+                    self._set_status(job, JOB_FAILED, error=str(e))
+                else:
+                    self._set_status(job, JOB_DONE, result=result)
+            finally:
+                self.queue.task_done()
@@ -0,0 +1,118 @@
+"""Файл с извлечением ключевых слов из блоков резюме через YAKE."""
+import re
+from concurrent.futures import Executor
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Sequence
+
+from .utils import KEYWORD_NORMALIZE
+
+if TYPE_CHECKING:
+    import yake
+
+KEYWORD_LANG = "ru"
+KEYWORD_NGRAM = 1
+MAX_KEYWORDS = 50
+
+
+@lru_cache(maxsize=None)
+def get_extractor(lang: str, n: int, top: int) -> "yake.KeywordExtractor":
+    """Возвращает экстрактор YAKE, созданный один раз для набора параметров.
+
+    Экстрактор не хранит состояния между вызовами, поэтому его можно
+    переиспользовать: стоп-слова и настройки не собираются заново.
+
+    Args:
+        lang: Язык текста
+        n: Максимальная длина ключевой фразы в словах
+        top: Максимальное количество ключевых слов
+
+    Returns:
+        yake.KeywordExtractor: Экстрактор с заданными параметрами
+    """
+    import yake
+
+    return yake.KeywordExtractor(lan=lang, n=n, top=top)
+
+
+def normalize_keywords(keywords: Sequence[str]) -> List[str]:
+    """Приводит ключевые слова к нижнему регистру и убирает повторы.
+
+    Знаки препинания по краям отбрасываются, пробелы внутри схлопываются,
+    порядок первого появления сохраняется.
+
+    Args:
+        keywords: Ключевые слова в порядке убывания значимости
+
+    Returns:
+        List[str]: Нормализованные ключевые слова без повторов
+    """
+    normalized = (
+        re.sub(r"\s+", " ", keyword).strip(" .,;:!?()[]{}\"'«»-–—").lower()
+        for keyword in keywords
+    )
+    return list(dict.fromkeys(keyword for keyword in normalized if keyword))
+
+
+def extract_keywords(
+    text: str,
+    lang: str = KEYWORD_LANG,
+    max_keywords: int = MAX_KEYWORDS,
+    normalize: bool = KEYWORD_NORMALIZE,
+) -> List[str]:
+    """Извлекает ключевые слова из текста.
+
+    Args:
+        text: Исходный текст
+        lang: Язык текста
+        max_keywords: Максимальное количество ключевых слов
+        normalize: Нормализовать и убрать повторы через normalize_keywords
+
+    Returns:
+        List[str]: Список извлеченных ключевых слов
+    """
+    if not text or text.isspace():
+        return []
+    kw_extractor = get_extractor(lang, KEYWORD_NGRAM, max_keywords)
+    keywords = [kw for kw, score in kw_extractor.extract_keywords(text)]
+    return normalize_keywords(keywords) if normalize else keywords
+
+
+def extract_keywords_batch(
+    texts: Sequence[str],
+    lang: str = KEYWORD_LANG,
+    max_keywords: int = MAX_KEYWORDS,
+    normalize: bool = KEYWORD_NORMALIZE,
+    executor: Executor | None = None,
+    chunksize: int = 8,
+) -> List[List[str]]:
+    """Извлекает ключевые слова из нескольких текстов за один вызов.
+
+    Пустые тексты не передаются в YAKE. Если задан executor, тексты
+    распределяются по его процессам группами по chunksize.
+
+    Args:
+        texts: Тексты блоков
+        lang: Язык текстов
+        max_keywords: Максимальное количество ключевых слов на текст
+        normalize: Нормализовать и убрать повторы через normalize_keywords
+        executor: Пул процессов; по умолчанию тексты обрабатываются в текущем процессе
+        chunksize: Сколько текстов передавать процессу пула за раз
+
+    Returns:
+        List[List[str]]: Ключевые слова для каждого текста в исходном порядке
+    """
+    results: List[List[str]] = [[] for _ in texts]
+    positions = [i for i, text in enumerate(texts) if text and not text.isspace()]
+    args = (
+        [texts[i] for i in positions],
+        [lang] * len(positions),
+        [max_keywords] * len(positions),
+        [normalize] * len(positions),
+    )
+    if executor is None:
+        extracted = map(extract_keywords, *args)
+    else:
+        extracted = executor.map(extract_keywords, *args, chunksize=chunksize)
+    for i, keywords in zip(positions, extracted):
+        results[i] = keywords
+    return results
@@ -1,16 +1,105 @@
 """Файл с логикой соотношения вакансий и кандидатов."""
+import asyncio
 import json
 import logging
-from typing import Dict
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, AsyncIterator, Deque, Dict, List, Mapping, Tuple
 
-import ollama
+from .catalog import CatalogSnapshot, CompiledVacancy, VacancyCatalog, compile_catalog
+from .embeddings import get_competency_index
+from .keywords import normalize_keywords
+from .metrics import LLM_REQUEST_SECONDS, stage_timer
+from .scoring import VacancyScore, prescore, select_for_llm
+from .utils import (
+    COMBINED_INSTRUCTIONS,
+    LLM_BACKEND,
+    LLM_CONCURRENCY,
+    LLM_MAX_CTX,
+    LLM_NUM_CTX,
+    LLM_OUTPUT_TOKENS,
+    MATCH_INSTRUCTIONS,
+    PRESCORE_MIN_PERCENTAGE,
+    PRESCORE_TOP_K,
+    PROMPT_LAYOUT,
+    PROMPT_MAX_KEYWORDS,
+    RANKING_BOUND_MARGIN,
+    SCORING_MODE,
+    SEMANTIC_MATCHING,
+    SYSTEM_PROMPT,
+    MultiVacancySchema,
+    VacancySchema,
+)
 
-from .utils import API_URL, MODEL_NAME, SYSTEM_PROMPT, VacancySchema, ollama_chat
+if TYPE_CHECKING:
+    from .backends import ResilientBackend
 
-client = ollama.Client(host=API_URL)
+# Оценка числа символов на токен снизу (для кириллицы токенизаторы дают 2-4 символа),
+# чтобы размер контекста не оказался меньше промпта; минимальный размер контекста
+CHARS_PER_TOKEN = 2
+MIN_CONTEXT_SIZE = 2048
+SCORING_MODES = ("separate", "combined")
+# Строка перед каждой вакансией промпта combined; по номеру сопоставляются оценки
+VACANCY_NUMBER = "Номер вакансии: "
 
+_backend: "ResilientBackend | None" = None
+_backend_lock = threading.Lock()
 
-def validate_input_data(data: Dict, vacancies: Dict) -> tuple:
+
+def get_backend() -> "ResilientBackend":
+    """
+    Возвращает бэкенд модели, создавая его при первом обращении.
+
+    Клиенты ollama и openai импортируются и создаются только при первом запросе
+    к модели или заранее, в lifespan сервера.
+
+    Returns:
+        ResilientBackend: Бэкенд LLM_BACKEND с повторными попытками и выключателем
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                from .backends import create_backend
+
+                _backend = create_backend(LLM_BACKEND)
+    return _backend
+
+
+def set_backend(backend: "ResilientBackend | None") -> None:
+    """
+    Заменяет бэкенд модели, который используют функции сопоставления.
+
+    Args:
+        backend: Новый бэкенд или None, чтобы создать бэкенд LLM_BACKEND заново
+            при следующем обращении
+    """
+    global _backend
+    _backend = backend
+
+
+def warmup(catalog: CatalogSnapshot) -> None:
+    """
+    Заранее создает бэкенд модели, а при SEMANTIC_MATCHING загружает модель spaCy
+    и индекс компетенций, чтобы первый запрос не платил за их загрузку.
+
+    Args:
+        catalog: Снимок каталога вакансий, для которого готовится индекс
+    """
+    get_backend()
+    if SEMANTIC_MATCHING:
+        get_competency_index(catalog)
+
+
+def __getattr__(name: str) -> Any:
+    """Оставляет доступ к бэкенду как llm_match.backend для обратной совместимости."""
+    if name == "backend":
+        return get_backend()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def validate_input_data(data: Dict, vacancies: Mapping) -> tuple:
     """
     Валидирует формат входных данных кандидата и вакансий.
 
@@ -35,7 +124,7 @@ def validate_input_data(data: Dict, vacancies: Dict) -> tuple:
             return False, "Skills and experience must be lists"
 
         # Валидация данных вакансий
-        if not isinstance(vacancies, dict) or len(vacancies) == 0:
+        if not isinstance(vacancies, Mapping) or len(vacancies) == 0:
             return False, "Vacancies must be a non-empty dictionary"
 
         for vac_id, vacancy in vacancies.items():
@@ -54,14 +143,692 @@ def validate_input_data(data: Dict, vacancies: Dict) -> tuple:
         return False, f"Validation error: {str(e)}"
 
 
-def process_json(data: Dict, vacancies: Dict) -> Dict:
+def candidate_digest(
+    data: Dict, limit: int = PROMPT_MAX_KEYWORDS
+) -> Tuple[List[str], List[str]]:
+    """
+    Сокращает навыки и опыт кандидата для промпта.
+
+    Ключевые слова приводятся к нижнему регистру, повторы убираются, пункты
+    опыта, совпадающие с навыками, отбрасываются. Из каждого списка берется
+    не больше limit первых, то есть самых значимых по YAKE, слов.
+
+    Args:
+        data: Данные кандидата (навыки и опыт)
+        limit: Сколько слов оставить в каждом списке, 0 - все
+
+    Returns:
+        Tuple[List[str], List[str]]: Навыки и опыт
+    """
+    skills = normalize_keywords(data["skills"])
+    known = set(skills)
+    experience = [
+        keyword
+        for keyword in normalize_keywords(data["experience"])
+        if keyword not in known
+    ]
+    if limit > 0:
+        skills, experience = skills[:limit], experience[:limit]
+    return skills, experience
+
+
+def build_candidate_section(data: Dict, layout: str = PROMPT_LAYOUT) -> str:
+    """
+    Формирует раздел промпта с навыками и опытом кандидата.
+
+    Раздел одинаков для всех вакансий, поэтому собирается один раз за запрос.
+    В раскладке shared раздел начинается с инструкции по оценке и содержит
+    сводку candidate_digest: он становится общим началом промптов всех вакансий.
+
+    Args:
+        data: Данные кандидата (навыки и опыт)
+        layout: Раскладка промпта: shared или legacy
+
+    Returns:
+        str: Текст раздела кандидата
+    """
+    if layout == "legacy":
+        return (
+            "Его навыки: \n"
+            + ", ".join(data["skills"])
+            + "\nТакже его опыт включал: \n"
+            + ", ".join(data["experience"])
+            + "\nТвоя оценка: "
+        )
+    skills, experience = candidate_digest(data)
+    return (
+        MATCH_INSTRUCTIONS
+        + "\nНавыки кандидата: \n"
+        + ", ".join(skills)
+        + "\nОпыт кандидата: \n"
+        + ", ".join(experience)
+        + "\n\n"
+    )
+
+
+def build_prompt(
+    candidate_section: str, vacancy: CompiledVacancy, layout: str = PROMPT_LAYOUT
+) -> str:
+    """
+    Формирует промпт для оценки кандидата по одной вакансии.
+
+    В раскладке shared промпты разных вакансий отличаются только концом (блоком
+    компетенций), поэтому Ollama и vLLM переиспользуют KV-кеш системного промпта,
+    инструкции и раздела кандидата для всех вакансий запроса.
+
+    Args:
+        candidate_section: Раздел кандидата из build_candidate_section
+        vacancy: Скомпилированная вакансия
+        layout: Раскладка промпта: shared или legacy
+
+    Returns:
+        str: Текст промпта для модели
+    """
+    if layout == "legacy":
+        return vacancy.prompt_prefix + candidate_section
+    return candidate_section + vacancy.competency_block + "\nТвоя оценка: "
+
+
+def estimate_tokens(chars: int) -> int:
+    """Оценка сверху числа токенов текста длиной chars символов."""
+    return chars // CHARS_PER_TOKEN + 1
+
+
+def context_size(
+    prompts: List[str], system: str = SYSTEM_PROMPT, answers: int = 1
+) -> int:
+    """
+    Подбирает размер контекста модели (num_ctx) для промптов одного запроса.
+
+    Число токенов оценивается сверху по длине текста; размер округляется вверх
+    до степени двойки, чтобы у запросов с близкой длиной промптов он совпадал:
+    Ollama перезагружает модель при смене num_ctx.
+
+    Args:
+        prompts: Промпты, которые будут отправлены с этим размером
+        system: Системный промпт
+        answers: Сколько оценок вакансий модель вернет в одном ответе
+
+    Returns:
+        int: LLM_NUM_CTX, если он задан, иначе степень двойки от 2048 до LLM_MAX_CTX
+    """
+    if LLM_NUM_CTX > 0:
+        return LLM_NUM_CTX
+    longest = max((len(prompt) for prompt in prompts), default=0) + len(system)
+    needed = estimate_tokens(longest) + LLM_OUTPUT_TOKENS * answers
+    size = MIN_CONTEXT_SIZE
+    while size < needed and size < LLM_MAX_CTX:
+        size *= 2
+    if needed > LLM_MAX_CTX:
+        logging.warning(
+            f"Prompt needs about {needed} tokens, context limited to {LLM_MAX_CTX}"
+        )
+    return min(size, LLM_MAX_CTX)
+
+
+def build_combined_prompt(
+    candidate_section: str, vacancies: List[CompiledVacancy]
+) -> str:
+    """
+    Формирует промпт для оценки кандидата сразу по нескольким вакансиям.
+
+    Args:
+        candidate_section: Раздел кандидата из build_candidate_section
+            в раскладке shared
+        vacancies: Вакансии, которые модель оценит одним ответом
+
+    Returns:
+        str: Текст промпта; ответ ожидается по схеме MultiVacancySchema
+    """
+    blocks = "\n\n".join(
+        f"{VACANCY_NUMBER}{number}\n{vacancy.competency_block}"
+        for number, vacancy in enumerate(vacancies, start=1)
+    )
+    return candidate_section + COMBINED_INSTRUCTIONS + blocks + "\n\nТвои оценки: "
+
+
+def combined_chunks(
+    candidate_section: str, vacancies: List[CompiledVacancy]
+) -> List[List[CompiledVacancy]]:
+    """
+    Делит вакансии на части, каждая из которых помещается в контекст модели.
+
+    В часть добавляются вакансии по порядку, пока оценка промпта вместе с
+    запасом LLM_OUTPUT_TOKENS на ответ по каждой вакансии не превысит
+    LLM_NUM_CTX (если задан) или LLM_MAX_CTX. В части всегда хотя бы одна вакансия.
+
+    Args:
+        candidate_section: Раздел кандидата из build_candidate_section
+        vacancies: Оцениваемые вакансии
+
+    Returns:
+        List[List[CompiledVacancy]]: Части в исходном порядке вакансий
+    """
+    budget = LLM_NUM_CTX if LLM_NUM_CTX > 0 else LLM_MAX_CTX
+    base = len(SYSTEM_PROMPT) + len(build_combined_prompt(candidate_section, []))
+    chunks: List[List[CompiledVacancy]] = []
+    chunk: List[CompiledVacancy] = []
+    size = base
+    for vacancy in vacancies:
+        header = f"{VACANCY_NUMBER}{len(chunk) + 1}\n"
+        block = len(header) + len(vacancy.competency_block) + 2
+        needed = estimate_tokens(size + block) + LLM_OUTPUT_TOKENS * (len(chunk) + 1)
+        if chunk and needed > budget:
+            chunks.append(chunk)
+            chunk, size = [], base
+        chunk.append(vacancy)
+        size += block
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def combined_answers(
+    chunks: List[List[CompiledVacancy]], responses: List[str | Exception]
+) -> Tuple[Dict[str, Dict], List[CompiledVacancy]]:
+    """
+    Разбирает ответы на промпты build_combined_prompt и проверяет, что оценена
+    каждая вакансия.
+
+    Оценки сопоставляются с вакансиями по номеру из промпта, поэтому вакансии
+    с одинаковыми названиями не путаются; лишние и повторные оценки
+    отбрасываются. Вакансии части, на которую модель не ответила за
+    LLM_TIMEOUT секунд, получают заглушки.
+
+    Args:
+        chunks: Части вакансий из combined_chunks
+        responses: Ответы бэкенда в порядке частей
+
+    Returns:
+        Tuple[Dict[str, Dict], List[CompiledVacancy]]: Оценки по vacancy_id
+            и вакансии, оценки которых в ответах нет
+
+    Raises:
+        Exception: Ошибка запроса, отличная от таймаута
+    """
+    answers: Dict[str, Dict] = {}
+    missing: List[CompiledVacancy] = []
+    for chunk, response in zip(chunks, responses):
+        if isinstance(response, TimeoutError):
+            logging.error(f"LLM timeout for combined prompt of {len(chunk)} vacancies")
+            answers.update(
+                (vacancy.vacancy_id, fallback_answer(vacancy.title))
+                for vacancy in chunk
+            )
+            continue
+        if isinstance(response, Exception):
+            raise response
+        try:
+            results = MultiVacancySchema.model_validate_json(response).results
+        except ValueError as e:
+            logging.error(f"Invalid combined response: {e}")
+            results = []
+        numbered = dict(enumerate(chunk, start=1))
+        for result in results:
+            vacancy = numbered.pop(result.number, None)
+            if vacancy is None:
+                logging.warning(
+                    f"Unexpected vacancy number in combined answer: {result.number}"
+                )
+                continue
+            answers[vacancy.vacancy_id] = {
+                **result.model_dump(exclude={"number"}),
+                "vacancy": vacancy.title,
+            }
+        missing.extend(numbered.values())
+    return answers, missing
+
+
+def resolve_catalog(
+    vacancies: Mapping | VacancyCatalog | CatalogSnapshot,
+) -> CatalogSnapshot:
+    """
+    Возвращает снимок каталога для словаря вакансий или готового каталога.
+
+    Args:
+        vacancies: Словарь вакансий, VacancyCatalog или его снимок
+
+    Returns:
+        CatalogSnapshot: Скомпилированные вакансии
+    """
+    if isinstance(vacancies, CatalogSnapshot):
+        return vacancies
+    if isinstance(vacancies, VacancyCatalog):
+        return vacancies.snapshot()
+    return compile_catalog(vacancies)
+
+
+def fallback_answer(vacancy_name: str) -> Dict:
+    """
+    Формирует ответ-заглушку, если модель не вернула корректную оценку.
+
+    Args:
+        vacancy_name: Название вакансии
+
+    Returns:
+        Dict: Ответ в формате VacancySchema с нулевым процентом
+    """
+    logging.warning(f"Created fallback response for {vacancy_name}")
+    return {
+        "vacancy": vacancy_name,
+        "percentage": 0,
+        "explaining": f"Не удалось обработать ответ для вакансии {vacancy_name}.",
+        "recommendations": "Попробуйте повторить запрос или скорректировать данные.",
+    }
+
+
+def parse_answer(response: str, vacancy_name: str) -> Dict:
+    """
+    Разбирает JSON-ответ модели, при ошибке возвращает заглушку.
+
+    Args:
+        response: Ответ модели
+        vacancy_name: Название вакансии, для которой получен ответ
+
+    Returns:
+        Dict: Оценка кандидата по вакансии
+    """
+    logging.debug("_____________________")
+    logging.debug(response)
+    try:
+        return json.loads(response)
+    except json.decoder.JSONDecodeError:
+        logging.error("Invalid JSON response after LLM generation")
+        return fallback_answer(vacancy_name)
+
+
+def score_vacancy(
+    candidate_section: str, vacancy: CompiledVacancy, num_ctx: int | None = None
+) -> Dict:
+    """
+    Оценивает соответствие кандидата одной вакансии с помощью LLM.
+
+    Если модель не ответила за LLM_TIMEOUT секунд, возвращается заглушка,
+    чтобы одна зависшая генерация не срывала оценку остальных вакансий.
+
+    Args:
+        candidate_section: Раздел кандидата из build_candidate_section
+        vacancy: Скомпилированная вакансия
+        num_ctx: Размер контекста модели, общий для вакансий запроса;
+            None - подобрать по этому промпту
+
+    Returns:
+        Dict: Оценка кандидата по вакансии
+    """
+    prompt = build_prompt(candidate_section, vacancy)
+    logging.debug(prompt)
+    try:
+        with LLM_REQUEST_SECONDS.time(vacancy=vacancy.title):
+            response = get_backend().chat(
+                prompt,
+                system=SYSTEM_PROMPT,
+                schema=VacancySchema.model_json_schema(),
+                max_tokens=num_ctx or context_size([prompt]),
+            )
+    except TimeoutError:
+        logging.error(f"LLM timeout for vacancy {vacancy.title}")
+        return fallback_answer(vacancy.title)
+    return parse_answer(response, vacancy.title)
+
+
+async def score_vacancy_async(
+    candidate_section: str,
+    vacancy: CompiledVacancy,
+    semaphore: asyncio.Semaphore,
+    num_ctx: int | None = None,
+) -> Dict:
+    """
+    Асинхронно оценивает соответствие кандидата одной вакансии.
+
+    Args:
+        candidate_section: Раздел кандидата из build_candidate_section
+        vacancy: Скомпилированная вакансия
+        semaphore: Ограничитель числа одновременных запросов к модели
+        num_ctx: Размер контекста модели, общий для вакансий запроса;
+            None - подобрать по этому промпту
+
+    Returns:
+        Dict: Оценка кандидата по вакансии
+    """
+    prompt = build_prompt(candidate_section, vacancy)
+    logging.debug(prompt)
+    async with semaphore:
+        try:
+            with LLM_REQUEST_SECONDS.time(vacancy=vacancy.title):
+                response = await get_backend().chat_async(
+                    prompt,
+                    system=SYSTEM_PROMPT,
+                    schema=VacancySchema.model_json_schema(),
+                    max_tokens=num_ctx or context_size([prompt]),
+                )
+        except TimeoutError:
+            logging.error(f"LLM timeout for vacancy {vacancy.title}")
+            return fallback_answer(vacancy.title)
+    return parse_answer(response, vacancy.title)
+
+
+def batch_answers(
+    selected: List[CompiledVacancy], responses: List[str | Exception]
+) -> List[Dict]:
+    """
+    Разбирает ответы пакетного запроса по вакансиям.
+
+    Args:
+        selected: Оцениваемые вакансии
+        responses: Ответы бэкенда в порядке вакансий
+
+    Returns:
+        List[Dict]: Оценки кандидата; для вакансий с таймаутом - заглушки
+
+    Raises:
+        Exception: Ошибка запроса, отличная от таймаута
+    """
+    answers = []
+    for vacancy, response in zip(selected, responses):
+        if isinstance(response, TimeoutError):
+            logging.error(f"LLM timeout for vacancy {vacancy.title}")
+            answers.append(fallback_answer(vacancy.title))
+        elif isinstance(response, Exception):
+            raise response
+        else:
+            answers.append(parse_answer(response, vacancy.title))
+    return answers
+
+
+def combined_request(
+    candidate_section: str, selected: List[CompiledVacancy]
+) -> Tuple[List[List[CompiledVacancy]], List[str], Dict]:
+    """
+    Собирает промпты режима combined и общие параметры запроса к бэкенду.
+
+    Args:
+        candidate_section: Раздел кандидата в раскладке shared
+        selected: Оцениваемые вакансии
+
+    Returns:
+        Tuple[List[List[CompiledVacancy]], List[str], Dict]: Части вакансий,
+            промпты частей и именованные аргументы chat_batch
+    """
+    chunks = combined_chunks(candidate_section, selected)
+    prompts = [build_combined_prompt(candidate_section, chunk) for chunk in chunks]
+    params = {
+        "system": SYSTEM_PROMPT,
+        "schema": MultiVacancySchema.model_json_schema(),
+        "max_tokens": context_size(prompts, answers=max(map(len, chunks))),
+        "labels": ["combined"] * len(chunks),
+    }
+    logging.info(
+        f"Combined scoring: {len(selected)} vacancies in {len(chunks)} prompts"
+    )
+    return chunks, prompts, params
+
+
+def missing_request(
+    candidate_section: str, missing: List[CompiledVacancy]
+) -> Tuple[List[str], Dict]:
+    """
+    Собирает отдельные промпты для вакансий, которые модель не оценила в режиме combined.
+
+    Args:
+        candidate_section: Раздел кандидата в раскладке shared
+        missing: Вакансии без оценки
+
+    Returns:
+        Tuple[List[str], Dict]: Промпты и именованные аргументы chat_batch
+    """
+    logging.warning(
+        f"Combined answer has no score for {len(missing)} vacancies, "
+        "scoring them separately"
+    )
+    prompts = [
+        build_prompt(candidate_section, vacancy, layout="shared") for vacancy in missing
+    ]
+    params = {
+        "system": SYSTEM_PROMPT,
+        "schema": VacancySchema.model_json_schema(),
+        "max_tokens": context_size(prompts),
+        "labels": [vacancy.title for vacancy in missing],
+    }
+    return prompts, params
+
+
+def score_combined(
+    candidate_section: str,
+    selected: List[CompiledVacancy],
+    concurrency: int = LLM_CONCURRENCY,
+) -> List[Dict]:
+    """
+    Оценивает вакансии одним запросом к модели (или несколькими, если вакансии
+    не помещаются в контекст): раздел кандидата обрабатывается моделью один раз
+    на часть, а не для каждой вакансии.
+
+    Вакансии, оценки которых нет в ответе, оцениваются отдельными запросами.
+
+    Args:
+        candidate_section: Раздел кандидата в раскладке shared
+        selected: Оцениваемые вакансии
+        concurrency: Сколько частей отправлять одновременно
+
+    Returns:
+        List[Dict]: Оценки кандидата в порядке selected
+    """
+    chunks, prompts, params = combined_request(candidate_section, selected)
+    responses = get_backend().chat_batch(prompts, concurrency=concurrency, **params)
+    answers, missing = combined_answers(chunks, responses)
+    if missing:
+        prompts, params = missing_request(candidate_section, missing)
+        responses = get_backend().chat_batch(prompts, concurrency=concurrency, **params)
+        answers.update(
+            zip(
+                (vacancy.vacancy_id for vacancy in missing),
+                batch_answers(missing, responses),
+            )
+        )
+    return [answers[vacancy.vacancy_id] for vacancy in selected]
+
+
+async def score_combined_async(
+    candidate_section: str,
+    selected: List[CompiledVacancy],
+    concurrency: int = LLM_CONCURRENCY,
+) -> List[Dict]:
+    """
+    Асинхронный вариант score_combined.
+
+    Args:
+        candidate_section: Раздел кандидата в раскладке shared
+        selected: Оцениваемые вакансии
+        concurrency: Сколько частей отправлять одновременно
+
+    Returns:
+        List[Dict]: Оценки кандидата в порядке selected
+    """
+    chunks, prompts, params = combined_request(candidate_section, selected)
+    responses = await get_backend().chat_batch_async(
+        prompts, concurrency=concurrency, **params
+    )
+    answers, missing = combined_answers(chunks, responses)
+    if missing:
+        prompts, params = missing_request(candidate_section, missing)
+        responses = await get_backend().chat_batch_async(
+            prompts, concurrency=concurrency, **params
+        )
+        answers.update(
+            zip(
+                (vacancy.vacancy_id for vacancy in missing),
+                batch_answers(missing, responses),
+            )
+        )
+    return [answers[vacancy.vacancy_id] for vacancy in selected]
+
+
+def candidate_prescores(data: Dict, catalog: CatalogSnapshot) -> List[VacancyScore]:
+    """
+    Предварительно оценивает кандидата по всем вакансиям без LLM.
+
+    Args:
+        data: Данные кандидата
+        catalog: Снимок каталога вакансий
+
+    Returns:
+        List[VacancyScore]: Оценки, отсортированные по убыванию процента
+    """
+    index = get_competency_index(catalog) if SEMANTIC_MATCHING else None
+    return prescore(data, catalog, index=index)
+
+
+def shortlist(
+    data: Dict, catalog: CatalogSnapshot, top_k: int, min_percentage: int
+) -> List[CompiledVacancy]:
+    """
+    Отбирает вакансии для LLM по детерминированной предварительной оценке.
+
+    Args:
+        data: Данные кандидата
+        catalog: Снимок каталога вакансий
+        top_k: Сколько лучших вакансий оценивать моделью, 0 - все
+        min_percentage: Минимальный процент предварительной оценки
+
+    Returns:
+        List[CompiledVacancy]: Отобранные вакансии в порядке каталога
+    """
+    scores = candidate_prescores(data, catalog)
+    selected = {
+        vacancy.vacancy_id for vacancy in select_for_llm(scores, top_k, min_percentage)
+    }
+    logging.info(f"Vacancies sent to LLM: {len(selected)} of {len(catalog.vacancies)}")
+    return [
+        vacancy
+        for vacancy in catalog.vacancies.values()
+        if vacancy.vacancy_id in selected
+    ]
+
+
+def validated_catalog(
+    data: Dict, vacancies: Mapping | VacancyCatalog | CatalogSnapshot
+) -> CatalogSnapshot:
+    """
+    Проверяет данные кандидата и вакансий и возвращает снимок каталога.
+
+    Args:
+        data: Данные кандидата
+        vacancies: Каталог или словарь вакансий в формате, описанном в process_json
+
+    Returns:
+        CatalogSnapshot: Снимок каталога вакансий
+
+    Raises:
+        ValueError: Если данные кандидата или вакансий некорректны
+    """
+    compiled = isinstance(vacancies, (VacancyCatalog, CatalogSnapshot))
+    raw = vacancies.raw if compiled else vacancies
+    is_valid, error_msg = validate_input_data(data, raw)
+    if not is_valid:
+        logging.error(f"Input validation failed: {error_msg}")
+        raise ValueError(f"Invalid input data: {error_msg}")
+    return resolve_catalog(vacancies)
+
+
+def prepare_match(
+    data: Dict,
+    vacancies: Mapping | VacancyCatalog | CatalogSnapshot,
+    top_k: int,
+    min_percentage: int,
+    layout: str = PROMPT_LAYOUT,
+) -> Tuple[List[CompiledVacancy], str]:
+    """
+    Проверяет входные данные, отбирает вакансии для LLM и собирает раздел кандидата.
+
+    Args:
+        data: Данные кандидата
+        vacancies: Каталог или словарь вакансий в формате, описанном в process_json
+        top_k: Сколько лучших по предварительной оценке вакансий отправлять в LLM
+        min_percentage: Минимальный процент предварительной оценки
+        layout: Раскладка промпта для раздела кандидата
+
+    Returns:
+        Tuple[List[CompiledVacancy], str]: Отобранные вакансии и раздел промпта о кандидате
+
+    Raises:
+        ValueError: Если данные кандидата или вакансий некорректны
+    """
+    with stage_timer("prescore"):
+        catalog = validated_catalog(data, vacancies)
+        selected = shortlist(data, catalog, top_k, min_percentage)
+    return selected, build_candidate_section(data, layout)
+
+
+def candidate_contacts(data: Dict) -> Dict:
+    """
+    Возвращает имя и контакты кандидата для ответа API.
+
+    Args:
+        data: Данные кандидата
+
+    Returns:
+        Dict: Поля full_name, email и phone
+    """
+    return {
+        "full_name": data["base_info"].get("full_name", "").split("\n")[0],
+        "email": data["contacts"].get("email"),
+        "phone": data["contacts"].get("phone"),
+    }
+
+
+def scoring_layout(scoring: str) -> str:
+    """
+    Возвращает раскладку промпта для режима оценки.
+
+    Args:
+        scoring: "separate" или "combined"
+
+    Returns:
+        str: PROMPT_LAYOUT для separate; shared для combined, где раздел
+            кандидата стоит перед вакансиями
+
+    Raises:
+        ValueError: Если режим не поддерживается
+    """
+    if scoring not in SCORING_MODES:
+        raise ValueError(f"Unsupported scoring mode: {scoring}")
+    return "shared" if scoring == "combined" else PROMPT_LAYOUT
+
+
+def select_best(data: Dict, answers: List[Dict]) -> Dict:
+    """
+    Выбирает вакансию с наибольшим процентом и дополняет её контактами кандидата.
+
+    Args:
+        data: Данные кандидата
+        answers: Оценки кандидата по всем вакансиям
+
+    Returns:
+        Dict: Лучшая оценка или {"error": ...}, если оценок нет
+    """
+    if not answers:
+        return {"error": "No answers from LLM"}
+
+    best = max(answers, key=lambda x: x["percentage"])
+    best.update(candidate_contacts(data))
+    return best
+
+
+def process_json(
+    data: Dict,
+    vacancies: Mapping | VacancyCatalog | CatalogSnapshot,
+    concurrency: int = LLM_CONCURRENCY,
+    top_k: int = PRESCORE_TOP_K,
+    min_percentage: int = PRESCORE_MIN_PERCENTAGE,
+    scoring: str = SCORING_MODE,
+) -> Dict:
     """
     Обрабатывает данные кандидата и вакансии, возвращая рекомендации по трудоустройству.
 
     Функция выполняет комплексный анализ соответствия кандидата вакансиям:
-    1. Генерирует промпты для оценки по каждой вакансии
-    2. Рассчитывает процент соответствия на основе недостающих компетенций
-    3. Формирует финальные рекомендации по наиболее подходящей вакансии
+    1. Предварительно оценивает все вакансии без LLM (scoring.prescore)
+    2. Генерирует промпты для оценки по отобранным вакансиям
+    3. Рассчитывает процент соответствия на основе недостающих компетенций
+    4. Формирует финальные рекомендации по наиболее подходящей вакансии
 
     Args:
         data (Dict): Данные кандидата в формате:
@@ -69,7 +836,8 @@ def process_json(data: Dict, vacancies: Dict) -> Dict:
                 "skills": [список навыков],
                 "experience": [список элементов опыта]
             }
-        vacancies (Dict): Словарь вакансий в формате:
+        vacancies (Mapping | VacancyCatalog | CatalogSnapshot): Каталог вакансий,
+            его снимок или словарь в формате:
             {
                 "vacancy_id": {
                     "название": "Название вакансии",
@@ -83,6 +851,15 @@ def process_json(data: Dict, vacancies: Dict) -> Dict:
                     }
                 }
             }
+        concurrency (int): Сколько вакансий оценивать одновременно.
+            По умолчанию берется из OLLAMA_CONCURRENCY, 1 - последовательно.
+        top_k (int): Сколько лучших по предварительной оценке вакансий
+            отправлять в LLM, 0 - все. По умолчанию PRESCORE_TOP_K.
+        min_percentage (int): Минимальный процент предварительной оценки
+            для отправки вакансии в LLM.
+        scoring (str): "separate" - отдельный запрос к модели на каждую вакансию,
+            "combined" - все отобранные вакансии одним промптом (score_combined).
+            По умолчанию SCORING_MODE.
 
     Returns:
         Dict: Результат анализа в формате:
@@ -106,7 +883,13 @@ def process_json(data: Dict, vacancies: Dict) -> Dict:
         }
 
     Notes:
-        - Использует глобальный клиент LLM для генерации оценок
+        - Использует глобальный бэкенд LLM (LLM_BACKEND) для генерации оценок
+        - Словарь вакансий компилируется при каждом вызове, готовый
+          VacancyCatalog используется без пересборки промптов
+        - Промпты всех вакансий отправляются бэкенду одним пакетом
+          (chat_batch), ответы собираются в исходном порядке вакансий
+        - В режиме combined ответ проверяется по MultiVacancySchema; вакансии
+          без оценки в ответе оцениваются отдельными запросами
         - Логика расчета процента соответствия:
             * -2% за навык уровня "низкий"
             * -5% за навык уровня "средний"
@@ -114,84 +897,346 @@ def process_json(data: Dict, vacancies: Dict) -> Dict:
         - Парсинг ответа проводится согласно VacancySchema
         - В случае ошибки декодирования JSON возвращает словарь с ошибкой
     """
-    global client
-    is_valid, error_msg = validate_input_data(data, vacancies)
-    if not is_valid:
-        logging.error(f"Input validation failed: {error_msg}")
-        return {"error": f"Invalid input data: {error_msg}"}
-    correspond_dict = {
-        1: "низкий",
-        2: "средний",
-        3: "высокий",
-    }
-    answers = []
-    for vacancy in vacancies:
-        prompt = "Вакансия: " + vacancies[vacancy]["название"] + "\n"
-        # prompt += "Описание: " + vacancies[vacancy]["описание"] + "\n"
-        prompt += "Компетенции, необходимые для выполнения работы: " + "\n"
-        for skill in vacancies[vacancy]["компетенции"]:
-            for number in range(len(vacancies[vacancy]["компетенции"][skill])):
-                prompt += (
-                    vacancies[vacancy]["компетенции"][skill][number]["название"]
-                    + ", уровень: "
-                    + correspond_dict[
-                        (vacancies[vacancy]["компетенции"][skill][number]["уровень"])
-                    ]
-                    + "\n"
-                )
-        prompt += "\n"
-        prompt += (
-            "Тебе необходимо оценить, насколько подходит кандидат на должность, и если не подходит,"
-            "то написать рекомендации по обучению. В начале ответа пиши название вакансии, затем подходит"
-            "или нет, и в конце рекомендации по обучению, если кандидат не подходит. Также укажи"
-            "процент соответствия вакансии, в json-формате. "
-            "Используй следующую логику вычитания процентов: \n"
-            + "- 2 процента за каждый отсутствующий навык уровня 'низкий'\n"
-            + "- 5 процентов за каждый отсутствующий навык уровня 'средний'\n"
-            + "- 10 процентов за каждый отсутствующий навык уровня 'высокий'\n"
-            + "- Если среди компетенций есть обширная сфера, а у кандидата есть более узкие навыки из этой сферы, "
-            "то вычитать не нужно. В "
-            "обосновании нужно писать, каких навыков не хватает, но не нужно указывать, что ты"
-            "вычитаешь. \n"
-            "Его навыки: " + "\n"
+    try:
+        selected, candidate_section = prepare_match(
+            data, vacancies, top_k, min_percentage, scoring_layout(scoring)
         )
-        prompt += ", ".join(data["skills"]) + "\n"
-        prompt += "Также его опыт включал: " + "\n"
-        prompt += ", ".join(data["experience"]) + "\n"
-        prompt += "Твоя оценка: "
-        logging.debug(prompt)
-        response = ollama_chat(
-            client,
-            model_name=MODEL_NAME,
-            prompt=prompt,
+    except ValueError as e:
+        return {"error": str(e)}
+    if scoring == "combined":
+        with stage_timer("llm"):
+            answers = score_combined(candidate_section, selected, concurrency)
+        return select_best(data, answers)
+    prompts = [build_prompt(candidate_section, vacancy) for vacancy in selected]
+    with stage_timer("llm"):
+        responses = get_backend().chat_batch(
+            prompts,
             system=SYSTEM_PROMPT,
             schema=VacancySchema.model_json_schema(),
+            max_tokens=context_size(prompts),
+            concurrency=concurrency,
+            labels=[vacancy.title for vacancy in selected],
         )
-        logging.debug("_____________________")
-        logging.debug(response)
-        try:
-            answers.append(json.loads(response))
-        except json.decoder.JSONDecodeError:
-            logging.error("Invalid JSON response after LLM generation")
-            try:
-                vacancy_name = vacancies[vacancy]["название"]
-                fallback_response = {
-                    "vacancy": vacancy_name,
-                    "percentage": 0,
-                    "explaining": f"Не удалось обработать ответ для вакансии {vacancy_name}.",
-                    "recommendations": "Попробуйте повторить запрос или скорректировать данные.",
-                }
-                answers.append(fallback_response)
-                logging.warning(f"Created fallback response for {vacancy_name}")
-            except Exception as e:
-                logging.error(f"Failed to create fallback response: {str(e)}")
+    return select_best(data, batch_answers(selected, responses))
 
-    if not answers:
-        return {"error": "No answers from LLM"}
 
-    best = max(answers, key=lambda x: x["percentage"])
+async def process_json_async(
+    data: Dict,
+    vacancies: Mapping | VacancyCatalog | CatalogSnapshot,
+    concurrency: int = LLM_CONCURRENCY,
+    top_k: int = PRESCORE_TOP_K,
+    min_percentage: int = PRESCORE_MIN_PERCENTAGE,
+    scoring: str = SCORING_MODE,
+) -> Dict:
+    """
+    Асинхронный вариант process_json, не блокирующий event loop сервера.
 
-    best["full_name"] = data["base_info"]["full_name"].split("\n")[0]
-    best["email"] = data["contacts"]["email"]
-    best["phone"] = data["contacts"]["phone"]
-    return best
+    Промпты всех отобранных вакансий отправляются бэкенду одним пакетом,
+    одновременно выполняется не больше concurrency запросов.
+
+    Args:
+        data: Данные кандидата
+        vacancies: Каталог или словарь вакансий в формате, описанном в process_json
+        concurrency: Сколько вакансий оценивать одновременно
+        top_k: Сколько лучших по предварительной оценке вакансий отправлять в LLM
+        min_percentage: Минимальный процент предварительной оценки
+        scoring: "separate" или "combined", как в process_json
+
+    Returns:
+        Dict: Результат анализа в формате process_json
+    """
+    try:
+        # Предварительная оценка (RapidFuzz, а после перезагрузки каталога - и
+        # построение индекса компетенций через spaCy) не должна блокировать event loop
+        selected, candidate_section = await asyncio.to_thread(
+            prepare_match,
+            data,
+            vacancies,
+            top_k,
+            min_percentage,
+            scoring_layout(scoring),
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+    if scoring == "combined":
+        with stage_timer("llm"):
+            answers = await score_combined_async(
+                candidate_section, selected, concurrency
+            )
+        return select_best(data, answers)
+    prompts = [build_prompt(candidate_section, vacancy) for vacancy in selected]
+    with stage_timer("llm"):
+        responses = await get_backend().chat_batch_async(
+            prompts,
+            system=SYSTEM_PROMPT,
+            schema=VacancySchema.model_json_schema(),
+            max_tokens=context_size(prompts),
+            concurrency=concurrency,
+            labels=[vacancy.title for vacancy in selected],
+        )
+    return select_best(data, batch_answers(selected, responses))
+
+
+async def iter_vacancy_answers(
+    data: Dict,
+    vacancies: Mapping | VacancyCatalog | CatalogSnapshot,
+    concurrency: int = LLM_CONCURRENCY,
+    top_k: int = PRESCORE_TOP_K,
+    min_percentage: int = PRESCORE_MIN_PERCENTAGE,
+) -> AsyncIterator[Tuple[int, Dict]]:
+    """
+    Оценивает вакансии как process_json_async, но выдает оценки по мере готовности.
+
+    Args:
+        data: Данные кандидата
+        vacancies: Каталог или словарь вакансий в формате, описанном в process_json
+        concurrency: Сколько вакансий оценивать одновременно
+        top_k: Сколько лучших по предварительной оценке вакансий отправлять в LLM
+        min_percentage: Минимальный процент предварительной оценки
+
+    Yields:
+        Tuple[int, Dict]: Номер вакансии среди отобранных (в порядке каталога) и её оценка
+
+    Raises:
+        ValueError: Если данные кандидата или вакансий некорректны
+    """
+    selected, candidate_section = await asyncio.to_thread(
+        prepare_match, data, vacancies, top_k, min_percentage
+    )
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    num_ctx = context_size(
+        [build_prompt(candidate_section, vacancy) for vacancy in selected]
+    )
+
+    async def score(position: int, vacancy: CompiledVacancy) -> Tuple[int, Dict]:
+        return position, await score_vacancy_async(
+            candidate_section, vacancy, semaphore, num_ctx
+        )
+
+    tasks = [
+        asyncio.ensure_future(score(position, vacancy))
+        for position, vacancy in enumerate(selected)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def ranking_bound(score: VacancyScore, margin: int = RANKING_BOUND_MARGIN) -> int:
+    """
+    Верхняя оценка процента, который может получить вакансия.
+
+    Берется предварительная оценка с запасом margin на компетенции, которые
+    модель найдет, а нечеткое и семантическое сопоставление - нет.
+
+    Args:
+        score: Предварительная оценка вакансии
+        margin: Запас в процентах
+
+    Returns:
+        int: Верхняя оценка от 0 до 100
+    """
+    return min(100, score.percentage + margin)
+
+
+def can_improve(
+    score: VacancyScore, answers: List[Dict], top_k: int, margin: int
+) -> bool:
+    """
+    Проверяет, может ли вакансия попасть в top_k лучших уже полученных оценок.
+
+    Args:
+        score: Предварительная оценка вакансии
+        answers: Оценки, полученные от модели
+        top_k: Сколько лучших вакансий нужно, 0 - все
+        margin: Запас верхней оценки
+
+    Returns:
+        bool: False, если верхняя оценка не выше k-й лучшей оценки
+    """
+    if top_k <= 0 or len(answers) < top_k:
+        return True
+    kth = sorted((answer["percentage"] for answer in answers), reverse=True)[top_k - 1]
+    return ranking_bound(score, margin) > kth
+
+
+def build_ranking(
+    data: Dict,
+    answers: List[Dict],
+    skipped: List[VacancyScore],
+    top_k: int,
+    min_percentage: int,
+    margin: int,
+) -> Dict:
+    """
+    Собирает ответ режима ранжирования.
+
+    Args:
+        data: Данные кандидата
+        answers: Оценки модели в порядке получения
+        skipped: Вакансии, которые не отправлялись в модель
+        top_k: Сколько лучших вакансий вернуть, 0 - все
+        min_percentage: Минимальный процент для попадания в список
+        margin: Запас верхней оценки
+
+    Returns:
+        Dict: Контакты кандидата, отсортированный список "ranking" и
+        вакансии "not_evaluated" с их верхней оценкой
+    """
+    ranking = sorted(answers, key=lambda answer: answer["percentage"], reverse=True)
+    ranking = [answer for answer in ranking if answer["percentage"] >= min_percentage]
+    if top_k > 0:
+        ranking = ranking[:top_k]
+    return {
+        **candidate_contacts(data),
+        "ranking": ranking,
+        "not_evaluated": [
+            {
+                "vacancy": score.vacancy.title,
+                "upper_bound": ranking_bound(score, margin),
+            }
+            for score in skipped
+        ],
+    }
+
+
+def plan_ranking(
+    data: Dict,
+    vacancies: Mapping | VacancyCatalog | CatalogSnapshot,
+    min_percentage: int,
+    margin: int,
+) -> Tuple[Deque[VacancyScore], List[VacancyScore]]:
+    """
+    Упорядочивает вакансии по верхней оценке и отбрасывает те, что не наберут min_percentage.
+
+    Args:
+        data: Данные кандидата
+        vacancies: Каталог или словарь вакансий в формате, описанном в process_json
+        min_percentage: Минимальный процент для попадания в список
+        margin: Запас верхней оценки
+
+    Returns:
+        Tuple[Deque[VacancyScore], List[VacancyScore]]: Очередь вакансий для модели
+        по убыванию верхней оценки и вакансии, отброшенные сразу
+
+    Raises:
+        ValueError: Если данные кандидата или вакансий некорректны
+    """
+    scores = candidate_prescores(data, validated_catalog(data, vacancies))
+    pending = deque(s for s in scores if ranking_bound(s, margin) >= min_percentage)
+    skipped = [s for s in scores if ranking_bound(s, margin) < min_percentage]
+    return pending, skipped
+
+
+def rank_vacancies(
+    data: Dict,
+    vacancies: Mapping | VacancyCatalog | CatalogSnapshot,
+    top_k: int = 0,
+    min_percentage: int = 0,
+    concurrency: int = LLM_CONCURRENCY,
+    margin: int = RANKING_BOUND_MARGIN,
+) -> Dict:
+    """
+    Оценивает вакансии моделью и возвращает их список по убыванию процента.
+
+    Вакансии отправляются в модель волнами по concurrency штук в порядке
+    убывания предварительной оценки. Как только верхняя оценка следующей
+    вакансии не превышает k-й лучшей полученной оценки, остальные вакансии
+    в модель не отправляются: попасть в top_k они уже не могут.
+
+    Args:
+        data: Данные кандидата
+        vacancies: Каталог или словарь вакансий в формате, описанном в process_json
+        top_k: Сколько лучших вакансий вернуть, 0 - все (без досрочной остановки)
+        min_percentage: Минимальный процент для попадания в список
+        concurrency: Сколько вакансий оценивать одновременно
+        margin: Запас верхней оценки над предварительной, в процентах
+
+    Returns:
+        Dict: Результат в формате build_ranking или {"error": ...}
+    """
+    try:
+        pending, skipped = plan_ranking(data, vacancies, min_percentage, margin)
+    except ValueError as e:
+        return {"error": str(e)}
+    candidate_section = build_candidate_section(data)
+    num_ctx = context_size(
+        [build_prompt(candidate_section, score.vacancy) for score in pending]
+    )
+    answers: List[Dict] = []
+    workers = max(1, concurrency)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending and can_improve(pending[0], answers, top_k, margin):
+            wave = [pending.popleft() for _ in range(min(workers, len(pending)))]
+            answers.extend(
+                executor.map(
+                    lambda score: score_vacancy(
+                        candidate_section, score.vacancy, num_ctx
+                    ),
+                    wave,
+                )
+            )
+    logging.info(
+        f"Ranking: {len(answers)} vacancies scored by LLM, {len(pending)} cut off"
+    )
+    return build_ranking(
+        data, answers, skipped + list(pending), top_k, min_percentage, margin
+    )
+
+
+async def rank_vacancies_async(
+    data: Dict,
+    vacancies: Mapping | VacancyCatalog | CatalogSnapshot,
+    top_k: int = 0,
+    min_percentage: int = 0,
+    concurrency: int = LLM_CONCURRENCY,
+    margin: int = RANKING_BOUND_MARGIN,
+) -> Dict:
+    """
+    Асинхронный вариант rank_vacancies.
+
+    Args:
+        data: Данные кандидата
+        vacancies: Каталог или словарь вакансий в формате, описанном в process_json
+        top_k: Сколько лучших вакансий вернуть, 0 - все (без досрочной остановки)
+        min_percentage: Минимальный процент для попадания в список
+        concurrency: Сколько вакансий оценивать одновременно
+        margin: Запас верхней оценки над предварительной, в процентах
+
+    Returns:
+        Dict: Результат в формате build_ranking или {"error": ...}
+    """
+    try:
+        pending, skipped = await asyncio.to_thread(
+            plan_ranking, data, vacancies, min_percentage, margin
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+    candidate_section = build_candidate_section(data)
+    num_ctx = context_size(
+        [build_prompt(candidate_section, score.vacancy) for score in pending]
+    )
+    answers: List[Dict] = []
+    workers = max(1, concurrency)
+    semaphore = asyncio.Semaphore(workers)
+    while pending and can_improve(pending[0], answers, top_k, margin):
+        wave = [pending.popleft() for _ in range(min(workers, len(pending)))]
+        answers.extend(
+            await asyncio.gather(
+                *(
+                    score_vacancy_async(
+                        candidate_section, score.vacancy, semaphore, num_ctx
+                    )
+                    for score in wave
+                )
+            )
+        )
+    logging.info(
+        f"Ranking: {len(answers)} vacancies scored by LLM, {len(pending)} cut off"
+    )
+    return build_ranking(
+        data, answers, skipped + list(pending), top_k, min_percentage, margin
+    )
@@ -0,0 +1,368 @@
+"""Файл с метриками сервиса в текстовом формате Prometheus и замером этапов обработки."""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+# Границы корзин гистограмм длительности в секундах: от разбора страницы до генерации
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+LabelValues = Tuple[str, ...]
+
+
+def format_labels(names: Sequence[str], values: LabelValues, **extra: str) -> str:
+    """Форматирует метки в виде {name="value",...} с экранированием значений."""
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def format_value(value: float) -> str:
+    """Форматирует число для текстового формата Prometheus."""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """
+    Базовая метрика с метками.
+
+    Значения метрики можно не обновлять при каждом событии, а вычислять при
+    выгрузке функцией из set_function: так состояние очередей и кешей не
+    дублируется в метриках.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        """
+        Args:
+            name: Название метрики
+            documentation: Описание для строки # HELP
+            labels: Названия меток
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, Any] = {}
+        self._function: Callable[[], Dict[LabelValues, float] | float] | None = None
+        self._lock = threading.Lock()
+
+    def set_function(self, function: Callable[[], Dict[LabelValues, float] | float]):
+        """
+        Задает функцию, вычисляющую значения метрики при выгрузке.
+
+        Args:
+            function: Возвращает число для метрики без меток или словарь
+                {значения меток: число}
+        """
+        self._function = function
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Выдает строки метрики: суффикс названия, метки и значение."""
+        if self._function is not None:
+            values = self._function()
+            if not isinstance(values, dict):
+                values = {(): values}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield "", format_labels(self.labels, key), value
+
+    def render(self) -> List[str]:
+        """Возвращает строки метрики в текстовом формате Prometheus."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Монотонно растущий счетчик."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Увеличивает счетчик.
+
+        Args:
+            amount: На сколько увеличить
+            labels: Значения меток
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Значение, которое может как расти, так и уменьшаться."""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        """Устанавливает значение для меток."""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Изменяет значение на amount (отрицательное - уменьшает)."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Histogram(Metric):
+    """Гистограмма: число наблюдений по корзинам, их сумма и количество."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        """
+        Args:
+            name: Название метрики
+            documentation: Описание для строки # HELP
+            labels: Названия меток
+            buckets: Верхние границы корзин по возрастанию, без +Inf
+        """
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Добавляет наблюдение.
+
+        Args:
+            value: Наблюдаемое значение
+            labels: Значения меток
+        """
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Замеряет длительность блока with в секундах."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        with self._lock:
+            values = {
+                key: (list(counts), total, count)
+                for key, (counts, total, count) in self._values.items()
+            }
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = format_labels(self.labels, key, le=format_value(bound))
+                yield "_bucket", labels, cumulative
+            yield "_sum", format_labels(self.labels, key), total
+            yield "_count", format_labels(self.labels, key), count
+
+
+class Registry:
+    """Набор метрик, выгружаемых вместе на /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Добавляет метрику в набор.
+
+        Args:
+            metric: Метрика
+
+        Returns:
+            Metric: Та же метрика, для записи в переменную модуля
+
+        Raises:
+            ValueError: Если метрика с таким названием уже есть
+        """
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.register(
+    Histogram(
+        "candidate_stage_seconds",
+        "Duration of resume processing and matching stages",
+        labels=("stage",),
+    )
+)
+REQUEST_SECONDS = registry.register(
+    Histogram(
+        "candidate_request_seconds",
+        "Duration of API requests",
+        labels=("endpoint", "status"),
+    )
+)
+LLM_REQUEST_SECONDS = registry.register(
+    Histogram(
+        "candidate_llm_request_seconds",
+        "Duration of LLM requests per vacancy, including retries",
+        labels=("vacancy",),
+    )
+)
+LLM_TOKENS = registry.register(
+    Counter(
+        "candidate_llm_tokens_total",
+        "Tokens processed by the LLM",
+        labels=("model", "kind"),
+    )
+)
+LLM_EVAL_SECONDS = registry.register(
+    Histogram(
+        "candidate_llm_eval_seconds",
+        "Model-reported durations: load, prompt_eval and eval",
+        labels=("model", "phase"),
+    )
+)
+LLM_RETRIES = registry.register(
+    Counter("candidate_llm_retries_total", "Retried LLM requests")
+)
+LLM_BREAKER_OPEN = registry.register(
+    Gauge("candidate_llm_breaker_open", "1 if the LLM circuit breaker is open")
+)
+CACHE_REQUESTS = registry.register(
+    Counter(
+        "candidate_cache_requests_total",
+        "Cache lookups by cache and result",
+        labels=("cache", "result"),
+    )
+)
+CACHE_SIZE = registry.register(
+    Gauge("candidate_cache_entries", "Entries in cache", labels=("cache",))
+)
+QUEUE_DEPTH = registry.register(
+    Gauge("candidate_queue_depth", "Items waiting in queue", labels=("queue",))
+)
+
+_stage_log: ContextVar[List[Tuple[str, float]] | None] = ContextVar(
+    "stage_log", default=None
+)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """
+    Записывает длительность этапа.
+
+    Внутри run_recorded длительность не попадает в метрики процесса, а
+    сохраняется для передачи вызывающему процессу.
+
+    Args:
+        stage: Название этапа
+        seconds: Длительность в секундах
+    """
+    log = _stage_log.get()
+    if log is None:
+        STAGE_SECONDS.observe(seconds, stage=stage)
+    else:
+        log.append((stage, seconds))
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Замеряет длительность блока with как этап stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def run_recorded(fn: Callable, *args: Any) -> Tuple[Any, List[Tuple[str, float]]]:
+    """
+    Выполняет функцию, собирая длительности её этапов.
+
+    Используется в процессах пула разбора: метрики процесса пула не видны
+    серверу, поэтому этапы возвращаются вместе с результатом и передаются
+    в replay_stages.
+
+    Args:
+        fn: Функция
+        args: Аргументы функции
+
+    Returns:
+        Tuple[Any, List[Tuple[str, float]]]: Результат и список (этап, секунды)
+    """
+    log: List[Tuple[str, float]] = []
+    token = _stage_log.set(log)
+    try:
+        return fn(*args), log
+    finally:
+        _stage_log.reset(token)
+
+
+def replay_stages(stages: List[Tuple[str, float]]) -> None:
+    """Записывает в метрики этапы, собранные run_recorded."""
+    for stage, seconds in stages:
+        STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def observe_llm_usage(
+    model: str,
+    prompt_tokens: int | None = None,
+    completion_tokens: int | None = None,
+    durations: Dict[str, int | None] | None = None,
+) -> None:
+    """
+    Записывает число токенов и длительности, которые сообщила модель.
+
+    Args:
+        model: Название модели
+        prompt_tokens: Токены промпта
+        completion_tokens: Сгенерированные токены
+        durations: Длительности фаз в наносекундах, как в ответе Ollama
+            (load, prompt_eval, eval)
+    """
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, model=model, kind="completion")
+    for phase, nanoseconds in (durations or {}).items():
+        if nanoseconds:
+            LLM_EVAL_SECONDS.observe(nanoseconds / 1e9, model=model, phase=phase)
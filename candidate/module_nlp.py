@@ -1,17 +1,78 @@
 # Файл для извлечения информации из резюме
+import io
 import json
 import logging
 import os
 import re
-from typing import Any, Dict, List, Optional
+import zipfile
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-import docx
-import pdfplumber
-import spacy
-import yake
+import numpy as np
 from rapidfuzz import fuzz, process
 
-nlp = spacy.load("ru_core_news_md")
+from .keywords import extract_keywords, extract_keywords_batch  # noqa: F401
+from .metrics import stage_timer
+from .pdf_text import DocumentSource, read_pdf
+from .utils import NER_HEAD_LINES, PDF_EARLY_EXIT, SPACY_LEAN
+
+if TYPE_CHECKING:
+    import spacy
+
+SPACY_MODEL = "ru_core_news_md"
+# Компоненты ru_core_news_md, которые не нужны для NER: у ner собственный tok2vec,
+# а из результатов используются только сущности PER и LOC
+NER_EXCLUDE = [
+    "tok2vec",
+    "morphologizer",
+    "parser",
+    "senter",
+    "attribute_ruler",
+    "lemmatizer",
+]
+
+
+def load_nlp(lean: bool = SPACY_LEAN) -> "spacy.Language":
+    """Загружает модель spaCy.
+
+    Args:
+        lean: Загрузить только компоненты, необходимые для NER
+
+    Returns:
+        spacy.Language: Загруженный пайплайн
+    """
+    import spacy
+
+    if not lean:
+        return spacy.load(SPACY_MODEL)
+    model = spacy.load(SPACY_MODEL, exclude=NER_EXCLUDE)
+    try:
+        model("Проверка")
+    except Exception as e:
+        logging.warning(f"Lean spaCy pipeline failed ({e}), loading full pipeline")
+        return spacy.load(SPACY_MODEL)
+    return model
+
+
+@lru_cache(maxsize=None)
+def get_nlp() -> "spacy.Language":
+    """Возвращает модель spaCy, загружая её при первом обращении.
+
+    Импорт модуля не загружает spaCy: модель загружается при первом разборе
+    резюме или заранее, в lifespan сервера и в процессах пула разбора.
+
+    Returns:
+        spacy.Language: Загруженный пайплайн
+    """
+    return load_nlp()
+
+
+def __getattr__(name: str) -> Any:
+    """Оставляет доступ к модели как module_nlp.nlp для обратной совместимости."""
+    if name == "nlp":
+        return get_nlp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 HEADER_MAP = {
     "skills": ["навыки", "skills", "технические навыки", "компетенции", "tech stack"],
@@ -25,42 +86,92 @@ HEADER_MAP = {
 }
 
 
-def extract_text_from_pdf(file_path: str) -> str:
-    """Извлекает текст из PDF-файла.
+def extract_text_from_pdf(source: DocumentSource) -> str:
+    """Извлекает текст из PDF-файла постранично.
+
+    Бэкенд и ограничения по страницам и символам задаются переменными
+    PDF_BACKEND, PDF_MAX_PAGES, PDF_MAX_CHARS и PDF_PAGE_WORKERS. С PDF_EARLY_EXIT
+    чтение прекращается, как только разделы навыков и опыта прочитаны целиком.
 
     Args:
-        file_path: Путь к PDF-файлу
+        source: Путь к PDF-файлу, его содержимое или файловый объект
 
     Returns:
-        str: Текст, извлеченный из всех страниц PDF
+        str: Текст, извлеченный из страниц PDF
     """
-    text = ""
-    with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() + "\n"
-    pdf.close()
-    return text
+    stop = SectionTracker() if PDF_EARLY_EXIT else None
+    return read_pdf(source, stop=stop)
 
 
-def extract_text_from_docx(file_path: str) -> str:
+def extract_text_from_docx(source: DocumentSource) -> str:
     """Извлекает текст из документа DOCX.
 
     Args:
-        file_path: Путь к DOCX-файлу
+        source: Путь к DOCX-файлу, его содержимое или файловый объект
 
     Returns:
         str: Текст, извлеченный из всех параграфов документа
     """
-    doc = docx.Document(file_path)
+    import docx
+
+    doc = docx.Document(io.BytesIO(source) if isinstance(source, bytes) else source)
     text = "\n".join([para.text for para in doc.paragraphs])
     return text
 
 
-def extract_text(file_path: str) -> str:
+def extract_text_from_txt(source: DocumentSource) -> str:
+    """Читает текстовый файл в кодировке UTF-8.
+
+    Args:
+        source: Путь к файлу, его содержимое или файловый объект
+
+    Returns:
+        str: Текст файла
+    """
+    if isinstance(source, str):
+        with open(source, "r", encoding="utf-8") as f:
+            return f.read()
+    content = source if isinstance(source, bytes) else source.read()
+    return content.decode("utf-8")
+
+
+def sniff_format(content: bytes) -> Optional[str]:
+    """Определяет формат документа по содержимому, а не по имени файла.
+
+    Args:
+        content: Содержимое файла
+
+    Returns:
+        Optional[str]: ".pdf", ".docx" или ".txt"; None, если формат не поддерживается
+    """
+    if b"%PDF-" in content[:1024]:
+        return ".pdf"
+    if content.startswith(b"PK\x03\x04"):
+        try:
+            with zipfile.ZipFile(io.BytesIO(content)) as archive:
+                if "word/document.xml" in archive.namelist():
+                    return ".docx"
+        except zipfile.BadZipFile:
+            pass
+        return None
+    if b"\x00" in content:
+        return None
+    try:
+        content.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    return ".txt"
+
+
+def extract_text(source: DocumentSource) -> str:
     """Извлекает текст из файла в зависимости от его формата.
 
+    Для пути формат определяется по расширению, для содержимого и файловых
+    объектов - по самому содержимому через sniff_format.
+
     Args:
-        file_path: Путь к файлу (поддерживаются .pdf, .docx и .txt)
+        source: Путь к файлу (поддерживаются .pdf, .docx и .txt), его содержимое
+            или двоичный файловый объект
 
     Returns:
         str: Извлеченный текст
@@ -68,14 +179,20 @@ def extract_text(file_path: str) -> str:
     Raises:
         ValueError: Если формат файла не поддерживается
     """
-    ext = os.path.splitext(file_path)[1].lower()
+    if isinstance(source, str):
+        ext = os.path.splitext(source)[1].lower()
+    else:
+        if not isinstance(source, bytes):
+            source = source.read()
+        ext = sniff_format(source)
+        if ext is None:
+            raise ValueError("Unsupported file content")
     if ext == ".pdf":
-        return extract_text_from_pdf(file_path)
+        return extract_text_from_pdf(source)
     elif ext == ".docx":
-        return extract_text_from_docx(file_path)
+        return extract_text_from_docx(source)
     elif ext == ".txt":
-        with open(file_path, "r", encoding="utf-8") as f:
-            return f.read()
+        return extract_text_from_txt(source)
     else:
         raise ValueError(f"Unsupported file type: {ext}")
 
@@ -130,6 +247,60 @@ def extract_contacts(text: str) -> Dict[str, str]:
     return contacts
 
 
+# Разделы, после которых при PDF_EARLY_EXIT можно не читать PDF дальше
+EARLY_EXIT_SECTIONS = ("skills", "experience")
+# Блоки, из которых извлекаются ключевые слова в отдельные поля резюме
+KEYWORD_BLOCKS = ("skills", "experience", "projects")
+HEADER_THRESHOLD = 75
+# Все примеры заголовков одним списком и границы категорий в нем для cdist
+HEADER_LABELS = list(HEADER_MAP)
+HEADER_CHOICES = [example for examples in HEADER_MAP.values() for example in examples]
+HEADER_OFFSETS = np.cumsum([0] + [len(examples) for examples in HEADER_MAP.values()])[
+    :-1
+]
+# fuzz.ratio не превышает 200 * min(a, b) / (a + b), поэтому строка длины a может
+# набрать больше 75 хотя бы с одним примером длины b, только если 3a < 5b и 3b < 5a
+HEADER_LENGTHS = frozenset(
+    length
+    for length in range(1, 5 * max(map(len, HEADER_CHOICES)) // 3 + 1)
+    if any(3 * length < 5 * len(c) and 3 * len(c) < 5 * length for c in HEADER_CHOICES)
+)
+
+
+def classify_headers(lines: List[str]) -> List[Optional[str]]:
+    """Определяет категории заголовков сразу для всех строк.
+
+    Строки, которые по длине не могут набрать порог ни с одним примером,
+    отбрасываются заранее, остальные сравниваются со всеми примерами одним
+    вызовом process.cdist. Результат совпадает с поочередным extractOne по
+    категориям: выбирается первая по порядку HEADER_MAP категория, лучший
+    пример которой набрал больше HEADER_THRESHOLD.
+
+    Args:
+        lines: Строки резюме без пробелов по краям
+
+    Returns:
+        List[Optional[str]]: Категория или None для каждой строки
+    """
+    result: List[Optional[str]] = [None] * len(lines)
+    lowered = [line.lower() for line in lines]
+    positions = [i for i, line in enumerate(lowered) if len(line) in HEADER_LENGTHS]
+    if not positions:
+        return result
+    scores = process.cdist(
+        [lowered[i] for i in positions],
+        HEADER_CHOICES,
+        scorer=fuzz.ratio,
+        dtype=np.float64,
+    )
+    passed = np.maximum.reduceat(scores, HEADER_OFFSETS, axis=1) > HEADER_THRESHOLD
+    first = passed.argmax(axis=1)
+    for row, i in enumerate(positions):
+        if passed[row, first[row]]:
+            result[i] = HEADER_LABELS[first[row]]
+    return result
+
+
 def normalize_header(line: str) -> Optional[str]:
     """Определяет категорию заголовка по нечеткому соответствию.
 
@@ -139,11 +310,7 @@ def normalize_header(line: str) -> Optional[str]:
     Returns:
         Optional[str]: Нормализованное название категории или None
     """
-    for block_type, examples in HEADER_MAP.items():
-        match, score, _ = process.extractOne(line.lower(), examples, scorer=fuzz.ratio)
-        if score > 75:
-            return block_type
-    return None
+    return classify_headers([line])[0]
 
 
 def split_into_blocks_fuzzy(text: str) -> Dict[str, str]:
@@ -159,12 +326,8 @@ def split_into_blocks_fuzzy(text: str) -> Dict[str, str]:
     current_block = "other"
     blocks[current_block] = []
 
-    for line in text.splitlines():
-        clean = line.strip()
-        if not clean:
-            continue
-
-        possible_header = normalize_header(clean)
+    lines = [clean for clean in (line.strip() for line in text.splitlines()) if clean]
+    for clean, possible_header in zip(lines, classify_headers(lines)):
         if possible_header:
             current_block = possible_header
             blocks[current_block] = []
@@ -177,27 +340,47 @@ def split_into_blocks_fuzzy(text: str) -> Dict[str, str]:
     return blocks
 
 
-def extract_keywords(text: str, lang: str = "ru", max_keywords: int = 50) -> List[str]:
-    """Извлекает ключевые слова из текста.
+class SectionTracker:
+    """Отслеживает по мере чтения страниц, прочитаны ли нужные разделы резюме целиком.
 
-    Args:
-        text: Исходный текст
-        lang: Язык текста
-        max_keywords: Максимальное количество ключевых слов
+    Раздел считается прочитанным, когда после его заголовка встретился заголовок
+    другого раздела. Экземпляр передается в read_pdf как условие остановки.
 
-    Returns:
-        List[str]: Список извлеченных ключевых слов
+    Args:
+        sections: Разделы, которые должны быть прочитаны
     """
-    kw_extractor = yake.KeywordExtractor(lan=lang, n=1, top=max_keywords)
-    keywords = kw_extractor.extract_keywords(text)
 
-    return [kw for kw, score in keywords]
+    def __init__(self, sections: Tuple[str, ...] = EARLY_EXIT_SECTIONS):
+        self.pending = set(sections)
+        self.current: Optional[str] = None
 
+    def __call__(self, page_text: str) -> bool:
+        """Учитывает заголовки очередной страницы.
 
-def extract_base_info(text: str) -> Dict[str, Any]:
-    """Извлекает базовую информацию о кандидате.
+        Args:
+            page_text: Текст страницы
+
+        Returns:
+            bool: True, если все разделы уже прочитаны
+        """
+        lines = [
+            clean
+            for clean in (line.strip() for line in page_text.splitlines())
+            if clean
+        ]
+        for header in classify_headers(lines):
+            if header is None or header == self.current:
+                continue
+            self.pending.discard(self.current)
+            self.current = header
+        return not self.pending
+
+
+def base_info_from_doc(doc: "spacy.tokens.Doc", text: str) -> Dict[str, Any]:
+    """Собирает базовую информацию из размеченного документа и текста резюме.
 
     Args:
+        doc: Документ spaCy с найденными сущностями
         text: Текст резюме
 
     Returns:
@@ -206,7 +389,6 @@ def extract_base_info(text: str) -> Dict[str, Any]:
     info = {}
 
     head_text = "\n".join(text.splitlines()[:10])
-    doc = nlp(text)
 
     persons = [ent.text for ent in doc.ents if ent.label_ == "PER"]
     if persons:
@@ -225,11 +407,69 @@ def extract_base_info(text: str) -> Dict[str, Any]:
     return info
 
 
-def process_resume(file_path: str) -> Dict[str, Any]:
+def ner_head(text: str, lines: int = NER_HEAD_LINES) -> str:
+    """Возвращает начало резюме, в котором обычно указаны имя и город.
+
+    Args:
+        text: Текст резюме
+        lines: Число первых строк
+
+    Returns:
+        str: Первые строки текста
+    """
+    return "\n".join(text.splitlines()[:lines])
+
+
+def has_person(doc: "spacy.tokens.Doc") -> bool:
+    """Проверяет, найдено ли в документе имя (сущность PER)."""
+    return any(ent.label_ == "PER" for ent in doc.ents)
+
+
+def extract_base_info(text: str) -> Dict[str, Any]:
+    """Извлекает базовую информацию о кандидате.
+
+    NER запускается сначала на первых NER_HEAD_LINES строках, и только если
+    имя там не найдено - на всем тексте.
+
+    Args:
+        text: Текст резюме
+
+    Returns:
+        Dict[str, Any]: Словарь с данными (имя, возраст, город)
+    """
+    nlp = get_nlp()
+    doc = nlp(ner_head(text))
+    if not has_person(doc):
+        doc = nlp(text)
+    return base_info_from_doc(doc, text)
+
+
+def extract_base_info_batch(
+    texts: List[str], batch_size: int = 16
+) -> List[Dict[str, Any]]:
+    """Извлекает базовую информацию из нескольких резюме через nlp.pipe.
+
+    Args:
+        texts: Тексты резюме
+        batch_size: Размер пакета для nlp.pipe
+
+    Returns:
+        List[Dict[str, Any]]: Базовая информация в порядке текстов
+    """
+    nlp = get_nlp()
+    docs = list(nlp.pipe((ner_head(text) for text in texts), batch_size=batch_size))
+    fallback = [i for i, doc in enumerate(docs) if not has_person(doc)]
+    full_docs = nlp.pipe((texts[i] for i in fallback), batch_size=batch_size)
+    for i, doc in zip(fallback, full_docs):
+        docs[i] = doc
+    return [base_info_from_doc(doc, text) for doc, text in zip(docs, texts)]
+
+
+def process_resume(source: DocumentSource) -> Dict[str, Any]:
     """Обрабатывает файл резюме и извлекает структурированные данные.
 
     Args:
-        file_path: Путь к файлу резюме
+        source: Путь к файлу резюме, его содержимое или файловый объект
 
     Returns:
         Dict[str, Any]: Словарь с данными резюме, содержащий разделы:
@@ -240,19 +480,51 @@ def process_resume(file_path: str) -> Dict[str, Any]:
             - projects: ключевые слова из проектов
             - other_sections: прочие разделы резюме
     """
-    text = extract_text(file_path)
-    blocks_fuzzy = split_into_blocks_fuzzy(text)
+    with stage_timer("extract_text"):
+        text = extract_text(source)
+    with stage_timer("ner"):
+        base_info = extract_base_info(text)
+    return build_resume(text, base_info)
 
-    skills_text = blocks_fuzzy.get("skills", "")
-    experience_text = blocks_fuzzy.get("experience", "")
-    projects_text = blocks_fuzzy.get("projects", "")
 
-    contact_info = extract_contacts(text)
-    base_info = extract_base_info(text)
+def build_resume(text: str, base_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Собирает структурированные данные резюме по тексту и базовой информации.
+
+    Args:
+        text: Текст резюме
+        base_info: Результат extract_base_info
+
+    Returns:
+        Dict[str, Any]: Словарь с данными резюме в формате process_resume
+    """
+    with stage_timer("sections"):
+        blocks_fuzzy = split_into_blocks_fuzzy(text)
+    with stage_timer("keywords"):
+        keywords = extract_keywords_batch(
+            [blocks_fuzzy.get(key, "") for key in KEYWORD_BLOCKS]
+        )
+    return assemble_resume(text, base_info, blocks_fuzzy, keywords)
+
+
+def assemble_resume(
+    text: str,
+    base_info: Dict[str, Any],
+    blocks_fuzzy: Dict[str, str],
+    keywords: List[List[str]],
+) -> Dict[str, Any]:
+    """Собирает словарь резюме из уже выделенных блоков и ключевых слов.
+
+    Args:
+        text: Текст резюме
+        base_info: Результат extract_base_info
+        blocks_fuzzy: Блоки из split_into_blocks_fuzzy
+        keywords: Ключевые слова блоков в порядке KEYWORD_BLOCKS
 
-    skills_keywords = extract_keywords(skills_text)
-    experience_keywords = extract_keywords(experience_text)
-    projects_keywords = extract_keywords(projects_text)
+    Returns:
+        Dict[str, Any]: Словарь с данными резюме в формате process_resume
+    """
+    contact_info = extract_contacts(text)
+    skills_keywords, experience_keywords, projects_keywords = keywords
 
     resume_data = {
         "base_info": base_info,
@@ -261,15 +533,62 @@ def process_resume(file_path: str) -> Dict[str, Any]:
         "experience": experience_keywords,
         "projects": projects_keywords,
         "other_sections": {
-            key: blocks_fuzzy[key]
-            for key in blocks_fuzzy
-            if key not in ["skills", "experience", "projects"]
+            key: blocks_fuzzy[key] for key in blocks_fuzzy if key not in KEYWORD_BLOCKS
         },
     }
 
     return resume_data
 
 
+def process_resumes(sources: List[DocumentSource]) -> List[Dict[str, Any] | str]:
+    """Обрабатывает несколько резюме, разбирая имена и города одним вызовом nlp.pipe.
+
+    Ключевые слова всех блоков всех резюме извлекаются одним вызовом
+    extract_keywords_batch.
+
+    Args:
+        sources: Пути к файлам резюме или их содержимое
+
+    Returns:
+        List[Dict[str, Any] | str]: Данные каждого резюме в формате process_resume
+        или текст ошибки, если файл не удалось прочитать
+    """
+    texts: List[str | None] = []
+    errors: Dict[int, str] = {}
+    for i, source in enumerate(sources):
+        try:
+            with stage_timer("extract_text"):
+                texts.append(extract_text(source))
+        except Exception as e:
+            errors[i] = str(e)
+            texts.append(None)
+    readable = [i for i, text in enumerate(texts) if text is not None]
+    with stage_timer("ner"):
+        base_infos = extract_base_info_batch([texts[i] for i in readable])
+    results: List[Dict[str, Any] | str] = [errors.get(i, "") for i in range(len(texts))]
+    with stage_timer("sections"):
+        blocks = [split_into_blocks_fuzzy(texts[i]) for i in readable]
+    try:
+        with stage_timer("keywords"):
+            flat_keywords = extract_keywords_batch(
+                [block.get(key, "") for block in blocks for key in KEYWORD_BLOCKS]
+            )
+    except Exception as e:
+        logging.error(f"Batch keyword extraction failed, retrying per resume: {e}")
+        flat_keywords = None
+    step = len(KEYWORD_BLOCKS)
+    for n, (i, base_info) in enumerate(zip(readable, base_infos)):
+        try:
+            if flat_keywords is None:
+                results[i] = build_resume(texts[i], base_info)
+            else:
+                keywords = flat_keywords[n * step : (n + 1) * step]
+                results[i] = assemble_resume(texts[i], base_info, blocks[n], keywords)
+        except Exception as e:
+            results[i] = str(e)
+    return results
+
+
 def save_to_json(data: Dict[str, Any], output_path: str) -> None:
     """Сохраняет данные в JSON-файл.
 
@@ -284,11 +603,11 @@ def save_to_json(data: Dict[str, Any], output_path: str) -> None:
         json.dump(data, f, ensure_ascii=False, indent=4)
 
 
-def extract_brief(input_file: str) -> Dict[str, any] | None:
+def extract_brief(input_file: DocumentSource) -> Dict[str, any] | None:
     """Извлекает данные из резюме и сохраняет их в JSON.
 
     Args:
-        input_file: Путь к файлу резюме
+        input_file: Путь к файлу резюме или его содержимое
 
     Returns:
         Dict[str, any]: Извлеченные данные из резюме
@@ -0,0 +1,258 @@
+"""Файл с постраничным извлечением текста из PDF с ограничением объема."""
+import io
+import logging
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import TYPE_CHECKING, BinaryIO, Callable, Dict, Iterator, List, Union
+
+from .utils import (
+    PDF_BACKEND,
+    PDF_MAX_CHARS,
+    PDF_MAX_PAGES,
+    PDF_PAGE_WORKERS,
+    PDF_PARALLEL_MIN_PAGES,
+)
+
+if TYPE_CHECKING:
+    import pdfplumber
+    import pypdfium2
+
+# Путь к файлу, содержимое файла или открытый двоичный файловый объект
+DocumentSource = Union[str, bytes, BinaryIO]
+
+# Пулы процессов для извлечения страниц по числу процессов
+_page_executors: Dict[int, Executor] = {}
+_page_executors_lock = threading.Lock()
+
+
+def open_pdfplumber(source: DocumentSource) -> "pdfplumber.PDF":
+    """Открывает PDF через pdfplumber, оборачивая содержимое в BytesIO.
+
+    Args:
+        source: Путь к PDF-файлу, его содержимое или файловый объект
+
+    Returns:
+        pdfplumber.PDF: Открытый документ
+    """
+    import pdfplumber
+
+    return pdfplumber.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+
+def open_pdfium(source: DocumentSource) -> "pypdfium2.PdfDocument":
+    """Открывает PDF через pypdfium2.
+
+    Args:
+        source: Путь к PDF-файлу, его содержимое или файловый объект
+
+    Returns:
+        pypdfium2.PdfDocument: Открытый документ, закрывается вызовом close()
+    """
+    import pypdfium2
+
+    return pypdfium2.PdfDocument(source)
+
+
+def describe(source: DocumentSource) -> str:
+    """Возвращает короткое описание источника для логов."""
+    if isinstance(source, str):
+        return source
+    if isinstance(source, bytes):
+        return f"<{len(source)} bytes>"
+    return f"<{type(source).__name__}>"
+
+
+def page_count(source: DocumentSource, backend: str = PDF_BACKEND) -> int:
+    """Возвращает число страниц PDF.
+
+    Args:
+        source: Путь к PDF-файлу, его содержимое или файловый объект
+        backend: Библиотека для чтения PDF
+
+    Returns:
+        int: Число страниц
+    """
+    if backend == "pypdfium2":
+        pdf = open_pdfium(source)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+    with open_pdfplumber(source) as pdf:
+        return len(pdf.pages)
+
+
+def iter_pdf_pages(
+    source: DocumentSource,
+    backend: str = PDF_BACKEND,
+    start: int = 0,
+    stop: int | None = None,
+) -> Iterator[str]:
+    """Лениво выдает текст страниц PDF, освобождая каждую страницу после чтения.
+
+    Args:
+        source: Путь к PDF-файлу, его содержимое или файловый объект
+        backend: "pdfplumber" или "pypdfium2"
+        start: Номер первой страницы
+        stop: Номер страницы, на которой остановиться, None - до конца документа
+
+    Yields:
+        str: Текст страницы; пустая строка, если текста на странице нет
+
+    Raises:
+        ValueError: Если бэкенд не поддерживается
+    """
+    if backend == "pdfplumber":
+        with open_pdfplumber(source) as pdf:
+            for page in pdf.pages[start:stop]:
+                try:
+                    yield page.extract_text() or ""
+                finally:
+                    page.close()
+    elif backend == "pypdfium2":
+        pdf = open_pdfium(source)
+        try:
+            for index in range(
+                start, len(pdf) if stop is None else min(stop, len(pdf))
+            ):
+                page = pdf[index]
+                textpage = page.get_textpage()
+                try:
+                    yield textpage.get_text_range().replace("\r\n", "\n")
+                finally:
+                    textpage.close()
+                    page.close()
+        finally:
+            pdf.close()
+    else:
+        raise ValueError(f"Unsupported PDF backend: {backend}")
+
+
+def extract_page_range(
+    source: DocumentSource, backend: str, start: int, stop: int
+) -> List[str]:
+    """Извлекает текст диапазона страниц. Выполняется в процессе пула страниц.
+
+    Args:
+        source: Путь к PDF-файлу, его содержимое или файловый объект
+        backend: Библиотека для чтения PDF
+        start: Номер первой страницы
+        stop: Номер страницы, на которой остановиться
+
+    Returns:
+        List[str]: Текст страниц диапазона
+    """
+    return list(iter_pdf_pages(source, backend, start, stop))
+
+
+def get_page_executor(workers: int = PDF_PAGE_WORKERS) -> Executor:
+    """Возвращает общий пул процессов для извлечения страниц, создавая его при первом вызове.
+
+    Пул создается один раз на каждое число процессов, в том числе при
+    одновременных запросах из разных потоков.
+
+    Args:
+        workers: Число процессов
+
+    Returns:
+        Executor: Пул процессов
+    """
+    with _page_executors_lock:
+        if workers not in _page_executors:
+            _page_executors[workers] = ProcessPoolExecutor(max_workers=workers)
+        return _page_executors[workers]
+
+
+def iter_pdf_pages_parallel(
+    source: DocumentSource,
+    pages: int,
+    backend: str = PDF_BACKEND,
+    workers: int = PDF_PAGE_WORKERS,
+) -> Iterator[str]:
+    """Извлекает страницы PDF диапазонами в нескольких процессах и выдает их по порядку.
+
+    Args:
+        source: Путь к PDF-файлу, его содержимое или файловый объект
+        pages: Сколько первых страниц извлечь
+        backend: Библиотека для чтения PDF
+        workers: Число процессов
+
+    Yields:
+        str: Текст страницы
+    """
+    step = -(-pages // workers)
+    ranges = [(start, min(start + step, pages)) for start in range(0, pages, step)]
+    executor = get_page_executor(workers)
+    futures = [
+        executor.submit(extract_page_range, source, backend, start, stop)
+        for start, stop in ranges
+    ]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def read_pdf(
+    source: DocumentSource,
+    backend: str = PDF_BACKEND,
+    max_pages: int = PDF_MAX_PAGES,
+    max_chars: int = PDF_MAX_CHARS,
+    workers: int = PDF_PAGE_WORKERS,
+    stop: Callable[[str], bool] | None = None,
+) -> str:
+    """Собирает текст PDF постранично с учетом ограничений.
+
+    Каждая страница завершается переводом строки. Чтение прекращается, когда
+    достигнут лимит страниц или символов (последняя страница обрезается по лимиту),
+    либо когда stop вернул True для очередной страницы.
+
+    Args:
+        source: Путь к PDF-файлу, его содержимое или файловый объект
+        backend: "pdfplumber" или "pypdfium2"
+        max_pages: Сколько страниц читать, 0 - все
+        max_chars: Сколько символов текста собрать, 0 - без ограничения
+        workers: Сколько процессов использовать для документов от
+            PDF_PARALLEL_MIN_PAGES страниц, 0 или 1 - читать в текущем процессе
+        stop: Вызывается с текстом каждой страницы; True прекращает чтение
+
+    Returns:
+        str: Текст прочитанных страниц
+    """
+    pages: Iterator[str]
+    if workers > 1:
+        if not isinstance(source, (str, bytes)):
+            # Процессам пула передается путь или содержимое, а не файловый объект
+            source = source.read()
+        total = page_count(source, backend)
+        if max_pages:
+            total = min(total, max_pages)
+        if total >= PDF_PARALLEL_MIN_PAGES:
+            pages = iter_pdf_pages_parallel(source, total, backend, workers)
+        else:
+            pages = iter_pdf_pages(source, backend, 0, total)
+    else:
+        pages = iter_pdf_pages(source, backend, 0, max_pages or None)
+
+    parts: List[str] = []
+    size = 0
+    for number, page_text in enumerate(pages, start=1):
+        page_text += "\n"
+        if max_chars and size + len(page_text) > max_chars:
+            parts.append(page_text[: max_chars - size])
+            logging.info(
+                f"PDF {describe(source)}: stopped at {max_chars} chars, page {number}"
+            )
+            break
+        parts.append(page_text)
+        size += len(page_text)
+        if stop is not None and stop(page_text):
+            logging.debug(
+                f"PDF {describe(source)}: required sections found on page {number}"
+            )
+            break
+    if hasattr(pages, "close"):
+        pages.close()
+    return "".join(parts)
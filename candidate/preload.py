@@ -0,0 +1,8 @@
+"""Файл для предзагрузки модели spaCy в сервере forkserver пула разбора.
+
+Импорт module_nlp модель не загружает; этот модуль загружает её при импорте,
+чтобы рабочие процессы получали готовую модель копированием.
+"""
+from .module_nlp import get_nlp
+
+get_nlp()
@@ -0,0 +1,159 @@
+"""Файл с повторными попытками и автоматическим выключателем для запросов к LLM."""
+import logging
+import random
+import threading
+import time
+from typing import Dict
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(ConnectionError):
+    """Выключатель разомкнут: бэкенд недоступен, запрос отклонен без обращения к нему."""
+
+    def __init__(self, retry_after: float):
+        """
+        Args:
+            retry_after: Через сколько секунд выключатель пропустит пробный запрос
+        """
+        super().__init__(f"LLM backend is unavailable, retry in {retry_after:.0f} s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель (circuit breaker).
+
+    После threshold сбоев подряд выключатель размыкается, и запросы отклоняются
+    сразу. Через reset_timeout секунд пропускается один пробный запрос: его успех
+    замыкает выключатель, сбой снова размыкает. Пока выключатель не замкнут,
+    учитывается только исход пробного запроса: запоздавшие ответы запросов,
+    отправленных до размыкания, его не меняют. Безопасен для вызова из потоков.
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30):
+        """
+        Args:
+            threshold: Сколько сбоев подряд размыкает выключатель, 0 - никогда
+            reset_timeout: Сколько секунд ждать перед пробным запросом
+        """
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened = 0
+        self._state = BREAKER_CLOSED
+        self._opened_at = 0.0
+        self._probe = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Состояние выключателя: closed, open или half_open."""
+        with self._lock:
+            return self._current_state()
+
+    def allow(self) -> bool:
+        """
+        Проверяет, можно ли отправить запрос.
+
+        Returns:
+            bool: True, если запрос пробный; его исход нужно передать в
+            record_success или record_failure с probe=True, а если исхода нет
+            (запрос отменен) - вызвать release_probe
+
+        Raises:
+            CircuitOpenError: Если выключатель разомкнут или пробный запрос уже выполняется
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == BREAKER_CLOSED:
+                return False
+            if state == BREAKER_HALF_OPEN and not self._probe:
+                self._probe = True
+                return True
+            raise CircuitOpenError(
+                max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+            )
+
+    def record_success(self, probe: bool = False) -> None:
+        """
+        Отмечает успешный запрос; успех пробного запроса замыкает выключатель.
+
+        Args:
+            probe: Запрос получил от allow разрешение на пробу
+        """
+        with self._lock:
+            if self._state != BREAKER_CLOSED:
+                if not probe:
+                    return
+                logging.info("LLM circuit breaker closed")
+            self.failures = 0
+            self._state = BREAKER_CLOSED
+            self._probe = False
+
+    def record_failure(self, probe: bool = False) -> None:
+        """
+        Отмечает сбой; размыкает выключатель после threshold сбоев подряд или сбоя пробы.
+
+        Args:
+            probe: Запрос получил от allow разрешение на пробу
+        """
+        with self._lock:
+            if self._state != BREAKER_CLOSED and not probe:
+                return
+            self.failures += 1
+            if probe or (self.threshold and self.failures >= self.threshold):
+                self.opened += 1
+                logging.error(
+                    f"LLM circuit breaker opened after {self.failures} failures"
+                )
+                self._state = BREAKER_OPEN
+                self._opened_at = time.monotonic()
+                self._probe = False
+
+    def release_probe(self, probe: bool) -> None:
+        """
+        Освобождает пробу, запрос которой завершился без исхода (например, отменен),
+        чтобы следующий запрос мог стать пробным.
+
+        Args:
+            probe: Результат allow для этого запроса
+        """
+        if probe:
+            with self._lock:
+                self._probe = False
+
+    def stats(self) -> Dict:
+        """Возвращает состояние, число сбоев подряд и сколько раз выключатель размыкался."""
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "failures": self.failures,
+                "opened": self.opened,
+            }
+
+    def _current_state(self) -> str:
+        if (
+            self._state == BREAKER_OPEN
+            and time.monotonic() - self._opened_at >= self.reset_timeout
+        ):
+            return BREAKER_HALF_OPEN
+        return self._state
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8) -> float:
+    """
+    Возвращает паузу перед повторной попыткой: экспонента со случайным разбросом.
+
+    Args:
+        attempt: Номер повторной попытки, начиная с 0
+        base: Пауза перед первой попыткой в секундах
+        cap: Максимальная пауза в секундах
+
+    Returns:
+        float: Пауза от половины до полного значения min(cap, base * 2 ** attempt)
+    """
+    delay = min(cap, base * 2**attempt)
+    return random.uniform(delay / 2, delay)
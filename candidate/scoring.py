@@ -0,0 +1,160 @@
+"""Файл с детерминированной оценкой кандидата по вакансиям без обращения к LLM."""
+import logging
+import re
+from dataclasses import dataclass
+from typing import AbstractSet, Dict, Iterable, List, Tuple
+
+from rapidfuzz import fuzz, process
+
+from .catalog import CatalogSnapshot, CompiledVacancy
+from .embeddings import CompetencyIndex
+from .utils import FUZZY_MATCH_CUTOFF, PRESCORE_MIN_PERCENTAGE, PRESCORE_TOP_K
+
+
+@dataclass(frozen=True)
+class VacancyScore:
+    """
+    Результат локальной оценки кандидата по вакансии.
+
+    Attributes:
+        vacancy: Скомпилированная вакансия
+        percentage: Процент соответствия по правилу -2/-5/-10 за отсутствующий навык
+        matched: Названия найденных у кандидата компетенций
+        missing: Названия отсутствующих компетенций
+    """
+
+    vacancy: CompiledVacancy
+    percentage: int
+    matched: Tuple[str, ...]
+    missing: Tuple[str, ...]
+
+
+def candidate_terms(data: Dict) -> List[str]:
+    """
+    Собирает термины кандидата из ключевых слов навыков и опыта.
+
+    Args:
+        data: Данные кандидата с полями skills и experience
+
+    Returns:
+        List[str]: Уникальные термины в нижнем регистре
+    """
+    words = (
+        word
+        for keyword in data.get("skills", []) + data.get("experience", [])
+        for word in re.findall(r"[\w+#]+", keyword.lower())
+    )
+    return list(dict.fromkeys(word for word in words if len(word) >= 3))
+
+
+def score_vacancy_locally(
+    terms: Iterable[str],
+    vacancy: CompiledVacancy,
+    cutoff: float = FUZZY_MATCH_CUTOFF,
+    term_cache: Dict[str, bool] | None = None,
+    semantic_matches: AbstractSet[str] = frozenset(),
+) -> VacancyScore:
+    """
+    Оценивает вакансию, сопоставляя термины кандидата с компетенциями через rapidfuzz.
+
+    Компетенция считается найденной, если хотя бы один её термин похож на
+    термин кандидата не меньше чем на cutoff по fuzz.ratio, либо она найдена
+    семантически по индексу компетенций.
+
+    Args:
+        terms: Термины кандидата из candidate_terms
+        vacancy: Скомпилированная вакансия
+        cutoff: Порог совпадения от 0 до 100
+        term_cache: Кеш результатов по терминам, общий для всех вакансий запроса
+        semantic_matches: Компетенции, найденные через CompetencyIndex
+
+    Returns:
+        VacancyScore: Процент соответствия и списки найденных/отсутствующих компетенций
+    """
+    terms = list(terms)
+    cache = {} if term_cache is None else term_cache
+
+    def term_found(term: str) -> bool:
+        if term not in cache:
+            match = process.extractOne(
+                term, terms, scorer=fuzz.ratio, score_cutoff=cutoff
+            )
+            cache[term] = match is not None
+        return cache[term]
+
+    matched, missing = [], []
+    penalty = 0
+    for competency in vacancy.competencies:
+        if competency.name in semantic_matches or any(
+            term_found(term) for term in competency.terms
+        ):
+            matched.append(competency.name)
+        else:
+            missing.append(competency.name)
+            penalty += competency.penalty
+    return VacancyScore(
+        vacancy=vacancy,
+        percentage=max(0, 100 - penalty),
+        matched=tuple(matched),
+        missing=tuple(missing),
+    )
+
+
+def prescore(
+    data: Dict,
+    catalog: CatalogSnapshot,
+    cutoff: float = FUZZY_MATCH_CUTOFF,
+    index: CompetencyIndex | None = None,
+) -> List[VacancyScore]:
+    """
+    Оценивает кандидата по всем вакансиям каталога без LLM.
+
+    Args:
+        data: Данные кандидата
+        catalog: Снимок каталога вакансий
+        cutoff: Порог нечеткого совпадения
+        index: Векторный индекс компетенций для семантического сопоставления
+
+    Returns:
+        List[VacancyScore]: Оценки, отсортированные по убыванию процента
+    """
+    terms = candidate_terms(data)
+    term_cache: Dict[str, bool] = {}
+    semantic_matches = (
+        index.matched_names(data.get("skills", []) + data.get("experience", []))
+        if index is not None
+        else frozenset()
+    )
+    scores = [
+        score_vacancy_locally(terms, vacancy, cutoff, term_cache, semantic_matches)
+        for vacancy in catalog.vacancies.values()
+    ]
+    scores.sort(key=lambda score: score.percentage, reverse=True)
+    for score in scores:
+        logging.debug(f"Prescore {score.vacancy.vacancy_id}: {score.percentage}%")
+    return scores
+
+
+def select_for_llm(
+    scores: List[VacancyScore],
+    top_k: int = PRESCORE_TOP_K,
+    min_percentage: int = PRESCORE_MIN_PERCENTAGE,
+) -> List[CompiledVacancy]:
+    """
+    Отбирает вакансии, которые стоит отправить в LLM за объяснением и рекомендациями.
+
+    Args:
+        scores: Оценки из prescore, отсортированные по убыванию
+        top_k: Сколько лучших вакансий оставить, 0 - без ограничения
+        min_percentage: Минимальный процент предварительной оценки
+
+    Returns:
+        List[CompiledVacancy]: Отобранные вакансии; если порог не прошла ни одна,
+        возвращается лучшая, чтобы кандидат всё равно получил ответ
+    """
+    selected = [score for score in scores if score.percentage >= min_percentage]
+    if top_k > 0:
+        selected = selected[:top_k]
+    if not selected and scores:
+        selected = scores[:1]
+    return [score.vacancy for score in selected]
@@ -1,16 +1,101 @@
-import os
-import tempfile
-from contextlib import suppress
-from typing import Annotated, Dict
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+import zipfile
+from contextlib import asynccontextmanager
+from typing import Annotated, AsyncIterator, Dict, List, Literal
 
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi import (
+    FastAPI,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+from . import utils
+from .batch import BatchLimits, expand_upload, match_batch
+from .cache import ResultCache, create_cache
+from .catalog import CatalogSnapshot, vacancy_catalog
+from .embeddings import invalidate_competency_index
+from .jobs import JobQueue, create_job_store
+from .llm_match import (
+    get_backend,
+    iter_vacancy_answers,
+    process_json_async,
+    rank_vacancies_async,
+    select_best,
+    warmup,
+)
+from .metrics import (
+    CACHE_REQUESTS,
+    CACHE_SIZE,
+    LLM_BREAKER_OPEN,
+    LLM_RETRIES,
+    QUEUE_DEPTH,
+    REQUEST_SECONDS,
+    registry,
+    replay_stages,
+    run_recorded,
+    stage_timer,
+)
+from .module_nlp import extract_brief, sniff_format
+from .resilience import BREAKER_OPEN, CircuitOpenError
+from .utils import (
+    ADMIN_TOKEN,
+    CATALOG_WATCH_INTERVAL,
+    JOB_QUEUE_SIZE,
+    JOB_RESULT_TTL,
+    JOB_WORKERS,
+    JOBS_BACKEND,
+    JOBS_PATH,
+    MAX_UPLOAD_BYTES,
+    MODEL_NAME,
+    MODEL_WARMUP,
+    PARSE_WARMUP,
+    RESULT_CACHE_BACKEND,
+    RESULT_CACHE_PATH,
+    RESULT_CACHE_SIZE,
+    RESULT_CACHE_TTL,
+    SCORING_MODE,
+)
+from .workers import parse_pool
+
+result_cache = create_cache(
+    RESULT_CACHE_BACKEND, RESULT_CACHE_PATH, RESULT_CACHE_SIZE, RESULT_CACHE_TTL
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Разбор резюме (pdfplumber, spaCy, YAKE) выполняется в пуле процессов,
+    # чтобы тяжелые вычисления не блокировали event loop uvicorn
+    parse_pool.start()
+    if PARSE_WARMUP:
+        await parse_pool.warmup()
+    # Импорт пакета не загружает модели: загружаем их здесь, до первого запроса
+    if MODEL_WARMUP:
+        await asyncio.to_thread(warmup, vacancy_catalog.snapshot())
+    job_queue.start()
+    watcher = None
+    if CATALOG_WATCH_INTERVAL > 0 and vacancy_catalog.path is not None:
+        watcher = asyncio.create_task(vacancy_catalog.watch(CATALOG_WATCH_INTERVAL))
+    yield
+    if watcher is not None:
+        watcher.cancel()
+    await job_queue.stop()
+    parse_pool.shutdown()
 
-from .llm_match import process_json
-from .module_nlp import extract_brief
-from .utils import vacancies
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # можно указать список доменов
@@ -20,47 +105,488 @@ app.add_middleware(
 )
 
 
-@app.post("/candidate_match")
-async def process_candidate(files: Annotated[UploadFile, File(...)]) -> Dict:
+@app.middleware("http")
+async def record_request_time(request: Request, call_next) -> Response:
     """
-    Принимает файл резюме в формате multipart/form-data,
-    сохраняет его во временную директорию, передает путь в extract_brief,
-    обрабатывает результат через process_json и возвращает его.
+    Записывает длительность запроса в candidate_request_seconds по шаблону пути.
+
+    Для потоковых ответов учитывается время до отправки заголовков.
     """
-    # 1) Сохраняем файл во временную папку
+    start = time.perf_counter()
+    status = 500
     try:
-        suffix = os.path.splitext(files.filename)[1]
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            temp_path = tmp.name
-            content = await files.read()
-            tmp.write(content)
-    except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"Не удалось сохранить файл: {e}"
-        ) from e
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            endpoint=getattr(route, "path", "unmatched"),
+            status=str(status),
+        )
+
+
+def brief_cache_key(digest: str) -> str:
+    """Ключ кеша для результата extract_brief по SHA-256 файла."""
+    return f"brief:{digest}"
+
+
+def match_cache_prefix(catalog_version: str) -> str:
+    """Общее начало ключей результатов сопоставления для одной версии каталога."""
+    return f"match:{catalog_version}:"
+
+
+def invalidate_catalog_caches(old: CatalogSnapshot, new: CatalogSnapshot) -> None:
+    """
+    Слушатель перезагрузки каталога: удаляет результаты и индекс старой версии.
+
+    Разобранные резюме и ответы модели по неизменившимся вакансиям остаются в кеше.
+    """
+    invalidate_competency_index(old)
+    if result_cache is not None:
+        removed = result_cache.delete_prefix(match_cache_prefix(old.version))
+        logging.info(f"Removed {removed} cached matches for catalog {old.version[:12]}")
+
+
+vacancy_catalog.add_listener(invalidate_catalog_caches)
+
+
+def match_cache_key(digest: str, catalog_version: str, variant: str = "") -> str:
+    """
+    Ключ кеша для результата process_json.
+
+    Включает модель и версию каталога вакансий, поэтому изменение вакансий
+    сбрасывает только этап сопоставления, а разбор резюме берется из кеша.
+    variant отличает режимы сопоставления с параметрами, например ранжирование.
+    """
+    key = f"{match_cache_prefix(catalog_version)}{MODEL_NAME}:{digest}"
+    return f"{key}:{variant}" if variant else key
+
+
+async def read_upload(upload: UploadFile) -> bytes:
+    """
+    Читает загруженный файл в память, не больше MAX_UPLOAD_BYTES.
+
+    Args:
+        upload: Загруженный файл
 
-    # 2) Извлекаем данные из резюме
+    Returns:
+        bytes: Содержимое файла
+
+    Raises:
+        HTTPException: 413, если файл больше MAX_UPLOAD_BYTES
+    """
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"Файл {upload.filename} больше {MAX_UPLOAD_BYTES} байт",
+    )
+    if upload.size is not None and upload.size > MAX_UPLOAD_BYTES:
+        raise too_large
+    content = await upload.read(MAX_UPLOAD_BYTES + 1)
+    if len(content) > MAX_UPLOAD_BYTES:
+        raise too_large
+    return content
+
+
+async def parse_upload(content: bytes) -> Dict | None:
+    """
+    Разбирает содержимое загруженного файла в пуле процессов без записи на диск.
+
+    Args:
+        content: Содержимое загруженного файла
+
+    Returns:
+        Dict | None: Результат extract_brief
+
+    Raises:
+        HTTPException: 415, если формат не PDF, DOCX или текст в UTF-8;
+            400, если файл не удалось разобрать
+    """
+    if sniff_format(content) is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Поддерживаются только PDF, DOCX и текстовые файлы в UTF-8",
+        )
+    QUEUE_DEPTH.inc(queue="parse")
     try:
-        resume_dict = extract_brief(temp_path)
+        with stage_timer("parse"):
+            resume_dict, stages = await parse_pool.run(
+                run_recorded, extract_brief, content
+            )
     except Exception as e:
-        # удаляем временный файл перед поднятием ошибки
-        os.unlink(temp_path)
         raise HTTPException(
             status_code=400, detail=f"Ошибка при обработке резюме: {e}"
         ) from e
+    finally:
+        QUEUE_DEPTH.inc(-1, queue="parse")
+    replay_stages(stages)
+    return resume_dict
+
+
+async def get_resume(content: bytes, digest: str) -> Dict | None:
+    """
+    Возвращает разобранное резюме из кеша или разбирает его в пуле процессов.
+
+    Args:
+        content: Содержимое загруженного файла
+        digest: SHA-256 содержимого
+
+    Returns:
+        Dict | None: Результат extract_brief
+    """
+    resume_dict = result_cache.get(brief_cache_key(digest)) if result_cache else None
+    if resume_dict is None:
+        resume_dict = await parse_upload(content)
+        if result_cache is not None and resume_dict is not None:
+            result_cache.set(brief_cache_key(digest), resume_dict)
+    return resume_dict
+
 
-    # 3) Удаляем временный файл
-    with suppress(OSError):
-        os.unlink(temp_path)
+def resume_summary(resume_dict: Dict) -> Dict:
+    """Краткие данные резюме для первого события потока /candidate_match/stream."""
+    return {
+        "full_name": resume_dict["base_info"].get("full_name", "").split("\n")[0],
+        "city": resume_dict["base_info"].get("city"),
+        "email": resume_dict["contacts"].get("email"),
+        "phone": resume_dict["contacts"].get("phone"),
+        "skills": resume_dict["skills"],
+        "experience": resume_dict["experience"],
+    }
 
-    # 4) Совмещаем с вакансией и возвращаем результат
+
+def sse_event(event: str, data: Dict | List) -> str:
+    """Форматирует событие Server-Sent Events с данными в JSON."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def match_content(
+    content: bytes,
+    mode: str = "best",
+    top_k: int = 0,
+    min_percentage: int = 0,
+    scoring: str = SCORING_MODE,
+) -> Dict:
+    """
+    Разбирает резюме и сопоставляет его с вакансиями, используя кеш результатов.
+
+    Args:
+        content: Содержимое файла резюме
+        mode: "best" - лучшая вакансия, "ranking" - список вакансий по убыванию процента
+        top_k: Сколько вакансий вернуть в режиме ranking, 0 - все
+        min_percentage: Минимальный процент вакансии в режиме ranking
+        scoring: Режим оценки в режиме best: "separate" или "combined"
+
+    Returns:
+        Dict: Результат process_json_async или rank_vacancies_async
+
+    Raises:
+        HTTPException: Если файл не удалось разобрать или сопоставить
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    catalog = vacancy_catalog.snapshot()
+    if mode == "ranking":
+        variant = f"ranking:{top_k}:{min_percentage}"
+    else:
+        variant = "" if scoring == "separate" else scoring
+    match_key = match_cache_key(digest, catalog.version, variant)
+    if result_cache is not None:
+        cached = result_cache.get(match_key)
+        if cached is not None:
+            logging.info(f"Match cache hit for {digest[:12]}")
+            return cached
+
+    resume_dict = await get_resume(content, digest)
+
+    # Совмещаем с вакансией и возвращаем результат
     try:
-        result = process_json(resume_dict, vacancies)
-        return result
+        with stage_timer("match"):
+            if mode == "ranking":
+                result = await rank_vacancies_async(
+                    resume_dict, catalog, top_k=top_k, min_percentage=min_percentage
+                )
+            else:
+                result = await process_json_async(resume_dict, catalog, scoring=scoring)
+    except ConnectionError as e:
+        retry_after = e.retry_after if isinstance(e, CircuitOpenError) else 30
+        raise HTTPException(
+            status_code=503,
+            detail=f"Модель недоступна: {e}",
+            headers={"Retry-After": str(max(1, round(retry_after)))},
+        ) from e
     except Exception as e:
         raise HTTPException(
             status_code=400, detail=f"Ошибка при обработке данных: {e}"
         ) from e
+    if result_cache is not None and "error" not in result:
+        result_cache.set(match_key, result)
+    return result
+
+
+async def run_job(content: bytes) -> Dict:
+    """Обработчик очереди задач: сопоставление с текстом ошибки вместо HTTPException."""
+    try:
+        return await match_content(content)
+    except HTTPException as e:
+        raise ValueError(e.detail) from e
+
+
+job_queue = JobQueue(
+    run_job,
+    create_job_store(JOBS_BACKEND, JOBS_PATH),
+    maxsize=JOB_QUEUE_SIZE,
+    workers=JOB_WORKERS,
+    ttl=JOB_RESULT_TTL,
+)
+
+
+@app.post("/candidate_match")
+async def process_candidate(
+    files: Annotated[UploadFile, File(...)],
+    mode: Literal["best", "ranking"] = "best",
+    top_k: Annotated[int, Query(ge=0)] = 0,
+    min_percentage: Annotated[int, Query(ge=0, le=100)] = 0,
+    scoring: Literal["separate", "combined"] = SCORING_MODE,
+) -> Dict:
+    """
+    Принимает файл резюме в формате multipart/form-data, передает его содержимое
+    в extract_brief, обрабатывает результат через process_json и возвращает его.
+    Формат файла определяется по содержимому, размер ограничен MAX_UPLOAD_BYTES.
+
+    С mode=ranking возвращаются все оцененные вакансии по убыванию процента
+    в поле "ranking" (не больше top_k и не ниже min_percentage); вакансии,
+    которые заведомо не попадают в top_k, в модель не отправляются.
+
+    С scoring=combined (только для mode=best) отобранные вакансии оцениваются
+    одним запросом к модели вместо отдельного запроса на каждую вакансию.
+
+    Разбор резюме выполняется в пуле процессов parse_pool, а запросы к модели -
+    через асинхронный клиент, поэтому параллельные загрузки не ждут друг друга.
+    Результаты разбора и сопоставления кешируются по SHA-256 содержимого файла.
+    """
+    if mode == "ranking" and scoring == "combined":
+        raise HTTPException(
+            status_code=422,
+            detail="scoring=combined поддерживается только для mode=best",
+        )
+    content = await read_upload(files)
+    return await match_content(content, mode, top_k, min_percentage, scoring)
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    files: Annotated[UploadFile, File(...)], response: Response
+) -> Dict:
+    """
+    Ставит резюме в очередь на сопоставление и сразу возвращает идентификатор задачи.
+
+    Результат запрашивается через GET /jobs/{job_id}. Если очередь заполнена,
+    возвращается 429 с заголовком Retry-After.
+    """
+    content = await read_upload(files)
+    if sniff_format(content) is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Поддерживаются только PDF, DOCX и текстовые файлы в UTF-8",
+        )
+    try:
+        job = job_queue.submit(content)
+    except asyncio.QueueFull:
+        raise HTTPException(
+            status_code=429,
+            detail="Очередь задач заполнена, повторите запрос позже",
+            headers={"Retry-After": "30"},
+        )
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return {"job_id": job.id, "status": job.status}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> Dict:
+    """
+    Возвращает статус задачи (queued, running, done или failed), а для
+    завершенной - результат в поле "result" или текст ошибки в поле "error".
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена или устарела")
+    return job.to_dict()
+
+
+@app.post("/candidate_match/stream")
+async def process_candidate_stream(
+    files: Annotated[UploadFile, File(...)]
+) -> StreamingResponse:
+    """
+    Принимает файл резюме и возвращает промежуточные результаты потоком
+    Server-Sent Events (text/event-stream):
+
+    - resume: краткие данные резюме, как только закончен разбор
+    - vacancy: оценка очередной вакансии по мере готовности
+    - final: лучшая вакансия в формате /candidate_match и все оценки
+      по убыванию процента в поле "ranking"
+    - error: ошибка сопоставления, после неё поток закрывается
+    """
+    content = await read_upload(files)
+    digest = hashlib.sha256(content).hexdigest()
+    catalog = vacancy_catalog.snapshot()
+    resume_dict = await get_resume(content, digest)
+    if resume_dict is None:
+        raise HTTPException(status_code=400, detail="Не удалось разобрать резюме")
+
+    async def stream() -> AsyncIterator[str]:
+        yield sse_event("resume", resume_summary(resume_dict))
+        answers: Dict[int, Dict] = {}
+        try:
+            async for position, answer in iter_vacancy_answers(resume_dict, catalog):
+                answers[position] = answer
+                yield sse_event("vacancy", answer)
+        except Exception as e:
+            logging.error(f"Streaming match failed for {digest[:12]}: {e}")
+            yield sse_event("error", {"error": str(e)})
+            return
+        ranking = sorted(
+            (dict(answer) for answer in answers.values()),
+            key=lambda answer: answer["percentage"],
+            reverse=True,
+        )
+        result = select_best(resume_dict, [answers[i] for i in sorted(answers)])
+        if result_cache is not None and "error" not in result:
+            result_cache.set(match_cache_key(digest, catalog.version), result)
+        yield sse_event("final", {**result, "ranking": ranking})
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/candidate_match/batch")
+async def process_candidates_batch(
+    files: Annotated[List[UploadFile], File(...)]
+) -> StreamingResponse:
+    """
+    Принимает несколько резюме (или zip-архивы с ними) и возвращает результаты
+    в формате JSON Lines по мере готовности: одна строка на файл.
+
+    Ошибка в отдельном файле возвращается в его строке в поле "error"
+    и не прерывает обработку остальных. Пакет ограничен BATCH_MAX_FILES резюме
+    и BATCH_MAX_BYTES байт после распаковки архивов, иначе ответ 413.
+    """
+    limits = BatchLimits()
+    if len(files) > limits.max_files:
+        raise HTTPException(
+            status_code=413, detail=f"В пакете больше {limits.max_files} файлов"
+        )
+    items = []
+    for upload in files:
+        content = await read_upload(upload)
+        try:
+            items.extend(expand_upload(upload.filename, content, limits))
+        except zipfile.BadZipFile as e:
+            raise HTTPException(
+                status_code=400, detail=f"Некорректный архив {upload.filename}: {e}"
+            ) from e
+        except ValueError as e:
+            raise HTTPException(status_code=413, detail=str(e)) from e
+
+    async def stream() -> AsyncIterator[str]:
+        async for result in match_batch(items, parse_pool.executor):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+def check_admin_token(token: str | None) -> None:
+    """
+    Проверяет токен администратора, если он задан в ADMIN_TOKEN.
+
+    Raises:
+        HTTPException: 401, если токен не совпадает
+    """
+    if ADMIN_TOKEN and not hmac.compare_digest(token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Неверный токен администратора")
+
+
+@app.get("/admin/catalog")
+async def catalog_info(x_admin_token: Annotated[str | None, Header()] = None) -> Dict:
+    """Возвращает версию каталога вакансий и их идентификаторы."""
+    check_admin_token(x_admin_token)
+    snapshot = vacancy_catalog.snapshot()
+    return {"version": snapshot.version, "vacancies": list(snapshot.vacancies)}
+
+
+@app.post("/admin/catalog/reload")
+async def reload_catalog(x_admin_token: Annotated[str | None, Header()] = None) -> Dict:
+    """
+    Перечитывает файл вакансий без перезапуска сервиса.
+
+    Новый каталог проверяется по схеме; при ошибке продолжает работать прежний
+    и возвращается 422. Кеши и индекс компетенций старой версии сбрасываются.
+    """
+    check_admin_token(x_admin_token)
+    try:
+        changed = await asyncio.to_thread(vacancy_catalog.reload)
+    except (OSError, ValueError) as e:
+        raise HTTPException(
+            status_code=422, detail=f"Каталог вакансий не загружен: {e}"
+        ) from e
+    return {
+        "version": vacancy_catalog.version,
+        "changed": changed,
+        "vacancies": len(vacancy_catalog),
+    }
+
+
+@app.get("/health")
+async def health() -> JSONResponse:
+    """
+    Проверяет доступность модели: 200 и "status": "ok", если сервер модели
+    отвечает и выключатель не разомкнут, иначе 503. В ответе также число
+    повторных попыток запросов к модели и состояние выключателя.
+    """
+    result = await asyncio.to_thread(get_backend().health)
+    if result["breaker"]["state"] == BREAKER_OPEN:
+        result["status"] = "unavailable"
+    status_code = 200 if result["status"] == "ok" else 503
+    return JSONResponse(result, status_code=status_code)
+
+
+def metric_caches() -> Dict[str, ResultCache]:
+    """Включенные кеши для /metrics: результаты сопоставления и ответы модели."""
+    caches = {"result": result_cache, "llm": utils.llm_cache}
+    return {name: cache for name, cache in caches.items() if cache is not None}
+
+
+def cache_requests() -> Dict:
+    """Попадания и промахи кешей для candidate_cache_requests_total."""
+    return {
+        (name, result): stats[key]
+        for name, stats in ((n, c.stats()) for n, c in metric_caches().items())
+        for result, key in (("hit", "hits"), ("miss", "misses"))
+    }
+
+
+CACHE_REQUESTS.set_function(cache_requests)
+CACHE_SIZE.set_function(
+    lambda: {(name,): cache.stats()["size"] for name, cache in metric_caches().items()}
+)
+LLM_RETRIES.set_function(lambda: get_backend().retried)
+LLM_BREAKER_OPEN.set_function(lambda: int(get_backend().breaker.state == BREAKER_OPEN))
+
+
+@app.get("/metrics")
+async def metrics() -> PlainTextResponse:
+    """
+    Метрики сервиса в текстовом формате Prometheus: длительности этапов
+    (candidate_stage_seconds), запросов к API и к модели по вакансиям, токены
+    и длительности генерации из ответов модели, кеши, очереди и выключатель.
+    """
+    QUEUE_DEPTH.set(job_queue.depth, queue="jobs")
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
 
 @app.get("/")
@@ -1,27 +1,278 @@
 """ Файл для вспомогательных функций и констант """
+import hashlib
 import json
 import logging
 import os
-from typing import Iterator
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, List, Tuple
 
-import ollama
-from ollama import ChatResponse
 from pydantic import BaseModel, Field
 
+from .cache import ResultCache, create_cache
+from .metrics import observe_llm_usage
+
+if TYPE_CHECKING:
+    import ollama
+    from ollama import ChatResponse
+
 SYSTEM_PROMPT = (
     "Ты – HR-менеджер, который отбирает людей на должность. По представленным навыкам тебе необходимо"
     "оценить, подходит ли кандидат на должность, и если подходит, то на какую."
 )
 
+# Инструкция по оценке, которая добавляется после компетенций каждой вакансии
+MATCH_INSTRUCTIONS = (
+    "Тебе необходимо оценить, насколько подходит кандидат на должность, и если не подходит,"
+    "то написать рекомендации по обучению. В начале ответа пиши название вакансии, затем подходит"
+    "или нет, и в конце рекомендации по обучению, если кандидат не подходит. Также укажи"
+    "процент соответствия вакансии, в json-формате. "
+    "Используй следующую логику вычитания процентов: \n"
+    + "- 2 процента за каждый отсутствующий навык уровня 'низкий'\n"
+    + "- 5 процентов за каждый отсутствующий навык уровня 'средний'\n"
+    + "- 10 процентов за каждый отсутствующий навык уровня 'высокий'\n"
+    + "- Если среди компетенций есть обширная сфера, а у кандидата есть более узкие навыки из этой сферы, "
+    "то вычитать не нужно. В "
+    "обосновании нужно писать, каких навыков не хватает, но не нужно указывать, что ты"
+    "вычитаешь. \n"
+)
+
+# Инструкция для оценки нескольких вакансий одним запросом (SCORING_MODE=combined)
+COMBINED_INSTRUCTIONS = (
+    "Оцени кандидата по каждой из вакансий ниже отдельно, по той же логике. Верни в поле "
+    "results по одному объекту на каждую вакансию: в поле number - номер из строки "
+    "«Номер вакансии:» перед ней, в поле vacancy - название вакансии точно так, как оно "
+    "написано после слова «Вакансия:».\n\n"
+)
+
+# Названия уровней компетенций и штраф в процентах за отсутствие навыка
+LEVEL_NAMES = {
+    1: "низкий",
+    2: "средний",
+    3: "высокий",
+}
+LEVEL_PENALTIES = {
+    1: 2,
+    2: 5,
+    3: 10,
+}
+
 VACANCIES_PATH = os.path.join("data", "vacancies.json")
 if os.path.exists(VACANCIES_PATH):
     with open(VACANCIES_PATH, "r", encoding="utf-8") as file:
         vacancies = json.load(file)
 else:
     vacancies = {}
+# Период проверки файла вакансий на изменения в секундах (0 - только через
+# POST /admin/catalog/reload) и токен для эндпоинтов /admin (пустой - без проверки)
+CATALOG_WATCH_INTERVAL = float(os.environ.get("CATALOG_WATCH_INTERVAL", "5"))
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
 
 API_URL = os.environ.get("OLLAMA_API_URL", "http://localhost:11434")
 MODEL_NAME = os.environ.get("OLLAMA_MODEL_NAME", "gemma3:4b")
+# Сколько вакансий оценивается параллельно и сколько секунд ждать один ответ модели
+LLM_CONCURRENCY = int(os.environ.get("OLLAMA_CONCURRENCY", "4"))
+LLM_TIMEOUT = float(os.environ.get("OLLAMA_TIMEOUT", "120"))
+# Бэкенд модели: ollama или openai (OpenAI-совместимый сервер: vLLM, llama.cpp server);
+# для openai адрес и ключ задаются OPENAI_BASE_URL и OPENAI_API_KEY, модель - OLLAMA_MODEL_NAME
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "ollama")
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL", "http://localhost:8000/v1")
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "EMPTY")
+# Пул соединений с моделью: максимум соединений, сколько держать открытыми (keep-alive)
+# и сколько секунд ждать установки соединения
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", "20"))
+LLM_KEEPALIVE_CONNECTIONS = int(os.environ.get("LLM_KEEPALIVE_CONNECTIONS", "10"))
+LLM_CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", "5"))
+# Повторные попытки при временных сбоях модели: число повторов, начальная и
+# максимальная пауза в секундах (пауза удваивается с каждой попыткой)
+LLM_RETRIES = int(os.environ.get("LLM_RETRIES", "2"))
+LLM_RETRY_BACKOFF = float(os.environ.get("LLM_RETRY_BACKOFF", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.environ.get("LLM_RETRY_MAX_DELAY", "8"))
+# Автоматический выключатель: после скольких сбоев подряд отклонять запросы к модели
+# (0 - не отклонять) и через сколько секунд пробовать снова; таймаут проверки /health
+LLM_BREAKER_THRESHOLD = int(os.environ.get("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_RESET = float(os.environ.get("LLM_BREAKER_RESET", "30"))
+LLM_HEALTH_TIMEOUT = float(os.environ.get("LLM_HEALTH_TIMEOUT", "5"))
+# Порядок частей промпта: shared - инструкция и сводка навыков кандидата в начале,
+# компетенции вакансии в конце, чтобы сервер модели переиспользовал KV-кеш общего
+# начала между вакансиями; legacy - вакансия, инструкция, затем кандидат целиком
+PROMPT_LAYOUT = os.environ.get("PROMPT_LAYOUT", "shared")
+# Сколько навыков и сколько пунктов опыта кандидата включать в промпт shared (0 - все)
+PROMPT_MAX_KEYWORDS = int(os.environ.get("PROMPT_MAX_KEYWORDS", "30"))
+# Размер контекста модели (num_ctx): 0 - подбирать по длине промпта степенью двойки
+# до LLM_MAX_CTX с запасом LLM_OUTPUT_TOKENS на ответ, иначе фиксированный
+LLM_NUM_CTX = int(os.environ.get("LLM_NUM_CTX", "0"))
+LLM_MAX_CTX = int(os.environ.get("LLM_MAX_CTX", "8192"))
+LLM_OUTPUT_TOKENS = int(os.environ.get("LLM_OUTPUT_TOKENS", "512"))
+# Оценка вакансий моделью: separate - отдельный запрос на каждую вакансию, combined -
+# кандидат и все отобранные вакансии в одном промпте (делится на части по LLM_MAX_CTX)
+SCORING_MODE = os.environ.get("SCORING_MODE", "separate")
+# Предварительная оценка без LLM: сколько лучших вакансий отправлять в модель
+# (0 - все), минимальный процент и порог нечеткого совпадения навыков
+PRESCORE_TOP_K = int(os.environ.get("PRESCORE_TOP_K", "3"))
+PRESCORE_MIN_PERCENTAGE = int(os.environ.get("PRESCORE_MIN_PERCENTAGE", "0"))
+FUZZY_MATCH_CUTOFF = float(os.environ.get("FUZZY_MATCH_CUTOFF", "85"))
+# Режим ранжирования: на сколько процентов модель может оценить вакансию выше
+# предварительной оценки; вакансии, которые даже с этим запасом не попадут
+# в top_k, в модель не отправляются
+RANKING_BOUND_MARGIN = int(os.environ.get("RANKING_BOUND_MARGIN", "10"))
+# Семантическое сопоставление навыков по векторам spaCy и путь к сохраненному индексу
+SEMANTIC_MATCHING = os.environ.get("SEMANTIC_MATCHING", "1") == "1"
+SEMANTIC_MATCH_THRESHOLD = float(os.environ.get("SEMANTIC_MATCH_THRESHOLD", "0.6"))
+COMPETENCY_INDEX_PATH = os.environ.get(
+    "COMPETENCY_INDEX_PATH", os.path.join("data", "competency_index.npy")
+)
+# Кеш результатов обработки резюме: "memory", "sqlite" или "none"
+RESULT_CACHE_BACKEND = os.environ.get("RESULT_CACHE_BACKEND", "memory")
+RESULT_CACHE_PATH = os.environ.get(
+    "RESULT_CACHE_PATH", os.path.join("data", "result_cache.sqlite3")
+)
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", "86400"))
+# Кеш ответов модели по хешу промпта: "memory", "sqlite" или "none"
+LLM_CACHE_BACKEND = os.environ.get("LLM_CACHE_BACKEND", "memory")
+LLM_CACHE_PATH = os.environ.get(
+    "LLM_CACHE_PATH", os.path.join("data", "llm_cache.sqlite3")
+)
+LLM_CACHE_SIZE = int(os.environ.get("LLM_CACHE_SIZE", "4096"))
+LLM_CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", "604800"))
+# Загружать spaCy только с компонентами для NER и сколько первых строк резюме
+# передавать в NER (если имя там не найдено, разбирается весь текст)
+SPACY_LEAN = os.environ.get("SPACY_LEAN", "1") == "1"
+NER_HEAD_LINES = int(os.environ.get("NER_HEAD_LINES", "15"))
+# Нормализовать ключевые слова (нижний регистр, без повторов), чтобы сократить промпты
+KEYWORD_NORMALIZE = os.environ.get("KEYWORD_NORMALIZE", "0") == "1"
+# Чтение PDF: библиотека (pdfplumber или pypdfium2), сколько страниц и символов
+# читать (0 - без ограничения), сколько процессов использовать для документов
+# от PDF_PARALLEL_MIN_PAGES страниц (0 - читать в текущем процессе) и прекращать
+# ли чтение, как только разделы навыков и опыта целиком прочитаны
+PDF_BACKEND = os.environ.get("PDF_BACKEND", "pdfplumber")
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", "30"))
+PDF_MAX_CHARS = int(os.environ.get("PDF_MAX_CHARS", "200000"))
+PDF_PAGE_WORKERS = int(os.environ.get("PDF_PAGE_WORKERS", "0"))
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", "8"))
+PDF_EARLY_EXIT = os.environ.get("PDF_EARLY_EXIT", "0") == "1"
+# Пул процессов для разбора резюме: число процессов, через сколько задач
+# перезапускать процесс (0 - никогда) и метод запуска процессов
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", os.cpu_count() or 1))
+PARSE_MAX_TASKS_PER_CHILD = (
+    int(os.environ.get("PARSE_MAX_TASKS_PER_CHILD", "0")) or None
+)
+PARSE_START_METHOD = os.environ.get(
+    "PARSE_START_METHOD", "forkserver" if os.name == "posix" else "spawn"
+)
+# Запускать и прогревать все процессы пула при старте сервера
+PARSE_WARMUP = os.environ.get("PARSE_WARMUP", "1") == "1"
+# Загружать модель spaCy, индекс компетенций и клиент модели при старте сервера,
+# а не при первом запросе (импорт пакета их не загружает)
+MODEL_WARMUP = os.environ.get("MODEL_WARMUP", "1") == "1"
+# Максимальный размер загружаемого файла (и файла внутри zip-архива) в байтах
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+# Очередь задач /jobs: сколько задач выполняется одновременно, сколько может
+# ждать в очереди (сверх - ответ 429), сколько секунд хранить результат
+# и где хранить состояние задач (memory или sqlite)
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", "100"))
+JOB_RESULT_TTL = float(os.environ.get("JOB_RESULT_TTL", "3600"))
+JOBS_BACKEND = os.environ.get("JOBS_BACKEND", "memory")
+JOBS_PATH = os.environ.get("JOBS_PATH", os.path.join("data", "jobs.sqlite3"))
+# Сколько резюме пакета одновременно сопоставляется с вакансиями
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "2"))
+# Сколько резюме пакета разбирается одной задачей пула (NER через nlp.pipe)
+BATCH_PARSE_CHUNK = int(os.environ.get("BATCH_PARSE_CHUNK", "4"))
+# Сколько резюме и сколько байт резюме (после распаковки zip) принимает один пакет
+BATCH_MAX_FILES = int(os.environ.get("BATCH_MAX_FILES", "200"))
+BATCH_MAX_BYTES = int(os.environ.get("BATCH_MAX_BYTES", str(200 * 1024 * 1024)))
+
+llm_cache: ResultCache | None = create_cache(
+    LLM_CACHE_BACKEND, LLM_CACHE_PATH, LLM_CACHE_SIZE, LLM_CACHE_TTL
+)
+
+
+def set_llm_cache(cache: ResultCache | None) -> None:
+    """
+    Заменяет кеш ответов модели, который используют ollama_chat и ollama_chat_async.
+
+    Args:
+        cache: Новый кеш (MemoryCache, SQLiteCache) или None, чтобы отключить кеширование
+    """
+    global llm_cache
+    llm_cache = cache
+
+
+def chat_cache_key(
+    model_name: str,
+    prompt: str,
+    system: str | None,
+    schema: dict | None,
+    temperature: float,
+) -> str:
+    """
+    Вычисляет ключ кеша ответа модели.
+
+    Args:
+        model_name: Название модели
+        prompt: Основной промпт
+        system: Системный промпт
+        schema: JSON-схема ответа
+        temperature: Температура генерации
+
+    Returns:
+        str: SHA-256 от параметров запроса
+    """
+    payload = json.dumps(
+        [model_name, system, prompt, schema, temperature],
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return "chat:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def lookup_response(
+    model_name: str,
+    prompt: str,
+    system: str | None,
+    schema: dict | None,
+    temperature: float,
+) -> Tuple[str | None, str | None]:
+    """
+    Ищет ответ модели в llm_cache.
+
+    Args:
+        model_name: Название модели (с префиксом бэкенда, если он не Ollama)
+        prompt: Основной промпт
+        system: Системный промпт
+        schema: JSON-схема ответа
+        temperature: Температура генерации
+
+    Returns:
+        Tuple[str | None, str | None]: Ключ для cache_response (None, если кеш
+        отключен) и ответ из кеша (None, если его нет)
+    """
+    if llm_cache is None:
+        return None, None
+    key = chat_cache_key(model_name, prompt, system, schema, temperature)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        logging.debug("LLM cache hit")
+    return key, cached
+
+
+def cache_response(key: str, content: str, schema: dict | None) -> None:
+    """
+    Сохраняет ответ модели в кеш, пропуская ответы, не являющиеся JSON при заданной схеме.
+
+    Args:
+        key: Ключ из chat_cache_key
+        content: Содержимое ответа модели
+        schema: JSON-схема ответа, если она была задана
+    """
+    if llm_cache is None:
+        return
+    if schema is not None:
+        try:
+            json.loads(content)
+        except json.decoder.JSONDecodeError:
+            return
+    llm_cache.set(key, content)
 
 
 class VacancySchema(BaseModel):
@@ -38,8 +289,36 @@ class VacancySchema(BaseModel):
     recommendations: str = Field(..., description="Рекомендации по улучшению навыков")
 
 
-def ollama_chat(
-    client: ollama.Client,
+class NumberedVacancySchema(BaseModel):
+    """
+    Pydantic-схема оценки одной вакансии в ответе MultiVacancySchema.:
+    title: NumberedVacancySchema
+
+    Номер стоит первым, чтобы модель сначала указала, какую вакансию оценивает;
+    по номеру оценка сопоставляется с вакансией даже при одинаковых названиях.
+    """
+
+    number: int = Field(..., description="Номер вакансии из промпта")
+    vacancy: str = Field(..., description="Название вакансии")
+    percentage: int = Field(
+        ..., description="Процент соответствия кандидата вакансии от 0 до 100"
+    )
+    explaining: str = Field(..., description="Описание соответствия кандидата вакансии")
+    recommendations: str = Field(..., description="Рекомендации по улучшению навыков")
+
+
+class MultiVacancySchema(BaseModel):
+    """
+    Pydantic-схема ответа модели с оценками сразу по нескольким вакансиям.:
+    title: MultiVacancySchema
+    """
+
+    results: List[NumberedVacancySchema] = Field(
+        ..., description="Оценки кандидата, по одной на каждую вакансию из промпта"
+    )
+
+
+def build_chat_params(
     model_name: str,
     prompt: str,
     system: str | None = None,
@@ -47,13 +326,11 @@ def ollama_chat(
     max_tokens: int = 4096,
     temperature: float = 0.4,
     stream: bool = False,
-) -> str | Iterator[ChatResponse]:
+) -> dict:
     """
-    Функция-оболочка для отправки Ollama запроса в виде чата, с системным промптом
-    и форматированием в формате JSON-схемы.
+    Собирает параметры запроса к Ollama chat API.
 
     Args:
-        client (ollama.Client): Клиент ollama.
         model_name (str): название модели в Ollama.
         prompt (str): Основный промпт.
         system (str | None): Системный промпт
@@ -63,12 +340,16 @@ def ollama_chat(
         stream (bool): Следует ли возвращать итератор, который выдает потоковые ответы.
 
     Returns:
-        str: Содержимое ответа модели (или строка JSON, если указана схема).
+        dict: Именованные аргументы для client.chat
     """
     params: dict = {
         "model": model_name,
         "messages": [],
         "stream": stream,
+        "options": {
+            "num_ctx": max_tokens,
+            "temperature": temperature,
+        },
     }
 
     if system is not None:
@@ -77,19 +358,135 @@ def ollama_chat(
 
     if schema is not None:
         params["format"] = schema
+    return params
+
+
+def record_usage(model_name: str, response: "ChatResponse") -> None:
+    """
+    Записывает в метрики число токенов и длительности из ответа Ollama.
+
+    Args:
+        model_name: Название модели
+        response: Ответ client.chat без потоковой передачи
+    """
+    observe_llm_usage(
+        model_name,
+        prompt_tokens=response.prompt_eval_count,
+        completion_tokens=response.eval_count,
+        durations={
+            "load": response.load_duration,
+            "prompt_eval": response.prompt_eval_duration,
+            "eval": response.eval_duration,
+        },
+    )
+
+
+def ollama_chat(
+    client: "ollama.Client",
+    model_name: str,
+    prompt: str,
+    system: str | None = None,
+    schema: dict | None = None,
+    max_tokens: int = 4096,
+    temperature: float = 0.4,
+    stream: bool = False,
+) -> str | Iterator["ChatResponse"]:
+    """
+    Функция-оболочка для отправки Ollama запроса в виде чата, с системным промптом
+    и форматированием в формате JSON-схемы.
+
+    Args:
+        client (ollama.Client): Клиент ollama.
+        model_name (str): название модели в Ollama.
+        prompt (str): Основный промпт.
+        system (str | None): Системный промпт
+        schema (dict | None): Опциональная Json-схема для форматирования ответа.
+        max_tokens (int): Максимальное количество токенов
+        temperature (float): Температура для генерации текста.
+        stream (bool): Следует ли возвращать итератор, который выдает потоковые ответы.
+
+    Returns:
+        str: Содержимое ответа модели (или строка JSON, если указана схема).
+
+    Notes:
+        Ответы без потоковой передачи кешируются в llm_cache по хешу модели,
+        промптов, схемы и температуры, поэтому повторный запрос не доходит до Ollama.
+    """
+    key = None
+    if not stream:
+        key, cached = lookup_response(model_name, prompt, system, schema, temperature)
+        if cached is not None:
+            return cached
+    params = build_chat_params(
+        model_name, prompt, system, schema, max_tokens, temperature, stream
+    )
+
+    try:
+        response = client.chat(**params)
+        logging.debug(f"response: {response}")
+
+        if not stream:
+            record_usage(model_name, response)
+            content = response["message"]["content"]
+            if key is not None:
+                cache_response(key, content, schema)
+            return content
+
+        return response
+    except Exception as e:
+        logging.error(f"Error calling Ollama API: {e}")
+        raise
+
+
+async def ollama_chat_async(
+    client: "ollama.AsyncClient",
+    model_name: str,
+    prompt: str,
+    system: str | None = None,
+    schema: dict | None = None,
+    max_tokens: int = 4096,
+    temperature: float = 0.4,
+    stream: bool = False,
+) -> str | AsyncIterator["ChatResponse"]:
+    """
+    Асинхронный вариант ollama_chat для использования внутри event loop.
+
+    Args:
+        client (ollama.AsyncClient): Асинхронный клиент ollama.
+        model_name (str): название модели в Ollama.
+        prompt (str): Основный промпт.
+        system (str | None): Системный промпт
+        schema (dict | None): Опциональная Json-схема для форматирования ответа.
+        max_tokens (int): Максимальное количество токенов
+        temperature (float): Температура для генерации текста.
+        stream (bool): Следует ли возвращать асинхронный итератор потоковых ответов.
+
+    Returns:
+        str: Содержимое ответа модели (или строка JSON, если указана схема).
+
+    Notes:
+        Ответы без потоковой передачи кешируются в llm_cache по хешу модели,
+        промптов, схемы и температуры, поэтому повторный запрос не доходит до Ollama.
+    """
+    key = None
+    if not stream:
+        key, cached = lookup_response(model_name, prompt, system, schema, temperature)
+        if cached is not None:
+            return cached
+    params = build_chat_params(
+        model_name, prompt, system, schema, max_tokens, temperature, stream
+    )
 
     try:
-        response = client.chat(
-            **params,
-            options={
-                "num_ctx": max_tokens,
-                "temperature": temperature,
-            },
-        )
+        response = await client.chat(**params)
         logging.debug(f"response: {response}")
 
         if not stream:
-            return response["message"]["content"]
+            record_usage(model_name, response)
+            content = response["message"]["content"]
+            if key is not None:
+                cache_response(key, content, schema)
+            return content
 
         return response
     except Exception as e:
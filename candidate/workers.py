@@ -0,0 +1,129 @@
+"""Файл с пулом процессов для разбора резюме с заранее загруженной моделью spaCy."""
+import asyncio
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List
+
+from .utils import PARSE_MAX_TASKS_PER_CHILD, PARSE_START_METHOD, PARSE_WORKERS
+
+# Модули, которые сервер forkserver импортирует один раз; рабочие процессы
+# порождаются от него копированием и получают загруженную модель spaCy без повторной загрузки.
+# Импорт module_nlp модель не загружает, её загружает импорт candidate.preload
+PRELOAD_MODULES = ["candidate.preload"]
+
+
+def _init_worker() -> None:
+    """Инициализирует рабочий процесс: загружает модель spaCy, если её еще нет."""
+    from .module_nlp import get_nlp
+
+    logging.debug(
+        f"Parsing worker {os.getpid()} ready, pipeline: {get_nlp().pipe_names}"
+    )
+
+
+def _warmup_task() -> int:
+    """Прогоняет модель на коротком тексте, чтобы первый запрос не платил за инициализацию."""
+    from .module_nlp import get_nlp
+
+    get_nlp()("Иван Иванов, Москва. Навыки: Python.")
+    return os.getpid()
+
+
+class ParsingPool:
+    """
+    Пул процессов для CPU-bound разбора резюме (pdfplumber, spaCy, YAKE).
+
+    Каждый процесс загружает модель один раз: при методе запуска forkserver
+    модель загружается в сервере forkserver, и процессы копируют её при создании.
+    """
+
+    def __init__(
+        self,
+        workers: int = PARSE_WORKERS,
+        max_tasks_per_child: int | None = PARSE_MAX_TASKS_PER_CHILD,
+        start_method: str = PARSE_START_METHOD,
+    ):
+        """
+        Args:
+            workers: Число рабочих процессов
+            max_tasks_per_child: Через сколько задач перезапускать процесс
+                (ограничивает рост памяти), None - не перезапускать; работает
+                начиная с Python 3.11
+            start_method: Метод запуска процессов: forkserver, spawn или fork
+        """
+        self.workers = max(1, workers)
+        self.max_tasks_per_child = max_tasks_per_child
+        self.start_method = start_method
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Пул процессов; создается при первом обращении."""
+        if self._executor is None:
+            self.start()
+        return self._executor
+
+    def start(self) -> None:
+        """Создает пул процессов."""
+        if self._executor is not None:
+            return
+        context = multiprocessing.get_context(self.start_method)
+        if self.start_method == "forkserver":
+            context.set_forkserver_preload(PRELOAD_MODULES)
+        options = {}
+        if self.max_tasks_per_child is not None:
+            # Параметр max_tasks_per_child появился в Python 3.11
+            if sys.version_info >= (3, 11):
+                options["max_tasks_per_child"] = self.max_tasks_per_child
+            else:
+                logging.warning(
+                    "PARSE_MAX_TASKS_PER_CHILD requires Python 3.11+, ignored"
+                )
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            **options,
+        )
+        logging.info(
+            f"Parsing pool started: {self.workers} workers, method {self.start_method}"
+        )
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """
+        Выполняет функцию в пуле, не блокируя event loop.
+
+        Args:
+            fn: Функция уровня модуля (должна сериализоваться pickle)
+            *args: Аргументы функции
+
+        Returns:
+            Any: Результат функции
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    async def warmup(self) -> List[int]:
+        """
+        Запускает все процессы пула и прогревает в них модель.
+
+        Returns:
+            List[int]: PID процессов, выполнивших прогрев
+        """
+        pids = await asyncio.gather(
+            *(self.run(_warmup_task) for _ in range(self.workers))
+        )
+        logging.info(f"Parsing pool warmed up: {len(set(pids))} processes")
+        return list(pids)
+
+    def shutdown(self) -> None:
+        """Останавливает пул, отменяя задачи в очереди."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+parse_pool = ParsingPool()
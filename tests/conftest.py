@@ -0,0 +1,42 @@
+"""Общие настройки тестов.
+
+Переменные окружения задаются до импорта candidate: тесты не используют
+кеши, семантическое сопоставление и прогрев модели и пула разбора,
+поэтому candidate импортируется только внутри фикстур.
+"""
+import os
+
+import pytest
+
+os.environ.setdefault("RESULT_CACHE_BACKEND", "none")
+os.environ.setdefault("LLM_CACHE_BACKEND", "none")
+os.environ.setdefault("SEMANTIC_MATCHING", "0")
+os.environ.setdefault("MODEL_WARMUP", "0")
+os.environ.setdefault("PARSE_WARMUP", "0")
+
+
+@pytest.fixture
+def stub(request):
+    """
+    Заглушка модели benchmarks.stub_llm на свободном порту, подключенная к
+    llm_match как бэкенд Ollama.
+
+    Параметры задаются через indirect-параметризацию словарем: latency - задержка
+    ответа заглушки, concurrency - сколько запросов пакета бэкенд отправляет
+    одновременно.
+    """
+    from benchmarks.stub_llm import StubLLMServer
+    from candidate import llm_match
+    from candidate.backends import OllamaBackend, ResilientBackend
+    from candidate.utils import LLM_CONCURRENCY
+
+    params = getattr(request, "param", {})
+    stub = StubLLMServer(port=0, latency=params.get("latency", 0)).start()
+    backend = OllamaBackend(
+        host=stub.url, concurrency=params.get("concurrency", LLM_CONCURRENCY)
+    )
+    llm_match.set_backend(ResilientBackend(backend))
+    yield stub
+    llm_match.set_backend(None)
+    stub.shutdown()
+    stub.server_close()
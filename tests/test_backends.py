@@ -0,0 +1,112 @@
+"""Бэкенды Ollama и OpenAI-совместимого API против заглушки benchmarks.stub_llm."""
+import asyncio
+import json
+
+import pytest
+
+from candidate import utils
+from candidate.backends import LLMBackend, OllamaBackend, OpenAICompatibleBackend
+from candidate.utils import VacancySchema
+
+SCHEMA = VacancySchema.model_json_schema()
+PROMPT = "Кандидат: Python, SQL\nВакансия: Python-разработчик"
+
+
+@pytest.fixture(autouse=True)
+def no_llm_cache():
+    cache = utils.llm_cache
+    utils.set_llm_cache(None)
+    yield
+    utils.set_llm_cache(cache)
+
+
+def create(name: str, url: str, timeout: float = 5) -> LLMBackend:
+    if name == "ollama":
+        return OllamaBackend(host=url, model_name="stub", timeout=timeout)
+    return OpenAICompatibleBackend(
+        base_url=f"{url}/v1", model_name="stub", timeout=timeout
+    )
+
+
+def sent_schema(request: dict) -> dict:
+    """Схема ответа из тела запроса: format у Ollama, response_format у OpenAI."""
+    if "format" in request:
+        return request["format"]
+    return request["response_format"]["json_schema"]["schema"]
+
+
+BACKENDS = ["ollama", "openai"]
+
+
+@pytest.mark.parametrize("name", BACKENDS)
+def test_chat(stub, name):
+    backend = create(name, stub.url)
+
+    answer = VacancySchema.model_validate_json(
+        backend.chat(PROMPT, system="Оцени кандидата", schema=SCHEMA)
+    )
+
+    assert answer.vacancy == "Python-разработчик"
+    assert stub.last_request["model"] == "stub"
+    assert stub.last_request["messages"] == [
+        {"role": "system", "content": "Оцени кандидата"},
+        {"role": "user", "content": PROMPT},
+    ]
+
+
+@pytest.mark.parametrize("name", BACKENDS)
+def test_chat_async(stub, name):
+    backend = create(name, stub.url)
+
+    async def chat_twice() -> list:
+        return await asyncio.gather(
+            backend.chat_async(PROMPT, schema=SCHEMA),
+            backend.chat_async(PROMPT.replace("Python", "Java"), schema=SCHEMA),
+        )
+
+    answers = [
+        VacancySchema.model_validate_json(content)
+        for content in asyncio.run(chat_twice())
+    ]
+
+    assert [answer.vacancy for answer in answers] == [
+        "Python-разработчик",
+        "Java-разработчик",
+    ]
+    assert stub.requests == 2
+
+
+@pytest.mark.parametrize("name", BACKENDS)
+def test_schema_is_passed_through(stub, name):
+    backend = create(name, stub.url)
+
+    backend.chat(PROMPT, schema=SCHEMA)
+    assert sent_schema(stub.last_request) == json.loads(json.dumps(SCHEMA))
+
+    backend.chat(PROMPT)
+    assert not stub.last_request.get("format")
+    assert "response_format" not in stub.last_request
+
+
+def test_ollama_context_size(stub):
+    OllamaBackend(host=stub.url, model_name="stub").chat(PROMPT, max_tokens=2048)
+
+    assert stub.last_request["options"]["num_ctx"] == 2048
+
+
+@pytest.mark.parametrize("name", BACKENDS)
+def test_timeout_is_mapped_to_timeout_error(stub, name):
+    stub.latency = 0.5
+    backend = create(name, stub.url, timeout=0.1)
+
+    with pytest.raises(TimeoutError):
+        backend.chat(PROMPT, schema=SCHEMA)
+    with pytest.raises(TimeoutError):
+        asyncio.run(backend.chat_async(PROMPT, schema=SCHEMA))
+    # Таймаут считается временным сбоем, который ResilientBackend повторяет
+    assert backend.is_transient(TimeoutError())
+
+
+@pytest.mark.parametrize("name", BACKENDS)
+def test_ping(stub, name):
+    create(name, stub.url).ping()
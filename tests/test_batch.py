@@ -0,0 +1,77 @@
+"""Пакетная обработка: ограничения пакета и отмена при отключении клиента."""
+import asyncio
+import io
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from candidate import batch
+from candidate.batch import BatchLimits, expand_upload, match_batch
+
+
+def make_zip(members: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def test_zip_members_count_towards_limits():
+    archive = make_zip({f"resume{i}.txt": b"x" * 10 for i in range(3)})
+    limits = BatchLimits(max_files=5, max_bytes=100)
+
+    items = list(expand_upload("resumes.zip", archive, limits))
+
+    assert [name for name, _ in items] == [
+        f"resumes.zip/resume{i}.txt" for i in range(3)
+    ]
+    assert (limits.files, limits.bytes) == (3, 30)
+    with pytest.raises(ValueError, match="файлов"):
+        list(expand_upload("more.zip", archive, limits))
+
+
+def test_zip_bomb_is_rejected_before_decompression():
+    # 10 МБ нулей сжимаются в несколько килобайт
+    archive = make_zip({"bomb.txt": bytes(10 * 1024 * 1024)})
+    assert len(archive) < 100 * 1024
+    limits = BatchLimits(max_bytes=1024 * 1024)
+
+    with pytest.raises(ValueError, match="размер пакета"):
+        next(expand_upload("bomb.zip", archive, limits))
+    assert limits.bytes == 10 * 1024 * 1024
+
+
+def test_closing_stream_cancels_started_items(monkeypatch):
+    cancelled = []
+
+    def parse_documents(items):
+        return [{"name": name} for name, _ in items]
+
+    async def process_json_async(resume, catalog):
+        if resume["name"] == "fast.txt":
+            return {"vacancy": "Вакансия"}
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(resume["name"])
+            raise
+
+    monkeypatch.setattr(batch, "parse_documents", parse_documents)
+    monkeypatch.setattr(batch, "process_json_async", process_json_async)
+
+    async def consume_first() -> None:
+        # Файлов больше, чем мест in_flight, поэтому чтение пакета не завершено
+        items = [("slow.txt", b""), ("fast.txt", b"")]
+        items += [(f"more{i}.txt", b"") for i in range(100)]
+        with ThreadPoolExecutor(2) as executor:
+            stream = match_batch(items, executor, concurrency=2, chunk_size=1)
+            assert await anext(stream) == {"file": "fast.txt", "vacancy": "Вакансия"}
+            await stream.aclose()
+            for _ in range(10):
+                await asyncio.sleep(0)
+        # Проверяем до выхода из asyncio.run, который сам отменяет оставшиеся задачи
+        assert "slow.txt" in cancelled
+
+    asyncio.run(consume_first())
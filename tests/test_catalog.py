@@ -0,0 +1,39 @@
+"""Перезагрузка каталога вакансий."""
+import json
+
+from candidate.catalog import VacancyCatalog
+
+COMPETENCIES = {"Навыки": [{"название": "Python", "уровень": 2}]}
+
+
+def write_catalog(path, title: str) -> None:
+    raw = {"developer": {"название": title, "компетенции": COMPETENCIES}}
+    path.write_text(json.dumps(raw, ensure_ascii=False), encoding="utf-8")
+
+
+def test_listeners_get_snapshot_of_their_reload(tmp_path):
+    path = tmp_path / "vacancies.json"
+    write_catalog(path, "Разработчик")
+    catalog = VacancyCatalog.from_file(str(path))
+    calls = []
+
+    def reload_again(old, new):
+        # Вторая перезагрузка успевает подменить снимок до следующего слушателя
+        if new.raw["developer"]["название"] == "Python-разработчик":
+            write_catalog(path, "Go-разработчик")
+            catalog.reload()
+
+    catalog.add_listener(reload_again)
+    catalog.add_listener(
+        lambda old, new: calls.append(
+            (old.raw["developer"]["название"], new.raw["developer"]["название"])
+        )
+    )
+    write_catalog(path, "Python-разработчик")
+    assert catalog.reload()
+
+    assert calls == [
+        ("Python-разработчик", "Go-разработчик"),
+        ("Разработчик", "Python-разработчик"),
+    ]
+    assert catalog.raw["developer"]["название"] == "Go-разработчик"
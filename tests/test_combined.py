@@ -0,0 +1,100 @@
+"""Оценка нескольких вакансий одним запросом (scoring=combined)."""
+import asyncio
+import json
+
+import pytest
+
+from candidate import llm_match
+from candidate.catalog import compile_catalog
+from candidate.llm_match import build_combined_prompt, combined_answers
+
+COMPETENCIES = {"Навыки": [{"название": "Python", "уровень": 2}]}
+# Две вакансии с одинаковым названием и третья с другим
+CATALOG = {
+    "backend_team_a": {"название": "Python-разработчик", "компетенции": COMPETENCIES},
+    "backend_team_b": {"название": "Python-разработчик", "компетенции": COMPETENCIES},
+    "analyst": {"название": "Аналитик", "компетенции": COMPETENCIES},
+}
+CANDIDATE = {
+    "base_info": {"full_name": "Иван Иванов", "city": "Москва"},
+    "contacts": {"email": "ivan@example.com", "phone": "+7 900 000-00-00"},
+    "skills": ["Python", "SQL"],
+    "experience": ["Разработка сервисов на Python"],
+}
+
+
+def answer(number: int, vacancy: str, percentage: int) -> dict:
+    return {
+        "number": number,
+        "vacancy": vacancy,
+        "percentage": percentage,
+        "explaining": "",
+        "recommendations": "",
+    }
+
+
+@pytest.fixture
+def chunk():
+    return list(compile_catalog(CATALOG).vacancies.values())
+
+
+def test_prompt_numbers_vacancies(chunk):
+    prompt = build_combined_prompt("Кандидат\n", chunk)
+
+    assert "Номер вакансии: 1\nВакансия: Python-разработчик" in prompt
+    assert "Номер вакансии: 2\nВакансия: Python-разработчик" in prompt
+    assert "Номер вакансии: 3\nВакансия: Аналитик" in prompt
+
+
+def test_answers_are_matched_by_number(chunk):
+    response = json.dumps(
+        {
+            "results": [
+                answer(2, "Python-разработчик", 70),
+                answer(1, "Python-разработчик", 50),
+                answer(3, "Аналитик", 30),
+            ]
+        }
+    )
+
+    answers, missing = combined_answers([chunk], [response])
+
+    assert missing == []
+    assert answers["backend_team_a"]["percentage"] == 50
+    assert answers["backend_team_b"]["percentage"] == 70
+    assert answers["analyst"] == {
+        "vacancy": "Аналитик",
+        "percentage": 30,
+        "explaining": "",
+        "recommendations": "",
+    }
+
+
+def test_unknown_and_repeated_numbers_leave_vacancies_missing(chunk):
+    response = json.dumps(
+        {
+            "results": [
+                answer(1, "Python-разработчик", 50),
+                answer(1, "Python-разработчик", 90),
+                answer(7, "Аналитик", 30),
+            ]
+        }
+    )
+
+    answers, missing = combined_answers([chunk], [response])
+
+    assert answers["backend_team_a"]["percentage"] == 50
+    assert [vacancy.vacancy_id for vacancy in missing] == ["backend_team_b", "analyst"]
+
+
+def test_duplicate_titles_are_scored_in_one_request(stub):
+    catalog = compile_catalog(CATALOG)
+
+    result = llm_match.process_json(CANDIDATE, catalog, top_k=3, scoring="combined")
+    result_async = asyncio.run(
+        llm_match.process_json_async(CANDIDATE, catalog, top_k=3, scoring="combined")
+    )
+
+    assert result["vacancy"] in {"Python-разработчик", "Аналитик"}
+    assert result_async == result
+    assert stub.requests == 2
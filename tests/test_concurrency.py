@@ -0,0 +1,72 @@
+"""Параллельные запросы /candidate_match не ждут друг друга."""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from candidate import llm_match, server
+from candidate.utils import PRESCORE_TOP_K
+
+DELAY = 0.3
+REQUESTS = 6
+RESUME = {
+    "base_info": {"full_name": "Иван Иванов", "city": "Москва"},
+    "contacts": {"email": "ivan@example.com", "phone": "+7 900 000-00-00"},
+    "skills": ["Python", "SQL", "Docker", "FastAPI"],
+    "experience": ["Разработка сервисов на Python", "Проектирование баз данных"],
+}
+
+
+@pytest.fixture
+def slow_parsing(monkeypatch):
+    """Разбор и предварительная оценка занимают DELAY секунд и блокируют поток."""
+
+    async def run(function, *args):
+        await asyncio.to_thread(time.sleep, DELAY)
+        return dict(RESUME), []
+
+    shortlist = llm_match.shortlist
+
+    def slow_shortlist(*args, **kwargs):
+        time.sleep(DELAY)
+        return shortlist(*args, **kwargs)
+
+    monkeypatch.setattr(server.parse_pool, "run", run)
+    monkeypatch.setattr(llm_match, "shortlist", slow_shortlist)
+
+
+async def upload(client: httpx.AsyncClient, index: int) -> httpx.Response:
+    content = f"Резюме номер {index}".encode("utf-8")
+    return await client.post(
+        "/candidate_match", files={"files": (f"resume{index}.txt", content)}
+    )
+
+
+async def match_in_parallel() -> tuple[list[httpx.Response], float]:
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *(upload(client, index) for index in range(REQUESTS))
+        )
+        return responses, time.perf_counter() - start
+
+
+# Ограничение LLM_CONCURRENCY общее для всех вакансий запроса, поэтому его снимаем
+@pytest.mark.parametrize(
+    "stub",
+    [{"latency": DELAY, "concurrency": REQUESTS * PRESCORE_TOP_K}],
+    indirect=True,
+)
+def test_parallel_requests_are_not_serialized(stub, slow_parsing):
+    responses, elapsed = asyncio.run(match_in_parallel())
+
+    for response in responses:
+        assert response.status_code == 200, response.text
+        assert response.json()["vacancy"]
+    # Один запрос - разбор, предварительная оценка и ответ модели, около 3 * DELAY;
+    # если предварительная оценка блокирует event loop, только она займет
+    # REQUESTS * DELAY
+    assert elapsed < REQUESTS * DELAY
+    assert stub.requests >= REQUESTS
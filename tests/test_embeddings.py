@@ -0,0 +1,52 @@
+"""Сохранение и загрузка индекса компетенций."""
+import os
+
+import numpy as np
+import pytest
+
+from candidate.embeddings import CompetencyIndex
+
+
+def make_index(rows: int, version: str, seed: int = 0) -> CompetencyIndex:
+    matrix = np.random.default_rng(seed).random((rows, 4), dtype=np.float32)
+    return CompetencyIndex([f"competency {i}" for i in range(rows)], matrix, version)
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "index" / "competencies.npy")
+    index = make_index(3, "v1")
+    index.save(path)
+
+    loaded = CompetencyIndex.load(path)
+    assert loaded.names == index.names
+    assert loaded.version == "v1"
+    np.testing.assert_array_equal(loaded.matrix, index.matrix)
+    assert sorted(os.listdir(tmp_path / "index")) == [
+        "competencies.json",
+        "competencies.npy",
+    ]
+
+
+def test_load_rejects_matrix_of_another_shape(tmp_path):
+    path = str(tmp_path / "competencies.npy")
+    meta_path = tmp_path / "competencies.json"
+    make_index(3, "v1").save(path)
+    meta = meta_path.read_bytes()
+    make_index(4, "v2").save(path)
+    # Метаданные от первого сохранения рядом с матрицей от второго
+    meta_path.write_bytes(meta)
+
+    with pytest.raises(ValueError):
+        CompetencyIndex.load(path)
+
+
+def test_verify_detects_matrix_from_another_save(tmp_path):
+    path = str(tmp_path / "competencies.npy")
+    meta_path = tmp_path / "competencies.json"
+    make_index(3, "v1", seed=1).save(path)
+    assert CompetencyIndex.load(path).verify()
+    meta = meta_path.read_bytes()
+    make_index(3, "v2", seed=2).save(path)
+    meta_path.write_bytes(meta)
+
+    assert not CompetencyIndex.load(path).verify()
@@ -0,0 +1,32 @@
+"""Импорт сервера не загружает spaCy, клиенты модели и библиотеки разбора документов."""
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Холодный импорт candidate.server занимает меньше секунды (FastAPI, pydantic, numpy);
+# вместе с spaCy и клиентами модели - около трех секунд
+IMPORT_BUDGET = 2.0
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["spacy", "pdfplumber", "ollama", "openai"]
+PROBE = f"""
+import json, sys
+import candidate.server
+print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))
+"""
+
+
+def test_server_import_is_lazy():
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+    )
+    elapsed = time.perf_counter() - start
+
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+    assert elapsed < IMPORT_BUDGET
@@ -0,0 +1,188 @@
+"""Повторные попытки, пауза между ними и выключатель ResilientBackend."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from candidate import resilience
+from candidate.backends import LLMBackend, ResilientBackend
+from candidate.resilience import (
+    BREAKER_CLOSED,
+    BREAKER_HALF_OPEN,
+    BREAKER_OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    backoff_delay,
+)
+
+
+class FakeBackend(LLMBackend):
+    """Бэкенд, который по очереди возвращает ответы или выбрасывает исключения."""
+
+    def __init__(self, *outcomes):
+        super().__init__("fake")
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def next_outcome(self) -> str:
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else "ok"
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    def chat(self, prompt, system=None, schema=None, max_tokens=4096, temperature=0.4):
+        return self.next_outcome()
+
+    async def chat_async(
+        self, prompt, system=None, schema=None, max_tokens=4096, temperature=0.4
+    ):
+        await asyncio.sleep(0)
+        return self.next_outcome()
+
+
+class Clock:
+    """Часы выключателя, которые тест переводит вручную."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def resilient(backend: LLMBackend, retries: int = 2, **breaker) -> ResilientBackend:
+    breaker = CircuitBreaker(**{"threshold": 3, "reset_timeout": 30, **breaker})
+    return ResilientBackend(backend, retries=retries, backoff=0, breaker=breaker)
+
+
+def test_transient_errors_are_retried():
+    backend = FakeBackend(TimeoutError(), ConnectionError(), "ok")
+    wrapper = resilient(backend)
+
+    assert wrapper.chat("prompt") == "ok"
+    assert backend.calls == 3
+    assert wrapper.retried == 2
+    assert wrapper.breaker.stats() == {
+        "state": BREAKER_CLOSED,
+        "failures": 0,
+        "opened": 0,
+    }
+
+
+def test_retries_are_limited():
+    backend = FakeBackend(TimeoutError(), TimeoutError(), TimeoutError(), "ok")
+    wrapper = resilient(backend, retries=1, threshold=0)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(wrapper.chat_async("prompt"))
+    assert backend.calls == 2
+
+
+def test_other_errors_are_not_retried():
+    backend = FakeBackend(ValueError("bad request"), "ok")
+    wrapper = resilient(backend)
+
+    with pytest.raises(ValueError):
+        wrapper.chat("prompt")
+    assert backend.calls == 1
+    assert wrapper.breaker.failures == 0
+
+
+@pytest.mark.parametrize("attempt", range(6))
+def test_backoff_delay_bounds(attempt):
+    delays = [backoff_delay(attempt, base=0.5, cap=4) for _ in range(50)]
+    expected = min(4, 0.5 * 2**attempt)
+
+    assert all(expected / 2 <= delay <= expected for delay in delays)
+
+
+def test_breaker_opens_and_closes_after_probe(clock):
+    backend = FakeBackend(*[TimeoutError()] * 3)
+    wrapper = resilient(backend)
+
+    with pytest.raises(TimeoutError):
+        wrapper.chat("prompt")
+    assert wrapper.breaker.state == BREAKER_OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        wrapper.chat("prompt")
+    assert error.value.retry_after == 30
+    assert backend.calls == 3
+
+    clock.now += 30
+    assert wrapper.breaker.state == BREAKER_HALF_OPEN
+    assert wrapper.chat("prompt") == "ok"
+    assert wrapper.breaker.state == BREAKER_CLOSED
+
+
+def test_failed_probe_opens_breaker_again(clock):
+    breaker = CircuitBreaker(threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+
+    probe = breaker.allow()
+    assert probe
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record_failure(probe)
+
+    assert breaker.state == BREAKER_OPEN
+    assert breaker.opened == 2
+
+
+def test_late_results_do_not_change_open_breaker(clock):
+    breaker = CircuitBreaker(threshold=1, reset_timeout=30)
+    assert not breaker.allow()
+    breaker.record_failure()
+    clock.now += 30
+    probe = breaker.allow()
+
+    # Ответы запросов, отправленных до размыкания
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.stats() == {"state": BREAKER_HALF_OPEN, "failures": 1, "opened": 1}
+
+    breaker.record_success(probe)
+    assert breaker.state == BREAKER_CLOSED
+
+
+def test_cancelled_probe_is_released(clock):
+    started = asyncio.Event()
+
+    class HangingBackend(FakeBackend):
+        async def chat_async(self, *args, **kwargs):
+            started.set()
+            await asyncio.Event().wait()
+
+    wrapper = resilient(HangingBackend(), threshold=1)
+    wrapper.breaker.record_failure()
+    clock.now += 30
+
+    async def cancel_probe() -> None:
+        task = asyncio.create_task(wrapper.chat_async("prompt"))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_probe())
+
+    assert wrapper.breaker.state == BREAKER_HALF_OPEN
+    assert wrapper.breaker.allow()
+
+
+def test_sync_probe_is_released_on_interrupt(clock):
+    wrapper = resilient(FakeBackend(KeyboardInterrupt()), threshold=1)
+    wrapper.breaker.record_failure()
+    clock.now += 30
+
+    with pytest.raises(KeyboardInterrupt):
+        wrapper.chat("prompt")
+    assert wrapper.breaker.allow()